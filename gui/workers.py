@@ -1,7 +1,7 @@
 import traceback
 from PyQt6.QtCore import QThread, pyqtSignal, QWaitCondition, QMutex
 from phone_agent.agent import PhoneAgent, AgentConfig
-from phone_agent.model import ModelConfig
+from phone_agent.model import CallbackSink, ModelConfig
 
 class AgentWorker(QThread):
     """Worker thread for running the agent to keep UI responsive."""
@@ -32,6 +32,8 @@ class AgentWorker(QThread):
         try:
             # Reconstruct configs
             model_config = ModelConfig(**self.model_config_dict)
+            # Stream thinking to the UI line by line instead of the terminal
+            model_config.sink = CallbackSink(self._handle_thinking_line, line_buffered=True)
             agent_config = AgentConfig(**self.agent_config_dict)
             
             # Create agent with callback
@@ -49,12 +51,16 @@ class AgentWorker(QThread):
             traceback.print_exc()
             self.signal_error.emit(self.device_id, str(e))
 
+    def _handle_thinking_line(self, line):
+        """Forward one line of streamed thinking to the UI."""
+        self.signal_thinking.emit(self.device_id, line)
+
     def _handle_agent_event(self, event_type, data):
         """Callback to bridge Agent events to Qt Signals."""
         try:
-            if event_type == "thinking":
-                self.signal_thinking.emit(self.device_id, data.get("content", ""))
-            elif event_type == "action":
+            # "thinking" events are not forwarded: the model's thinking is
+            # already streamed to signal_thinking through the output sink
+            if event_type == "action":
                 self.signal_action.emit(self.device_id, data.get("action", {}), data.get("screenshot", ""))
             elif event_type == "error":
                 self.signal_error.emit(self.device_id, data.get("error", "Unknown error"))
@@ -14,19 +14,26 @@ Environment Variables:
 """
 
 import argparse
+import logging
 import os
 import shutil
 import subprocess
 import sys
 from urllib.parse import urlparse
 
-from openai import OpenAI
-
 from phone_agent import PhoneAgent
-from phone_agent.adb import ADBConnection, list_devices
+from phone_agent.adb import (
+    ADBConnection,
+    list_devices,
+    set_adb_backend,
+    set_gesture_method,
+)
 from phone_agent.agent import AgentConfig
-from phone_agent.config.apps import list_supported_apps
-from phone_agent.model import ModelConfig
+from phone_agent.config.apps import list_supported_apps, load_apps_file
+from phone_agent.fleet import FleetConfig, FleetRunner, load_tasks
+from phone_agent.metrics import set_trace_file, start_metrics_server
+from phone_agent.model import ContextConfig, ModelConfig
+from phone_agent.model.pool import get_openai_client
 
 
 def check_system_requirements() -> bool:
@@ -191,8 +198,8 @@ def check_model_api(base_url: str, model_name: str, api_key: str = "EMPTY") -> b
     # Check 1: Network connectivity using chat API
     print(f"1. Checking API connectivity ({base_url})...", end=" ")
     try:
-        # Create OpenAI client
-        client = OpenAI(base_url=base_url, api_key=api_key, timeout=30.0)
+        # Use the shared client, so the agent reuses this warm connection
+        client = get_openai_client(base_url, api_key).with_options(timeout=30.0)
 
         # Use chat completion to test connectivity (more universally supported than /models)
         response = client.chat.completions.create(
@@ -280,6 +287,12 @@ Examples:
 
     # List supported apps
     python main.py --list-apps
+
+    # Run a queue of tasks across all connected devices
+    python main.py --fleet tasks.jsonl --fleet-workers 4
+
+    # Export step latencies for Prometheus and to a trace file
+    python main.py --metrics-port 9464 --trace-file trace.jsonl "打开微信"
         """,
     )
 
@@ -351,6 +364,136 @@ Examples:
         help="Enable TCP/IP debugging on USB device (default port: 5555)",
     )
 
+    parser.add_argument(
+        "--adb-backend",
+        type=str,
+        choices=["subprocess", "session", "socket"],
+        default=os.getenv("PHONE_AGENT_ADB_BACKEND", "subprocess"),
+        help="How device commands are sent: one adb process per command "
+        "(subprocess), a persistent adb shell per device (session), or the "
+        "adb server socket protocol without spawning processes (socket)",
+    )
+
+    parser.add_argument(
+        "--gesture-method",
+        type=str,
+        choices=["auto", "sendevent", "motionevent", "input"],
+        default=os.getenv("PHONE_AGENT_GESTURE_METHOD", "auto"),
+        help="How double taps, long presses and gestures are sent: raw "
+        "touchscreen events (sendevent), `input motionevent` (Android 11+), "
+        "`input tap`/`input swipe` (input), or the best available (auto)",
+    )
+
+    parser.add_argument(
+        "--context-budget",
+        type=int,
+        default=None,
+        help="Estimated prompt token budget; the oldest turns are dropped to stay "
+        "under it (env: PHONE_AGENT_CONTEXT_TOKEN_BUDGET)",
+    )
+
+    parser.add_argument(
+        "--context-turns",
+        type=int,
+        default=None,
+        help="Recent turns resent verbatim; older thinking is truncated and old "
+        "screen info dropped (env: PHONE_AGENT_CONTEXT_KEEP_TURNS)",
+    )
+
+    parser.add_argument(
+        "--context-append-only",
+        action="store_true",
+        help="Never rewrite already-sent messages, so server-side prefix caching "
+        "can reuse the previous step's prompt (env: PHONE_AGENT_CONTEXT_APPEND_ONLY)",
+    )
+
+    parser.add_argument(
+        "--apps-file",
+        type=str,
+        default=None,
+        help="JSON or TOML file with extra apps and aliases to add to the "
+        "built-in list (env: PHONE_AGENT_APPS_FILE)",
+    )
+
+    parser.add_argument(
+        "--batching",
+        action="store_true",
+        default=os.getenv("PHONE_AGENT_BATCHING", "").lower() in ("1", "true", "yes"),
+        help="Experimental, off by default: coalesce model requests from "
+        "concurrent agents into batches. Showed no throughput gain in "
+        "scripts/benchmark_batcher.py and adds up to the batch window of "
+        "latency per request (env: PHONE_AGENT_BATCHING; tune with "
+        "PHONE_AGENT_BATCH_WINDOW)",
+    )
+
+    parser.add_argument(
+        "--action-sequences",
+        action="store_true",
+        default=os.getenv("PHONE_AGENT_ACTION_SEQUENCES", "").lower()
+        in ("1", "true", "yes"),
+        help="Run all actions of an answer that holds several in one device "
+        "round trip (env: PHONE_AGENT_ACTION_SEQUENCES; tune the pause between "
+        "them with PHONE_AGENT_SEQUENCE_STEP_DELAY)",
+    )
+
+    parser.add_argument(
+        "--keyboard-session",
+        action="store_true",
+        default=os.getenv("PHONE_AGENT_KEYBOARD_SESSION", "").lower()
+        in ("1", "true", "yes"),
+        help="Keep ADB Keyboard active for the whole run instead of switching "
+        "keyboards around every Type (env: PHONE_AGENT_KEYBOARD_SESSION)",
+    )
+
+    # Fleet options
+    parser.add_argument(
+        "--fleet",
+        type=str,
+        metavar="TASKS_JSONL",
+        help="Run the tasks in a JSONL file across all connected devices",
+    )
+
+    parser.add_argument(
+        "--fleet-results",
+        type=str,
+        default=None,
+        help="JSONL file to append fleet results to (default: TASKS_JSONL "
+        "with a .results.jsonl suffix)",
+    )
+
+    parser.add_argument(
+        "--fleet-workers",
+        type=int,
+        default=None,
+        help="Maximum concurrent fleet agents (default: number of devices, "
+        "env: PHONE_AGENT_FLEET_WORKERS)",
+    )
+
+    parser.add_argument(
+        "--fleet-retries",
+        type=int,
+        default=None,
+        help="Retries for a fleet task whose run fails (default: 2, "
+        "env: PHONE_AGENT_FLEET_RETRIES)",
+    )
+
+    # Metrics options
+    parser.add_argument(
+        "--metrics-port",
+        type=int,
+        default=int(os.getenv("PHONE_AGENT_METRICS_PORT", "0")) or None,
+        help="Serve per-step latency histograms at http://127.0.0.1:PORT/metrics "
+        "in the Prometheus text format (env: PHONE_AGENT_METRICS_PORT)",
+    )
+
+    parser.add_argument(
+        "--trace-file",
+        type=str,
+        default=os.getenv("PHONE_AGENT_TRACE_FILE"),
+        help="Append one JSON line per agent step with its phase timings "
+        "(env: PHONE_AGENT_TRACE_FILE)",
+    )
+
     # Other options
     parser.add_argument(
         "--quiet", "-q", action="store_true", help="Suppress verbose output"
@@ -448,9 +591,53 @@ def handle_device_commands(args) -> bool:
     return False
 
 
+def run_fleet(args, model_config: ModelConfig, agent_config: AgentConfig) -> None:
+    """Run the tasks of a fleet file and print a summary."""
+    try:
+        tasks = load_tasks(args.fleet)
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+    fleet_config = FleetConfig(
+        device_ids=[args.device_id] if args.device_id else None,
+        agent_output="null" if args.quiet else "logging",
+    )
+    if args.fleet_workers is not None:
+        fleet_config.max_workers = args.fleet_workers
+    if args.fleet_retries is not None:
+        fleet_config.max_retries = args.fleet_retries
+    if not args.quiet:
+        # Agent output is logged per device as phone_agent.fleet.<device_id>
+        logging.basicConfig(format="[%(name)s] %(message)s")
+        logging.getLogger("phone_agent.fleet").setLevel(logging.INFO)
+
+    results_path = args.fleet_results or (
+        os.path.splitext(args.fleet)[0] + ".results.jsonl"
+    )
+
+    print("=" * 50)
+    print(f"Fleet: {len(tasks)} tasks from {args.fleet}")
+    print(f"Results: {results_path}")
+    print("=" * 50)
+
+    runner = FleetRunner(model_config, agent_config, fleet_config)
+    results = runner.run(tasks, results_path)
+
+    succeeded = sum(result.success for result in results)
+    print("=" * 50)
+    print(f"Completed: {succeeded}/{len(results)} tasks succeeded")
+    if succeeded < len(results):
+        sys.exit(1)
+
+
 def main():
     """Main entry point."""
     args = parse_args()
+    set_adb_backend(args.adb_backend)
+    set_gesture_method(args.gesture_method)
+    if args.apps_file:
+        load_apps_file(args.apps_file)
 
     # Handle --list-apps (no system check needed)
     if args.list_apps:
@@ -477,15 +664,37 @@ def main():
         model_name=args.model,
         api_key=args.apikey,
         lang=args.lang,
+        batching=args.batching,
     )
 
+    if args.metrics_port:
+        start_metrics_server(args.metrics_port)
+        print(f"Metrics: http://127.0.0.1:{args.metrics_port}/metrics")
+    if args.trace_file:
+        set_trace_file(args.trace_file)
+
+    context_config = ContextConfig()
+    if args.context_budget is not None:
+        context_config.token_budget = args.context_budget
+    if args.context_turns is not None:
+        context_config.keep_turns = args.context_turns
+    if args.context_append_only:
+        context_config.append_only = True
+
     agent_config = AgentConfig(
         max_steps=args.max_steps,
         device_id=args.device_id,
         verbose=not args.quiet,
         lang=args.lang,
+        context=context_config,
+        action_sequences=args.action_sequences,
+        keyboard_session=args.keyboard_session,
     )
 
+    if args.fleet:
+        run_fleet(args, model_config, agent_config)
+        return
+
     # Create agent
     agent = PhoneAgent(
         model_config=model_config,
@@ -6,6 +6,7 @@ using AI models for visual understanding and decision making.
 """
 
 from phone_agent.agent import PhoneAgent
+from phone_agent.async_agent import AsyncPhoneAgent
 
 __version__ = "0.1.0"
-__all__ = ["PhoneAgent"]
+__all__ = ["PhoneAgent", "AsyncPhoneAgent"]
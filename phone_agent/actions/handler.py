@@ -1,11 +1,15 @@
 """Action handler for processing AI model outputs."""
 
-import ast
 import re
 import time
 from dataclasses import dataclass
 from typing import Any, Callable
 
+from phone_agent.actions.parser import (
+    parse_action_ast,
+    parse_action_fast,
+    parse_action_sequence,
+)
 from phone_agent.adb import (
     back,
     clear_text,
@@ -19,7 +23,13 @@ from phone_agent.adb import (
     tap,
     type_text,
 )
+from phone_agent.adb.device import invalidate_current_app
+from phone_agent.adb.input import KeyboardSession
+from phone_agent.adb.script import DeviceScript
+from phone_agent.adb.settle import pop_settle_time, settle
+from phone_agent.config.apps import get_app_registry
 from phone_agent.config.timing import TIMING_CONFIG
+from phone_agent.metrics import get_metrics
 
 
 @dataclass
@@ -41,6 +51,8 @@ class ActionHandler:
         confirmation_callback: Optional callback for sensitive action confirmation.
             Should return True to proceed, False to cancel.
         takeover_callback: Optional callback for takeover requests (login, captcha).
+        keyboard_session: Optional session that keeps ADB Keyboard active
+            across Type actions instead of switching keyboards for each one.
     """
 
     def __init__(
@@ -48,10 +60,14 @@ class ActionHandler:
         device_id: str | None = None,
         confirmation_callback: Callable[[str], bool] | None = None,
         takeover_callback: Callable[[str], None] | None = None,
+        keyboard_session: KeyboardSession | None = None,
     ):
         self.device_id = device_id
+        self.keyboard_session = keyboard_session
         self.confirmation_callback = confirmation_callback or self._default_confirmation
         self.takeover_callback = takeover_callback or self._default_takeover
+        # Seconds the last executed action spent waiting for the screen to settle
+        self.last_settle_time = 0.0
 
     def execute(
         self, action: dict[str, Any], screen_width: int, screen_height: int
@@ -68,12 +84,24 @@ class ActionHandler:
             ActionResult indicating success and whether to finish.
         """
         action_type = action.get("_metadata")
+        self.last_settle_time = 0.0
 
         if action_type == "finish":
             return ActionResult(
                 success=True, should_finish=True, message=action.get("message")
             )
 
+        if action_type == "parse_error":
+            # Nothing is run; the next step shows the model the error
+            return ActionResult(
+                success=False, should_finish=False, message=action.get("message")
+            )
+
+        if action_type == "sequence":
+            return self.execute_batch(
+                action.get("actions", []), screen_width, screen_height
+            )
+
         if action_type != "do":
             return ActionResult(
                 success=False,
@@ -91,12 +119,118 @@ class ActionHandler:
                 message=f"Unknown action: {action_name}",
             )
 
+        pop_settle_time()
+        start = time.perf_counter()
         try:
             return handler_method(action, screen_width, screen_height)
         except Exception as e:
             return ActionResult(
                 success=False, should_finish=False, message=f"Action failed: {e}"
             )
+        finally:
+            self.last_settle_time = pop_settle_time()
+            get_metrics().observe(
+                "phone_agent_action_seconds",
+                time.perf_counter() - start,
+                action=action_name,
+                device=self.device_id or "default",
+            )
+
+    def execute_batch(
+        self, actions: list[dict[str, Any]], screen_width: int, screen_height: int
+    ) -> ActionResult:
+        """
+        Execute a sequence of actions in one device round trip.
+
+        The device actions are compiled into a single shell script, run with
+        one adb invocation, followed by a single settle wait. Every action is
+        checked (and sensitive taps confirmed) before anything runs, so an
+        invalid or cancelled action leaves the device untouched.
+
+        The sequence ends at a finish, or at an action that needs the user
+        (Take_over, Interact): that action runs after the script, and any
+        actions after it are dropped since they were planned for a screen
+        the user is about to change.
+
+        Args:
+            actions: Action dictionaries from the model or a macro.
+            screen_width: Current screen width in pixels.
+            screen_height: Current screen height in pixels.
+
+        Returns:
+            ActionResult of the whole sequence.
+        """
+        self.last_settle_time = 0.0
+        if not actions:
+            return ActionResult(False, False, "Empty action sequence")
+
+        script = DeviceScript(self.device_id)
+        last_action = None
+        for action in actions:
+            action_type = action.get("_metadata")
+            if action_type == "finish":
+                last_action = action
+                break
+            if action_type != "do":
+                return ActionResult(
+                    success=False,
+                    should_finish=True,
+                    message=f"Unknown action type: {action_type}",
+                )
+
+            action_name = action.get("action")
+            builder = self._get_script_builder(action_name)
+            if builder is None:
+                if self._get_handler(action_name) is None:
+                    return ActionResult(False, False, f"Unknown action: {action_name}")
+                last_action = action
+                break
+
+            error = builder(script, action, screen_width, screen_height)
+            if error is not None:
+                return error
+
+        pop_settle_time()
+        start = time.perf_counter()
+        try:
+            script.run()
+        except Exception as e:
+            return ActionResult(
+                success=False, should_finish=False, message=f"Action failed: {e}"
+            )
+        finally:
+            script_settle_time = pop_settle_time()
+            self.last_settle_time = script_settle_time
+            get_metrics().observe(
+                "phone_agent_action_seconds",
+                time.perf_counter() - start,
+                action="Sequence",
+                device=self.device_id or "default",
+            )
+
+        if last_action is None:
+            return ActionResult(True, False)
+        result = self.execute(last_action, screen_width, screen_height)
+        self.last_settle_time += script_settle_time
+        return result
+
+    def _get_script_builder(self, action_name: str) -> Callable | None:
+        """Get the method that adds an action to a DeviceScript."""
+        builders = {
+            "Launch": self._script_launch,
+            "Tap": self._script_tap,
+            "Type": self._script_type,
+            "Type_Name": self._script_type,
+            "Swipe": self._script_swipe,
+            "Back": self._script_back,
+            "Home": self._script_home,
+            "Double Tap": self._script_double_tap,
+            "Long Press": self._script_long_press,
+            "Wait": self._script_wait,
+            "Note": self._script_nothing,
+            "Call_API": self._script_nothing,
+        }
+        return builders.get(action_name)
 
     def _get_handler(self, action_name: str) -> Callable | None:
         """Get the handler method for an action."""
@@ -161,20 +295,24 @@ class ActionHandler:
         """Handle text input action."""
         text = action.get("text", "")
 
+        if self.keyboard_session is not None:
+            self.keyboard_session.type_text(text)
+            return ActionResult(True, False)
+
         # Switch to ADB keyboard
         original_ime = detect_and_set_adb_keyboard(self.device_id)
-        time.sleep(TIMING_CONFIG.action.keyboard_switch_delay)
+        settle(TIMING_CONFIG.action.keyboard_switch_delay, self.device_id)
 
         # Clear existing text and type new text
         clear_text(self.device_id)
-        time.sleep(TIMING_CONFIG.action.text_clear_delay)
+        settle(TIMING_CONFIG.action.text_clear_delay, self.device_id)
 
         type_text(text, self.device_id)
-        time.sleep(TIMING_CONFIG.action.text_input_delay)
+        settle(TIMING_CONFIG.action.text_input_delay, self.device_id)
 
         # Restore original keyboard
         restore_keyboard(original_ime, self.device_id)
-        time.sleep(TIMING_CONFIG.action.keyboard_restore_delay)
+        settle(TIMING_CONFIG.action.keyboard_restore_delay, self.device_id)
 
         return ActionResult(True, False)
 
@@ -224,19 +362,28 @@ class ActionHandler:
 
     def _handle_wait(self, action: dict, width: int, height: int) -> ActionResult:
         """Handle wait action."""
+        time.sleep(self._wait_duration(action))
+        # The app may have moved on by itself while we waited
+        invalidate_current_app(self.device_id)
+        return ActionResult(True, False)
+
+    @staticmethod
+    def _wait_duration(action: dict) -> float:
+        """Get the duration of a wait action in seconds."""
         duration_str = action.get("duration", "1 seconds")
         try:
-            duration = float(duration_str.replace("seconds", "").strip())
+            return float(duration_str.replace("seconds", "").strip())
         except ValueError:
-            duration = 1.0
-
-        time.sleep(duration)
-        return ActionResult(True, False)
+            return 1.0
 
     def _handle_takeover(self, action: dict, width: int, height: int) -> ActionResult:
         """Handle takeover request (login, captcha, etc.)."""
         message = action.get("message", "User intervention required")
+        # Give the user their own keyboard back while they take over
+        if self.keyboard_session is not None:
+            self.keyboard_session.restore()
         self.takeover_callback(message)
+        invalidate_current_app(self.device_id)
         return ActionResult(True, False)
 
     def _handle_note(self, action: dict, width: int, height: int) -> ActionResult:
@@ -256,6 +403,109 @@ class ActionHandler:
         # This action signals that user input is needed
         return ActionResult(True, False, message="User interaction required")
 
+    def _script_launch(
+        self, script: DeviceScript, action: dict, width: int, height: int
+    ) -> ActionResult | None:
+        """Add an app launch to a script."""
+        app_name = action.get("app")
+        if not app_name:
+            return ActionResult(False, False, "No app name specified")
+
+        package = get_app_registry().resolve_package(app_name)
+        if package is None:
+            return ActionResult(False, False, f"App not found: {app_name}")
+        script.launch(package)
+        return None
+
+    def _script_tap(
+        self, script: DeviceScript, action: dict, width: int, height: int
+    ) -> ActionResult | None:
+        """Add a tap to a script, confirming it first if it is sensitive."""
+        element = action.get("element")
+        if not element:
+            return ActionResult(False, False, "No element coordinates")
+
+        if "message" in action:
+            if not self.confirmation_callback(action["message"]):
+                return ActionResult(
+                    success=False,
+                    should_finish=True,
+                    message="User cancelled sensitive operation",
+                )
+
+        script.tap(*self._convert_relative_to_absolute(element, width, height))
+        return None
+
+    def _script_type(
+        self, script: DeviceScript, action: dict, width: int, height: int
+    ) -> ActionResult | None:
+        """Add text input to a script."""
+        script.type_text(action.get("text", ""))
+        return None
+
+    def _script_swipe(
+        self, script: DeviceScript, action: dict, width: int, height: int
+    ) -> ActionResult | None:
+        """Add a swipe to a script."""
+        start = action.get("start")
+        end = action.get("end")
+        if not start or not end:
+            return ActionResult(False, False, "Missing swipe coordinates")
+
+        start_x, start_y = self._convert_relative_to_absolute(start, width, height)
+        end_x, end_y = self._convert_relative_to_absolute(end, width, height)
+        script.swipe(start_x, start_y, end_x, end_y)
+        return None
+
+    def _script_back(
+        self, script: DeviceScript, action: dict, width: int, height: int
+    ) -> ActionResult | None:
+        """Add a back button press to a script."""
+        script.back()
+        return None
+
+    def _script_home(
+        self, script: DeviceScript, action: dict, width: int, height: int
+    ) -> ActionResult | None:
+        """Add a home button press to a script."""
+        script.home()
+        return None
+
+    def _script_double_tap(
+        self, script: DeviceScript, action: dict, width: int, height: int
+    ) -> ActionResult | None:
+        """Add a double tap to a script."""
+        element = action.get("element")
+        if not element:
+            return ActionResult(False, False, "No element coordinates")
+
+        script.double_tap(*self._convert_relative_to_absolute(element, width, height))
+        return None
+
+    def _script_long_press(
+        self, script: DeviceScript, action: dict, width: int, height: int
+    ) -> ActionResult | None:
+        """Add a long press to a script."""
+        element = action.get("element")
+        if not element:
+            return ActionResult(False, False, "No element coordinates")
+
+        script.long_press(*self._convert_relative_to_absolute(element, width, height))
+        return None
+
+    def _script_wait(
+        self, script: DeviceScript, action: dict, width: int, height: int
+    ) -> ActionResult | None:
+        """Add a pause to a script."""
+        script.sleep(self._wait_duration(action))
+        return None
+
+    def _script_nothing(
+        self, script: DeviceScript, action: dict, width: int, height: int
+    ) -> ActionResult | None:
+        """Accept an action that has no effect on the device (Note, Call_API)."""
+        return None
+
     @staticmethod
     def _default_confirmation(message: str) -> bool:
         """Default confirmation callback using console input."""
@@ -272,6 +522,11 @@ def parse_action(response: str) -> dict[str, Any]:
     """
     Parse action from model response.
 
+    Uses the cached action grammar parser, which ignores trailing text after
+    the call and accepts a finish() cut off before its closing parenthesis,
+    and falls back to the AST-based parser for anything outside the grammar.
+    A truncated do() call is rejected, since it may have lost arguments.
+
     Args:
         response: Raw response string from the model.
 
@@ -281,37 +536,34 @@ def parse_action(response: str) -> dict[str, Any]:
     Raises:
         ValueError: If the response cannot be parsed.
     """
+    response = response.strip()
+    try:
+        return parse_action_fast(response)
+    except ValueError:
+        return parse_action_ast(response)
+
+
+def parse_actions(response: str) -> list[dict[str, Any]]:
+    """
+    Parse one or more actions from model response.
+
+    A response may hold several calls separated by newlines, ";" or ",",
+    e.g. a Tap, a Type and another Tap that fill in a form.
+
+    Args:
+        response: Raw response string from the model.
+
+    Returns:
+        Parsed action dictionaries, in order.
+
+    Raises:
+        ValueError: If the response cannot be parsed.
+    """
+    response = response.strip()
     try:
-        response = response.strip()
-        if response.startswith("do"):
-            # Use AST parsing instead of eval for safety
-            try:
-                tree = ast.parse(response, mode="eval")
-                if not isinstance(tree.body, ast.Call):
-                    raise ValueError("Expected a function call")
-
-                call = tree.body
-                # Extract keyword arguments safely
-                action = {"_metadata": "do"}
-                for keyword in call.keywords:
-                    key = keyword.arg
-                    value = ast.literal_eval(keyword.value)
-                    action[key] = value
-
-                return action
-            except (SyntaxError, ValueError) as e:
-                raise ValueError(f"Failed to parse do() action: {e}")
-
-        elif response.startswith("finish"):
-            action = {
-                "_metadata": "finish",
-                "message": response.replace("finish(message=", "")[1:-2],
-            }
-        else:
-            raise ValueError(f"Failed to parse action: {response}")
-        return action
-    except Exception as e:
-        raise ValueError(f"Failed to parse action: {e}")
+        return parse_action_sequence(response)
+    except ValueError:
+        return [parse_action_ast(response)]
 
 
 def do(**kwargs) -> dict[str, Any]:
@@ -324,3 +576,13 @@ def finish(**kwargs) -> dict[str, Any]:
     """Helper function for creating 'finish' actions."""
     kwargs["_metadata"] = "finish"
     return kwargs
+
+
+def sequence(actions: list[dict[str, Any]]) -> dict[str, Any]:
+    """Helper function for creating an action that runs several actions."""
+    return {"_metadata": "sequence", "actions": actions}
+
+
+def parse_error(error: Exception) -> dict[str, Any]:
+    """Helper function for an answer that could not be parsed into an action."""
+    return {"_metadata": "parse_error", "message": f"Invalid action: {error}"}
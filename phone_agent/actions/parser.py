@@ -0,0 +1,344 @@
+"""Parser for the `do(...)` / `finish(...)` calls emitted by the model."""
+
+import ast
+import re
+from functools import lru_cache
+from typing import Any
+
+# Calls the model may emit
+ACTION_CALLS = ("do", "finish")
+
+_NAME = re.compile(r"[A-Za-z_][A-Za-z0-9_]*")
+_NUMBER = re.compile(r"[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?")
+_SPACE = re.compile(r"\s*")
+_STRING_STOP = re.compile(r"[\\'\"]")
+# Whitespace, ";" or "," between the calls of an action sequence
+_SEPARATOR = re.compile(r"[\s;,]*")
+_CONSTANTS = {"True": True, "False": False, "None": None}
+_SEQUENCE_END = {"[": "]", "(": ")"}
+
+# Single-regex fast path for the usual shapes: plain strings, integers and
+# [x, y] points. Anything else goes through _ActionParser.
+_SIMPLE_START = re.compile(r"\s*(do|finish)\s*\(\s*")
+_SIMPLE_KEYWORD = re.compile(
+    r"([A-Za-z_]\w*)\s*=\s*"
+    r"(?:\"([^\"\\]*)\"|'([^'\\]*)'|\[\s*(-?\d+)\s*,\s*(-?\d+)\s*\]|(-?\d+))"
+    r"\s*(?:(\))|,\s*(\))?)\s*"
+)
+
+
+class ActionSyntaxError(ValueError):
+    """Raised when an action call does not match the action grammar."""
+
+    def __init__(self, message: str, position: int):
+        super().__init__(f"{message} at position {position}")
+        self.position = position
+
+
+class _ActionParser:
+    """
+    Recursive-descent parser for the action grammar:
+
+        call     := NAME "(" [keyword ("," keyword)* [","]] ")"
+        keyword  := NAME "=" value
+        value    := STRING | NUMBER | True | False | None
+                  | "[" [value ("," value)* [","]] "]"
+                  | "(" [value ("," value)* [","]] ")"
+
+    Text after the closing parenthesis (e.g. "</answer>") is ignored. Only
+    a finish call may be cut off: it is closed implicitly and its message
+    may be truncated. A truncated do call is an error, since it may have
+    lost arguments such as the message that asks for confirmation.
+    """
+
+    def __init__(self, text: str, pos: int = 0):
+        self.text = text
+        self.pos = pos
+
+    def parse(self) -> tuple[str, dict[str, Any]]:
+        start = self.pos
+        name = self._name()
+        if name not in ACTION_CALLS:
+            raise ActionSyntaxError(f"Unknown call {name!r}", start)
+        self._expect("(")
+
+        keywords: dict[str, Any] = {}
+        while True:
+            self._skip_space()
+            if self.pos >= len(self.text):
+                if name != "finish":
+                    raise ActionSyntaxError("Unclosed call", self.pos)
+                break
+            if self.text[self.pos] == ")":
+                break
+            key = self._name()
+            self._expect("=")
+            keywords[key] = self._value(allow_truncated=name == "finish")
+            self._skip_space()
+            if self.pos < len(self.text) and self.text[self.pos] == ",":
+                self.pos += 1
+            elif self.pos < len(self.text) and self.text[self.pos] != ")":
+                raise ActionSyntaxError("Expected ',' or ')'", self.pos)
+        return name, keywords
+
+    def _skip_space(self) -> None:
+        self.pos = _SPACE.match(self.text, self.pos).end()
+
+    def _expect(self, char: str) -> None:
+        self._skip_space()
+        if not self.text.startswith(char, self.pos):
+            raise ActionSyntaxError(f"Expected {char!r}", self.pos)
+        self.pos += 1
+
+    def _name(self) -> str:
+        self._skip_space()
+        match = _NAME.match(self.text, self.pos)
+        if match is None:
+            raise ActionSyntaxError("Expected a name", self.pos)
+        self.pos = match.end()
+        return match.group()
+
+    def _value(self, allow_truncated: bool = False) -> Any:
+        self._skip_space()
+        if self.pos >= len(self.text):
+            raise ActionSyntaxError("Missing value", self.pos)
+
+        char = self.text[self.pos]
+        if char in "\"'":
+            return self._string(allow_truncated)
+        if char in _SEQUENCE_END:
+            return self._sequence(char)
+
+        match = _NUMBER.match(self.text, self.pos) or _NAME.match(self.text, self.pos)
+        if match is None:
+            raise ActionSyntaxError("Unsupported value", self.pos)
+        if match.end() >= len(self.text):
+            # "30" could be the start of "300"
+            raise ActionSyntaxError("Truncated value", self.pos)
+        self.pos = match.end()
+
+        token = match.group()
+        if token in _CONSTANTS:
+            return _CONSTANTS[token]
+        if _NUMBER.fullmatch(token) is None:
+            raise ActionSyntaxError(f"Unsupported name {token!r}", match.start())
+        if any(c in token for c in ".eE"):
+            return float(token)
+        return int(token)
+
+    def _sequence(self, opening: str) -> list | tuple:
+        closing = _SEQUENCE_END[opening]
+        self.pos += 1
+        items = []
+        while True:
+            self._skip_space()
+            if self.pos >= len(self.text):
+                raise ActionSyntaxError("Truncated list", self.pos)
+            if self.text[self.pos] == closing:
+                self.pos += 1
+                break
+            items.append(self._value())
+            self._skip_space()
+            if self.text.startswith(",", self.pos):
+                self.pos += 1
+            elif not self.text.startswith(closing, self.pos):
+                raise ActionSyntaxError(f"Expected ',' or {closing!r}", self.pos)
+        return items if opening == "[" else tuple(items)
+
+    def _string(self, allow_truncated: bool) -> str:
+        text = self.text
+        quote = text[self.pos]
+        start = self.pos + 1
+        index = start
+        escaped = False
+        while True:
+            match = _STRING_STOP.search(text, index)
+            if match is None:
+                if not allow_truncated:
+                    raise ActionSyntaxError("Truncated string", self.pos)
+                self.pos = len(text)
+                return self._decode(text[start:], quote, escaped)
+
+            index = match.start()
+            if text[index] == "\\":
+                escaped = True
+                index += 2
+                continue
+            if text[index] != quote:
+                index += 1
+                continue
+
+            # A quote only ends the string if a delimiter follows; otherwise
+            # it is an unescaped quote inside the text
+            after = _SPACE.match(text, index + 1).end()
+            if after >= len(text) or text[after] in ",)]":
+                self.pos = index + 1
+                return self._decode(text[start:index], quote, escaped)
+            index += 1
+
+    @staticmethod
+    def _decode(body: str, quote: str, escaped: bool) -> str:
+        if not escaped:
+            return body
+        try:
+            return ast.literal_eval(quote + body + quote)
+        except (SyntaxError, ValueError):
+            return body
+
+
+def _freeze(value: Any) -> Any:
+    if isinstance(value, list):
+        return ("list", tuple(_freeze(item) for item in value))
+    if isinstance(value, tuple):
+        return ("tuple", tuple(_freeze(item) for item in value))
+    return value
+
+
+def _thaw(value: Any) -> Any:
+    if isinstance(value, tuple):
+        kind, items = value
+        items = [_thaw(item) for item in items]
+        return items if kind == "list" else tuple(items)
+    return value
+
+
+def _parse_simple(text: str) -> tuple[str, dict[str, Any]] | None:
+    """Parse a call made only of simple keywords, or return None."""
+    match = _SIMPLE_START.match(text)
+    if match is None:
+        return None
+    name = match.group(1)
+    keywords: dict[str, Any] = {}
+    pos = match.end()
+    if text.startswith(")", pos):
+        return name, keywords
+
+    while True:
+        match = _SIMPLE_KEYWORD.match(text, pos)
+        if match is None:
+            return None
+        key, double, single, x, y, number, close, close_after_comma = match.groups()
+        if double is not None:
+            keywords[key] = double
+        elif single is not None:
+            keywords[key] = single
+        elif x is not None:
+            keywords[key] = [int(x), int(y)]
+        else:
+            keywords[key] = int(number)
+        if close or close_after_comma:
+            return name, keywords
+        pos = match.end()
+
+
+@lru_cache(maxsize=512)
+def _parse_cached(text: str) -> tuple[str, tuple[tuple[str, Any], ...]]:
+    parsed = _parse_simple(text) or _ActionParser(text).parse()
+    name, keywords = parsed
+    return name, tuple((key, _freeze(value)) for key, value in keywords.items())
+
+
+def parse_action_fast(text: str) -> dict[str, Any]:
+    """
+    Parse an action call with the action grammar.
+
+    Results are cached, so repeated identical outputs are parsed once; each
+    call returns a fresh dictionary.
+
+    Args:
+        text: Action text, e.g. 'do(action="Tap", element=[500, 300])'.
+
+    Returns:
+        Parsed action dictionary with "_metadata" set to "do" or "finish".
+
+    Raises:
+        ActionSyntaxError: If the text does not match the grammar.
+    """
+    name, keywords = _parse_cached(text)
+    action = {"_metadata": name}
+    for key, value in keywords:
+        action[key] = _thaw(value)
+    return action
+
+
+def parse_action_sequence(text: str) -> list[dict[str, Any]]:
+    """
+    Parse one or more action calls separated by newlines, ";" or ",".
+
+    Parsing stops at the first text that is not a complete call, so a
+    sequence cut off in the middle keeps the calls before the cut.
+
+    Args:
+        text: Action text, e.g. 'do(action="Tap", element=[500, 300])
+            do(action="Type", text="hello")'.
+
+    Returns:
+        Parsed action dictionaries, in order.
+
+    Raises:
+        ActionSyntaxError: If not even the first call matches the grammar.
+    """
+    parser = _ActionParser(text)
+    name, keywords = parser.parse()
+    actions = [{"_metadata": name, **keywords}]
+    while text.startswith(")", parser.pos):
+        pos = _SEPARATOR.match(text, parser.pos + 1).end()
+        if pos >= len(text):
+            break
+        parser = _ActionParser(text, pos)
+        try:
+            name, keywords = parser.parse()
+        except ActionSyntaxError:
+            break
+        actions.append({"_metadata": name, **keywords})
+    return actions
+
+
+def parse_action_ast(response: str) -> dict[str, Any]:
+    """
+    Parse an action with Python's `ast` module.
+
+    This is the original parser, used when the action grammar rejects a
+    response: it accepts any literal `ast.literal_eval` does, and takes a
+    finish message verbatim from between `finish(message="` and `")`.
+
+    Args:
+        response: Action text.
+
+    Returns:
+        Parsed action dictionary.
+
+    Raises:
+        ValueError: If the response cannot be parsed.
+    """
+    try:
+        response = response.strip()
+        if response.startswith("do"):
+            # Use AST parsing instead of eval for safety
+            try:
+                tree = ast.parse(response, mode="eval")
+                if not isinstance(tree.body, ast.Call):
+                    raise ValueError("Expected a function call")
+
+                call = tree.body
+                # Extract keyword arguments safely
+                action = {"_metadata": "do"}
+                for keyword in call.keywords:
+                    key = keyword.arg
+                    value = ast.literal_eval(keyword.value)
+                    action[key] = value
+
+                return action
+            except (SyntaxError, ValueError) as e:
+                raise ValueError(f"Failed to parse do() action: {e}")
+
+        elif response.startswith("finish"):
+            action = {
+                "_metadata": "finish",
+                "message": response.replace("finish(message=", "")[1:-2],
+            }
+        else:
+            raise ValueError(f"Failed to parse action: {response}")
+        return action
+    except Exception as e:
+        raise ValueError(f"Failed to parse action: {e}")
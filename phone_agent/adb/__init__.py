@@ -10,6 +10,7 @@ from phone_agent.adb.connection import (
 from phone_agent.adb.device import (
     back,
     double_tap,
+    gesture,
     get_current_app,
     home,
     launch_app,
@@ -17,22 +18,56 @@ from phone_agent.adb.device import (
     swipe,
     tap,
 )
+from phone_agent.adb.gesture import (
+    Stroke,
+    get_gesture_method,
+    set_gesture_method,
+)
 from phone_agent.adb.input import (
+    KeyboardSession,
     clear_text,
     detect_and_set_adb_keyboard,
+    replace_text,
     restore_keyboard,
     type_text,
 )
-from phone_agent.adb.screenshot import get_screenshot
+from phone_agent.adb.protocol import (
+    AdbProtocolError,
+    AdbServerClient,
+    AsyncAdbServerClient,
+    get_adb_client,
+)
+from phone_agent.adb.registry import (
+    DeviceProperties,
+    DeviceRegistry,
+    get_device_registry,
+)
+from phone_agent.adb.screenshot import Screenshot, ScreenshotEncoding, get_screenshot
+from phone_agent.adb.script import DeviceScript
+from phone_agent.adb.settle import get_frame_hash, settle, wait_for_settle
+from phone_agent.adb.shell import (
+    AdbShellSession,
+    close_shell_sessions,
+    exec_out,
+    get_adb_backend,
+    get_shell_session,
+    pull_file,
+    run_shell,
+    set_adb_backend,
+)
 
 __all__ = [
     # Screenshot
     "get_screenshot",
+    "Screenshot",
+    "ScreenshotEncoding",
     # Input
     "type_text",
     "clear_text",
     "detect_and_set_adb_keyboard",
     "restore_keyboard",
+    "replace_text",
+    "KeyboardSession",
     # Device control
     "get_current_app",
     "tap",
@@ -42,10 +77,37 @@ __all__ = [
     "double_tap",
     "long_press",
     "launch_app",
+    "gesture",
+    "Stroke",
+    "set_gesture_method",
+    "get_gesture_method",
+    "DeviceScript",
+    # Settle detection
+    "settle",
+    "wait_for_settle",
+    "get_frame_hash",
+    # Shell backends
+    "AdbShellSession",
+    "get_shell_session",
+    "close_shell_sessions",
+    "run_shell",
+    "exec_out",
+    "pull_file",
+    "set_adb_backend",
+    "get_adb_backend",
+    # adb server protocol
+    "AdbServerClient",
+    "AsyncAdbServerClient",
+    "AdbProtocolError",
+    "get_adb_client",
     # Connection management
     "ADBConnection",
     "DeviceInfo",
     "ConnectionType",
     "quick_connect",
     "list_devices",
+    # Device property cache
+    "DeviceRegistry",
+    "DeviceProperties",
+    "get_device_registry",
 ]
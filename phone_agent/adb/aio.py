@@ -0,0 +1,166 @@
+"""asyncio versions of the device observation helpers.
+
+These mirror run_shell(), exec_out(), get_screenshot() and get_current_app()
+without blocking the event loop, so a single process can observe many
+devices concurrently. With the "socket" backend they talk to the adb server
+directly; otherwise they use `asyncio.create_subprocess_exec`.
+"""
+
+import asyncio
+import time
+
+from phone_agent.adb import shell
+from phone_agent.adb.device import (
+    FOCUS_PROBES,
+    _current_app_cache,
+    _focus_probe_index,
+    parse_current_app,
+)
+from phone_agent.adb.protocol import AsyncAdbServerClient
+from phone_agent.adb.screenshot import (
+    ExecOutUnavailableError,
+    Screenshot,
+    ScreenshotEncoding,
+    _build_screenshot,
+    _check_exec_out_output,
+    _create_fallback_screenshot,
+    _exec_out_unsupported,
+    get_screenshot,
+)
+from phone_agent.adb.utils import get_adb_prefix
+
+_client: AsyncAdbServerClient | None = None
+
+
+def _get_client() -> AsyncAdbServerClient:
+    global _client
+    if _client is None:
+        _client = AsyncAdbServerClient()
+    return _client
+
+
+async def _run_adb(args: list[str], timeout: float | None) -> tuple[bytes, bytes]:
+    process = await asyncio.create_subprocess_exec(
+        *args, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
+    )
+    try:
+        return await asyncio.wait_for(process.communicate(), timeout)
+    except asyncio.TimeoutError:
+        process.kill()
+        await process.wait()
+        raise
+
+
+async def async_run_shell(
+    args: list[str], device_id: str | None = None, timeout: float | None = None
+) -> str:
+    """
+    Run a shell command on the device without blocking the event loop.
+
+    Args:
+        args: Command and arguments, joined with spaces like `adb shell` does.
+        device_id: Optional ADB device ID for multi-device setups.
+        timeout: Timeout in seconds.
+
+    Returns:
+        Combined stdout and stderr of the command.
+    """
+    if shell.get_adb_backend() == shell.BACKEND_SOCKET:
+        output = await _get_client().shell(" ".join(args), device_id, timeout)
+        return output.decode("utf-8", errors="ignore")
+
+    stdout, stderr = await _run_adb(
+        get_adb_prefix(device_id) + ["shell"] + args, timeout
+    )
+    return (stdout + stderr).decode("utf-8", errors="ignore")
+
+
+async def async_exec_out(
+    args: list[str], device_id: str | None = None, timeout: float | None = None
+) -> tuple[bytes, bytes]:
+    """
+    Run a command with binary-safe output without blocking the event loop.
+
+    Returns:
+        Tuple of (stdout, stderr).
+    """
+    if shell.get_adb_backend() == shell.BACKEND_SOCKET:
+        return await _get_client().exec_out(" ".join(args), device_id, timeout), b""
+
+    return await _run_adb(get_adb_prefix(device_id) + ["exec-out"] + args, timeout)
+
+
+async def async_get_screenshot(
+    device_id: str | None = None,
+    timeout: int = 10,
+    raw: bool = False,
+    encoding: ScreenshotEncoding | None = None,
+) -> Screenshot:
+    """
+    Capture a screenshot over exec-out without blocking the event loop.
+
+    Image encoding runs in the default executor. Devices without exec-out
+    support fall back to the blocking pull path in the executor as well.
+
+    Args:
+        device_id: Optional ADB device ID for multi-device setups.
+        timeout: Timeout in seconds for screenshot operations.
+        raw: Pull the raw framebuffer instead of a device-encoded PNG.
+        encoding: Optional downscale/format policy for the encoded image.
+
+    Returns:
+        Screenshot object containing base64 data and dimensions.
+    """
+    if (device_id or "") in _exec_out_unsupported:
+        return await asyncio.to_thread(
+            get_screenshot, device_id, timeout, raw=raw, encoding=encoding
+        )
+
+    try:
+        command = ["screencap"] if raw else ["screencap", "-p"]
+        data, stderr = await async_exec_out(command, device_id, timeout)
+        try:
+            data = _check_exec_out_output(data, stderr, raw)
+        except ExecOutUnavailableError:
+            return await asyncio.to_thread(
+                get_screenshot, device_id, timeout, raw=raw, encoding=encoding
+            )
+        return await asyncio.to_thread(_build_screenshot, data, encoding, device_id)
+    except Exception as e:
+        print(f"Screenshot error: {e}")
+        return await asyncio.to_thread(
+            _create_fallback_screenshot, False, device_id, encoding
+        )
+
+
+async def async_get_current_app(
+    device_id: str | None = None, max_age: float = 0.0
+) -> str:
+    """
+    Get the currently focused app name without blocking the event loop.
+
+    Shares the probe selection and result cache with get_current_app().
+
+    Args:
+        device_id: Optional ADB device ID for multi-device setups.
+        max_age: Reuse a previous result if it is at most this many seconds old.
+
+    Returns:
+        The app name if recognized, otherwise "System Home".
+    """
+    key = device_id or ""
+    if max_age > 0:
+        cached = _current_app_cache.get(key)
+        if cached and time.monotonic() - cached[0] <= max_age:
+            return cached[1]
+
+    output = ""
+    for index in range(_focus_probe_index.get(key, 0), len(FOCUS_PROBES)):
+        output = await async_run_shell(FOCUS_PROBES[index], device_id)
+        if "mCurrentFocus" in output or "mFocusedApp" in output:
+            _focus_probe_index[key] = index
+            break
+
+    app_name = parse_current_app(output)
+    _current_app_cache[key] = (time.monotonic(), app_name)
+    return app_name
@@ -6,8 +6,9 @@ from dataclasses import dataclass
 from enum import Enum
 from typing import Optional
 
-from phone_agent.config.timing import TIMING_CONFIG
+from phone_agent.adb.registry import get_device_registry
 from phone_agent.adb.utils import get_adb_path
+from phone_agent.config.timing import TIMING_CONFIG
 
 
 class ConnectionType(Enum):
@@ -89,6 +90,9 @@ class ADBConnection:
 
             output = result.stdout + result.stderr
 
+            # A reconnected address may be a different device
+            get_device_registry().invalidate(address)
+
             if "connected" in output.lower():
                 return True, f"Connected to {address}"
             elif "already connected" in output.lower():
@@ -117,6 +121,7 @@ class ADBConnection:
                 cmd.append(address)
 
             result = subprocess.run(cmd, capture_output=True, text=True, timeout=5)
+            get_device_registry().invalidate(address)
 
             output = result.stdout + result.stderr
             return True, output.strip() or "Disconnected"
@@ -181,44 +186,21 @@ class ADBConnection:
                             device=device_name,
                         )
                     )
-            
-            # Enhance with getprop details for reachable devices
+
+            # Fill in details from the shared registry, probing all online
+            # devices at once; cached entries cost no adb call
+            registry = get_device_registry()
+            online = [dev.device_id for dev in devices if dev.status == "device"]
+            registry.sync(online)
+            details = registry.get_many(online)
             for dev in devices:
-                if dev.status == "device":
-                    try:
-                        # Fetch multiple props in one go to save time
-                        # ro.product.manufacturer: Xiaomi
-                        # ro.product.model: 2201123C (Internal model) or Xiaomi 12
-                        # ro.product.marketname: Xiaomi 12 (Not always available)
-                        # ro.build.version.release: Android Version
-                        
-                        cmd = [self.adb_path, "-s", dev.device_id, "shell", "getprop"]
-                        res = subprocess.run(
-                            cmd, 
-                            capture_output=True, 
-                            text=True, 
-                            timeout=2, 
-                            encoding="utf-8", 
-                            errors="ignore"
-                        )
-                        output = res.stdout
-                        
-                        # Simple parsing
-                        props = {}
-                        for line in output.splitlines():
-                            if ": [" in line:
-                                key, val = line.split(": [", 1)
-                                key = key.strip(" []")
-                                val = val.strip(" []")
-                                props[key] = val
-                                
-                        dev.manufacturer = props.get("ro.product.manufacturer", "")
-                        dev.model = props.get("ro.product.model", dev.model) # Prefer getprop model
-                        dev.market_name = props.get("ro.product.marketname", "")
-                        dev.android_version = props.get("ro.build.version.release", dev.android_version)
-                        
-                    except Exception as e:
-                        print(f"Failed to get details for {dev.device_id}: {e}")
+                entry = details.get(dev.device_id)
+                if entry is None or not entry.props:
+                    continue
+                dev.manufacturer = entry.manufacturer or ""
+                dev.model = entry.model or dev.model  # Prefer getprop model
+                dev.market_name = entry.market_name or ""
+                dev.android_version = entry.android_version or dev.android_version
 
             return devices
 
@@ -375,6 +357,7 @@ class ADBConnection:
         """
         try:
             # Kill server
+            get_device_registry().invalidate()
             subprocess.run(
                 [self.adb_path, "kill-server"], capture_output=True, timeout=5, encoding="utf-8", errors="ignore"
             )
@@ -1,41 +1,92 @@
 """Device control utilities for Android automation."""
 
 import os
-import subprocess
+import re
 import time
 from typing import List, Optional, Tuple
 
-from phone_agent.config.apps import APP_PACKAGES
+from phone_agent.adb.gesture import (
+    Stroke,
+    double_tap_strokes,
+    gesture_script,
+    long_press_strokes,
+)
+from phone_agent.adb.settle import settle
+from phone_agent.adb.shell import run_shell
+from phone_agent.config.apps import get_app_name, get_app_registry
 from phone_agent.config.timing import TIMING_CONFIG
-from phone_agent.adb.utils import get_adb_prefix
 
+# Only the focus lines are needed, so filter on the device and transfer a
+# few hundred bytes instead of the whole window dump. `dumpsys window
+# displays` is far smaller than the full dump on Android 10+, while older
+# versions only report focus in the full dump.
+_FOCUS_FILTER = ["|", "grep", "-E", "'mCurrentFocus|mFocusedApp'"]
+FOCUS_PROBES = (
+    ["dumpsys", "window", "displays"] + _FOCUS_FILTER,
+    ["dumpsys", "window"] + _FOCUS_FILTER,
+)
 
-def get_current_app(device_id: str | None = None) -> str:
+# Matches the package in "u0 com.example.app/com.example.app.MainActivity"
+_FOCUS_PACKAGE_PATTERN = re.compile(r"([A-Za-z]\w*(?:\.\w+)+)/")
+
+# Per-device index into FOCUS_PROBES of the probe known to report focus
+_focus_probe_index: dict[str, int] = {}
+
+# Per-device (timestamp, app name) of the last lookup
+_current_app_cache: dict[str, tuple[float, str]] = {}
+
+
+def get_current_app(device_id: str | None = None, max_age: float = 0.0) -> str:
     """
     Get the currently focused app name.
 
     Args:
         device_id: Optional ADB device ID for multi-device setups.
+        max_age: Reuse a previous result if it is at most this many seconds
+            old. Device actions in this module invalidate the cached value.
 
     Returns:
         The app name if recognized, otherwise "System Home".
     """
-    adb_prefix = get_adb_prefix(device_id)
-
-    result = subprocess.run(
-        adb_prefix + ["shell", "dumpsys", "window"], 
-        capture_output=True, 
-        text=True,
-        encoding="utf-8",
-        errors="ignore"
-    )
-    output = result.stdout or ""
+    key = device_id or ""
+    if max_age > 0:
+        cached = _current_app_cache.get(key)
+        if cached and time.monotonic() - cached[0] <= max_age:
+            return cached[1]
+
+    output = ""
+    for index in range(_focus_probe_index.get(key, 0), len(FOCUS_PROBES)):
+        output = run_shell(FOCUS_PROBES[index], device_id)
+        if "mCurrentFocus" in output or "mFocusedApp" in output:
+            _focus_probe_index[key] = index
+            break
+
+    app_name = parse_current_app(output)
+    _current_app_cache[key] = (time.monotonic(), app_name)
+    return app_name
+
+
+def invalidate_current_app(device_id: str | None = None) -> None:
+    """Drop the cached foreground app of a device."""
+    _current_app_cache.pop(device_id or "", None)
+
+
+def parse_current_app(output: str) -> str:
+    """
+    Find the focused app in `dumpsys window` output.
+
+    Args:
+        output: Output of `dumpsys window`, or just its focus lines.
 
+    Returns:
+        The app name if recognized, otherwise "System Home".
+    """
     # Parse window focus info
     for line in output.split("\n"):
         if "mCurrentFocus" in line or "mFocusedApp" in line:
-            for app_name, package in APP_PACKAGES.items():
-                if package in line:
+            for package in _FOCUS_PACKAGE_PATTERN.findall(line):
+                app_name = get_app_name(package)
+                if app_name:
                     return app_name
 
     return "System Home"
@@ -56,15 +107,9 @@ def tap(
     if delay is None:
         delay = TIMING_CONFIG.device.default_tap_delay
 
-    adb_prefix = get_adb_prefix(device_id)
-
-    subprocess.run(
-        adb_prefix + ["shell", "input", "tap", str(x), str(y)], 
-        capture_output=True,
-        encoding="utf-8",
-        errors="ignore",
-    )
-    time.sleep(delay)
+    run_shell(["input", "tap", str(x), str(y)], device_id)
+    invalidate_current_app(device_id)
+    settle(delay, device_id)
 
 
 def double_tap(
@@ -82,22 +127,18 @@ def double_tap(
     if delay is None:
         delay = TIMING_CONFIG.device.default_double_tap_delay
 
-    adb_prefix = get_adb_prefix(device_id)
+    # Both taps run from one device-side command, so adb process start-up
+    # on the host cannot stretch the interval past the double tap timeout
+    interval_ms = int(TIMING_CONFIG.device.double_tap_interval * 1000)
+    if gesture(double_tap_strokes(x, y, interval_ms), device_id, delay):
+        return
 
-    subprocess.run(
-        adb_prefix + ["shell", "input", "tap", str(x), str(y)], 
-        capture_output=True,
-        encoding="utf-8",
-        errors="ignore",
-    )
-    time.sleep(TIMING_CONFIG.device.double_tap_interval)
-    subprocess.run(
-        adb_prefix + ["shell", "input", "tap", str(x), str(y)], 
-        capture_output=True,
-        encoding="utf-8",
-        errors="ignore",
-    )
-    time.sleep(delay)
+    # The taps overlap (an interval shorter than a press) and only `input`
+    # is available, which cannot hold two touches: tap twice in a row
+    tap_args = ["input", "tap", str(x), str(y)]
+    run_shell(tap_args + [";"] + tap_args, device_id)
+    invalidate_current_app(device_id)
+    settle(delay, device_id)
 
 
 def long_press(
@@ -120,16 +161,58 @@ def long_press(
     if delay is None:
         delay = TIMING_CONFIG.device.default_long_press_delay
 
-    adb_prefix = get_adb_prefix(device_id)
+    if gesture(long_press_strokes(x, y, duration_ms), device_id, delay):
+        return
 
-    subprocess.run(
-        adb_prefix
-        + ["shell", "input", "swipe", str(x), str(y), str(x), str(y), str(duration_ms)],
-        capture_output=True,
-        encoding="utf-8",
-        errors="ignore",
+    # Not expected for one finger, but keep the plain command as a fallback
+    run_shell(
+        ["input", "swipe", str(x), str(y), str(x), str(y), str(duration_ms)],
+        device_id,
     )
-    time.sleep(delay)
+    invalidate_current_app(device_id)
+    settle(delay, device_id)
+
+
+def gesture(
+    strokes: list[Stroke], device_id: str | None = None, delay: float | None = None
+) -> bool:
+    """
+    Perform a touch gesture, e.g. a drag along a path or a two-finger pinch.
+
+    Args:
+        strokes: Finger paths in screen coordinates, with their timing.
+        device_id: Optional ADB device ID.
+        delay: Delay in seconds after the gesture. If None, uses the
+            configured swipe delay.
+
+    Returns:
+        True if the gesture was performed, False if the device cannot
+        express it (several fingers without a usable touchscreen).
+    """
+    if delay is None:
+        delay = TIMING_CONFIG.device.default_swipe_delay
+
+    script = gesture_script(strokes, device_id)
+    if script is None:
+        return False
+
+    run_shell([script], device_id)
+    invalidate_current_app(device_id)
+    settle(delay, device_id)
+    return True
+
+
+def swipe_duration(start_x: int, start_y: int, end_x: int, end_y: int) -> int:
+    """
+    Pick a swipe duration from the swipe distance.
+
+    Returns:
+        Duration in milliseconds, between 1000 and 2000.
+    """
+    # Calculate duration based on distance
+    dist_sq = (start_x - end_x) ** 2 + (start_y - end_y) ** 2
+    duration_ms = int(dist_sq / 1000)
+    return max(1000, min(duration_ms, 2000))  # Clamp between 1000-2000ms
 
 
 def swipe(
@@ -156,18 +239,11 @@ def swipe(
     if delay is None:
         delay = TIMING_CONFIG.device.default_swipe_delay
 
-    adb_prefix = get_adb_prefix(device_id)
-
     if duration_ms is None:
-        # Calculate duration based on distance
-        dist_sq = (start_x - end_x) ** 2 + (start_y - end_y) ** 2
-        duration_ms = int(dist_sq / 1000)
-        duration_ms = max(1000, min(duration_ms, 2000))  # Clamp between 1000-2000ms
-
-    subprocess.run(
-        adb_prefix
-        + [
-            "shell",
+        duration_ms = swipe_duration(start_x, start_y, end_x, end_y)
+
+    run_shell(
+        [
             "input",
             "swipe",
             str(start_x),
@@ -176,11 +252,10 @@ def swipe(
             str(end_y),
             str(duration_ms),
         ],
-        capture_output=True,
-        encoding="utf-8",
-        errors="ignore",
+        device_id,
     )
-    time.sleep(delay)
+    invalidate_current_app(device_id)
+    settle(delay, device_id)
 
 
 def back(device_id: str | None = None, delay: float | None = None) -> None:
@@ -194,15 +269,9 @@ def back(device_id: str | None = None, delay: float | None = None) -> None:
     if delay is None:
         delay = TIMING_CONFIG.device.default_back_delay
 
-    adb_prefix = get_adb_prefix(device_id)
-
-    subprocess.run(
-        adb_prefix + ["shell", "input", "keyevent", "4"], 
-        capture_output=True,
-        encoding="utf-8",
-        errors="ignore",
-    )
-    time.sleep(delay)
+    run_shell(["input", "keyevent", "4"], device_id)
+    invalidate_current_app(device_id)
+    settle(delay, device_id)
 
 
 def home(device_id: str | None = None, delay: float | None = None) -> None:
@@ -216,15 +285,9 @@ def home(device_id: str | None = None, delay: float | None = None) -> None:
     if delay is None:
         delay = TIMING_CONFIG.device.default_home_delay
 
-    adb_prefix = get_adb_prefix(device_id)
-
-    subprocess.run(
-        adb_prefix + ["shell", "input", "keyevent", "KEYCODE_HOME"], 
-        capture_output=True,
-        encoding="utf-8",
-        errors="ignore",
-    )
-    time.sleep(delay)
+    run_shell(["input", "keyevent", "KEYCODE_HOME"], device_id)
+    invalidate_current_app(device_id)
+    settle(delay, device_id)
 
 
 def launch_app(
@@ -234,7 +297,8 @@ def launch_app(
     Launch an app by name.
 
     Args:
-        app_name: The app name (must be in APP_PACKAGES).
+        app_name: The app name. Near-misses such as different case, extra
+            spaces or aliases are resolved through the app registry.
         device_id: Optional ADB device ID.
         delay: Delay in seconds after launching. If None, uses configured default.
 
@@ -244,16 +308,12 @@ def launch_app(
     if delay is None:
         delay = TIMING_CONFIG.device.default_launch_delay
 
-    if app_name not in APP_PACKAGES:
+    package = get_app_registry().resolve_package(app_name)
+    if package is None:
         return False
 
-    adb_prefix = get_adb_prefix(device_id)
-    package = APP_PACKAGES[app_name]
-
-    subprocess.run(
-        adb_prefix
-        + [
-            "shell",
+    run_shell(
+        [
             "monkey",
             "-p",
             package,
@@ -261,15 +321,8 @@ def launch_app(
             "android.intent.category.LAUNCHER",
             "1",
         ],
-        capture_output=True,
-        encoding="utf-8",
-        errors="ignore",
+        device_id,
     )
-    time.sleep(delay)
-    return True
-
-
+    invalidate_current_app(device_id)
+    settle(delay, device_id)
     return True
-
-# Removed local _get_adb_prefix logic
-
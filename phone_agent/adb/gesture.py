@@ -0,0 +1,379 @@
+"""Touch gestures that run as one on-device command."""
+
+import os
+import re
+from dataclasses import dataclass
+
+from phone_agent.adb.registry import get_device_registry
+from phone_agent.adb.screenshot import get_device_resolution
+from phone_agent.adb.shell import run_shell
+
+# Gesture methods accepted by set_gesture_method()
+GESTURE_AUTO = "auto"  # Best method the device supports
+GESTURE_SENDEVENT = "sendevent"  # Raw touchscreen events, exact timing
+GESTURE_MOTIONEVENT = "motionevent"  # `input motionevent`, Android 11+
+GESTURE_INPUT = "input"  # `input tap` / `input swipe` only
+GESTURE_METHODS = (GESTURE_AUTO, GESTURE_SENDEVENT, GESTURE_MOTIONEVENT, GESTURE_INPUT)
+
+# `input motionevent` first shipped with Android 11
+MOTIONEVENT_MIN_SDK = 30
+
+# Linux input event types and codes
+_EV_SYN = 0
+_EV_KEY = 1
+_EV_ABS = 3
+_SYN_REPORT = 0
+_BTN_TOUCH = 330
+_ABS_MT_SLOT = 47
+_ABS_MT_TOUCH_MAJOR = 48
+_ABS_MT_POSITION_X = 53
+_ABS_MT_POSITION_Y = 54
+_ABS_MT_TRACKING_ID = 57
+_ABS_MT_PRESSURE = 58
+
+# Time between sampled points of a moving finger (milliseconds)
+_MOVE_STEP_MS = 20
+
+_ADD_DEVICE_PATTERN = re.compile(r"add device \d+: (\S+)")
+_AXIS_PATTERN = re.compile(r"(ABS_MT_\w+)\s*: value -?\d+, min (-?\d+), max (-?\d+)")
+
+_method = os.getenv("PHONE_AGENT_GESTURE_METHOD", GESTURE_AUTO)
+
+
+@dataclass
+class TouchDevice:
+    """A multi-touch screen input device and its axis ranges."""
+
+    path: str
+    min_x: int
+    max_x: int
+    min_y: int
+    max_y: int
+    max_slot: int
+    max_pressure: int | None = None
+    max_touch_major: int | None = None
+
+    def to_raw(self, x: int, y: int, width: int, height: int) -> tuple[int, int]:
+        """Map screen pixels to the touchscreen's axis ranges."""
+        raw_x = self.min_x + round(x / max(width - 1, 1) * (self.max_x - self.min_x))
+        raw_y = self.min_y + round(y / max(height - 1, 1) * (self.max_y - self.min_y))
+        return raw_x, raw_y
+
+
+@dataclass
+class Stroke:
+    """
+    The path of one finger.
+
+    Args:
+        points: Screen coordinates the finger passes through, in order. A
+            single point is a press without movement.
+        start_ms: When the finger goes down, relative to the gesture start.
+        duration_ms: Time from touching down to lifting the finger.
+    """
+
+    points: list[tuple[int, int]]
+    start_ms: int = 0
+    duration_ms: int = 50
+
+    @property
+    def end_ms(self) -> int:
+        """When the finger lifts, relative to the gesture start."""
+        return self.start_ms + self.duration_ms
+
+    def position(self, time_ms: float) -> tuple[int, int]:
+        """Interpolate the finger position at a time within the stroke."""
+        if len(self.points) == 1 or self.duration_ms <= 0:
+            return self.points[-1]
+        progress = min(max((time_ms - self.start_ms) / self.duration_ms, 0.0), 1.0)
+        segment = progress * (len(self.points) - 1)
+        index = min(int(segment), len(self.points) - 2)
+        fraction = segment - index
+        (x0, y0), (x1, y1) = self.points[index], self.points[index + 1]
+        return round(x0 + (x1 - x0) * fraction), round(y0 + (y1 - y0) * fraction)
+
+
+def set_gesture_method(method: str) -> None:
+    """
+    Select how gestures are sent to the device.
+
+    Args:
+        method: "auto" (default) uses sendevent when the touchscreen accepts
+            it, then `input motionevent`, then `input tap` / `input swipe`.
+            "sendevent", "motionevent" or "input" forces one method; a
+            gesture the method cannot express falls back to the next one.
+    """
+    global _method
+    if method not in GESTURE_METHODS:
+        raise ValueError(f"Unknown gesture method: {method}")
+    _method = method
+
+
+def get_gesture_method() -> str:
+    """Get the name of the selected gesture method."""
+    return _method
+
+
+def parse_touch_device(output: str) -> TouchDevice | None:
+    """
+    Find the multi-touch screen in `getevent -pl` output.
+
+    Args:
+        output: Output of `getevent -pl`.
+
+    Returns:
+        The first device reporting multi-touch slots and positions, or None.
+    """
+    for block in output.split("add device")[1:]:
+        match = _ADD_DEVICE_PATTERN.match("add device" + block)
+        if match is None:
+            continue
+        axes = {
+            name: (int(low), int(high))
+            for name, low, high in _AXIS_PATTERN.findall(block)
+        }
+        if not {"ABS_MT_SLOT", "ABS_MT_POSITION_X", "ABS_MT_POSITION_Y"} <= axes.keys():
+            continue
+        return TouchDevice(
+            path=match.group(1),
+            min_x=axes["ABS_MT_POSITION_X"][0],
+            max_x=axes["ABS_MT_POSITION_X"][1],
+            min_y=axes["ABS_MT_POSITION_Y"][0],
+            max_y=axes["ABS_MT_POSITION_Y"][1],
+            max_slot=axes["ABS_MT_SLOT"][1],
+            max_pressure=axes.get("ABS_MT_PRESSURE", (0, None))[1],
+            max_touch_major=axes.get("ABS_MT_TOUCH_MAJOR", (0, None))[1],
+        )
+    return None
+
+
+def get_touch_device(device_id: str | None = None) -> TouchDevice | None:
+    """
+    Get a device's writable touchscreen, probing it with `getevent -pl` once.
+
+    Args:
+        device_id: Optional ADB device ID.
+
+    Returns:
+        The touchscreen, or None if none was found or it is not writable.
+    """
+
+    def probe() -> TouchDevice | None:
+        touch = parse_touch_device(run_shell(["getevent", "-pl"], device_id, timeout=5))
+        if touch is not None:
+            # sendevent needs write access, which some builds deny the
+            # shell user
+            output = run_shell(
+                ["test", "-w", touch.path, "&&", "echo", "writable"],
+                device_id,
+                timeout=5,
+            )
+            if "writable" not in output:
+                touch = None
+        return touch
+
+    try:
+        # Cached until the device disconnects; None is cached as well
+        return get_device_registry().capability(device_id, "touchscreen", probe)
+    except Exception:
+        return None
+
+
+def get_sdk_version(device_id: str | None = None) -> int:
+    """
+    Get a device's Android SDK level.
+
+    Args:
+        device_id: Optional ADB device ID.
+
+    Returns:
+        The SDK level, or 0 if it could not be read.
+    """
+    return get_device_registry().sdk_version(device_id)
+
+
+def _sendevent_script(
+    touch: TouchDevice, strokes: list[Stroke], width: int, height: int
+) -> str | None:
+    """Compile strokes into sendevent commands, or None if slots run out."""
+    # Give each finger the lowest slot not used by a finger it overlaps
+    slots: list[int] = []
+    for index, stroke in enumerate(strokes):
+        busy = {
+            slots[other]
+            for other in range(index)
+            if strokes[other].start_ms < stroke.end_ms
+            and stroke.start_ms < strokes[other].end_ms
+        }
+        slot = next(s for s in range(len(strokes) + 1) if s not in busy)
+        if slot > touch.max_slot:
+            return None
+        slots.append(slot)
+
+    # Touch down, sampled moves and lift of every finger, in time order. At
+    # the same instant, moves come before lifts and lifts before touches, so
+    # a slot is free again before the next finger reuses it.
+    events: list[tuple[float, int, int, str]] = []
+    for index, stroke in enumerate(strokes):
+        events.append((stroke.start_ms, 2, index, "down"))
+        if len(stroke.points) > 1:
+            time_ms = stroke.start_ms + _MOVE_STEP_MS
+            while time_ms < stroke.end_ms:
+                events.append((time_ms, 0, index, "move"))
+                time_ms += _MOVE_STEP_MS
+            events.append((stroke.end_ms, 0, index, "move"))
+        events.append((stroke.end_ms, 1, index, "up"))
+    events.sort()
+
+    def send(event_type: int, code: int, value: int) -> str:
+        return f"_ev {event_type} {code} {value}"
+
+    # A shell function keeps long gestures within adb's command length limit
+    commands = [f'_ev() {{ sendevent {touch.path} "$@"; }}']
+    down = 0
+    current_time = 0.0
+    current_slot = None
+    for position, (time_ms, _, index, kind) in enumerate(events):
+        if time_ms > current_time:
+            commands.append(f"sleep {(time_ms - current_time) / 1000:g}")
+            current_time = time_ms
+
+        stroke = strokes[index]
+        if slots[index] != current_slot:
+            commands.append(send(_EV_ABS, _ABS_MT_SLOT, slots[index]))
+            current_slot = slots[index]
+
+        if kind == "up":
+            commands.append(send(_EV_ABS, _ABS_MT_TRACKING_ID, -1))
+            down -= 1
+            if down == 0:
+                commands.append(send(_EV_KEY, _BTN_TOUCH, 0))
+        else:
+            if kind == "down":
+                commands.append(send(_EV_ABS, _ABS_MT_TRACKING_ID, index + 1))
+            raw_x, raw_y = touch.to_raw(*stroke.position(time_ms), width, height)
+            commands.append(send(_EV_ABS, _ABS_MT_POSITION_X, raw_x))
+            commands.append(send(_EV_ABS, _ABS_MT_POSITION_Y, raw_y))
+            if kind == "down":
+                # Some drivers drop contacts without a size or pressure
+                if touch.max_touch_major:
+                    major = max(1, touch.max_touch_major // 8)
+                    commands.append(send(_EV_ABS, _ABS_MT_TOUCH_MAJOR, major))
+                if touch.max_pressure:
+                    pressure = max(1, touch.max_pressure // 2)
+                    commands.append(send(_EV_ABS, _ABS_MT_PRESSURE, pressure))
+                down += 1
+                if down == 1:
+                    commands.append(send(_EV_KEY, _BTN_TOUCH, 1))
+
+        # One report per point in time, once all its events are queued
+        if position + 1 == len(events) or events[position + 1][0] > time_ms:
+            commands.append(send(_EV_SYN, _SYN_REPORT, 0))
+    return "; ".join(commands)
+
+
+def _motionevent_script(strokes: list[Stroke]) -> str:
+    """Compile strokes that do not overlap into `input motionevent` commands."""
+    commands: list[str] = []
+    time_ms = 0.0
+    for stroke in strokes:
+        if stroke.start_ms > time_ms:
+            commands.append(f"sleep {(stroke.start_ms - time_ms) / 1000:g}")
+        x, y = stroke.points[0]
+        commands.append(f"input motionevent DOWN {x} {y}")
+        if len(stroke.points) == 1:
+            commands.append(f"sleep {stroke.duration_ms / 1000:g}")
+        else:
+            time_ms = stroke.start_ms
+            while time_ms < stroke.end_ms:
+                step = min(_MOVE_STEP_MS, stroke.end_ms - time_ms)
+                commands.append(f"sleep {step / 1000:g}")
+                time_ms += step
+                x, y = stroke.position(time_ms)
+                commands.append(f"input motionevent MOVE {x} {y}")
+        x, y = stroke.points[-1]
+        commands.append(f"input motionevent UP {x} {y}")
+        time_ms = stroke.end_ms
+    return "; ".join(commands)
+
+
+def _input_script(strokes: list[Stroke]) -> str | None:
+    """
+    Compile strokes into `input tap` / `input swipe`, or None if impossible.
+
+    Best effort only: each command is a separate process on the device.
+    They are started in the background at their offsets, so the start-up
+    cost delays every command alike, but its jitter still reaches the gaps
+    between them and can split a double tap into two single taps.
+    """
+    commands: list[str] = []
+    for index, stroke in enumerate(strokes):
+        if index > 0 and stroke.start_ms < strokes[index - 1].end_ms:
+            return None  # Several fingers at once
+        if len(stroke.points) > 2:
+            return None  # A path with corners
+
+        (x0, y0), (x1, y1) = stroke.points[0], stroke.points[-1]
+        if len(stroke.points) == 1 and stroke.duration_ms <= 100:
+            command = f"input tap {x0} {y0}"
+        else:
+            command = f"input swipe {x0} {y0} {x1} {y1} {max(stroke.duration_ms, 1)}"
+        if stroke.start_ms > 0:
+            command = f"sleep {stroke.start_ms / 1000:g}; {command}"
+        commands.append(f"({command}) &")
+
+    commands.append("wait")
+    return " ".join(commands)
+
+
+def gesture_script(strokes: list[Stroke], device_id: str | None = None) -> str | None:
+    """
+    Compile a gesture into a single device shell command line.
+
+    Args:
+        strokes: Finger paths of the gesture.
+        device_id: Optional ADB device ID.
+
+    Returns:
+        The command line, or None if no available method can express the
+        gesture (e.g. several fingers without a usable touchscreen).
+    """
+    if not strokes:
+        return None
+
+    method = _method
+    if method in (GESTURE_AUTO, GESTURE_SENDEVENT):
+        touch = get_touch_device(device_id)
+        width, height = get_device_resolution(device_id)
+        # Touchscreen axes follow the natural (portrait) orientation
+        if touch is not None and width <= height:
+            script = _sendevent_script(touch, strokes, width, height)
+            if script is not None:
+                return script
+
+    # motionevent injects one finger's events in order from one command
+    # line, so it keeps a double tap's timing; one `input` process per event
+    # makes single strokes coarser than `input swipe`, so unless it is
+    # forced, it is otherwise only used for paths `input swipe` cannot draw
+    sequential = all(
+        stroke.start_ms >= previous.end_ms
+        for previous, stroke in zip(strokes, strokes[1:])
+    )
+    if sequential and (
+        method == GESTURE_MOTIONEVENT or len(strokes) > 1 or len(strokes[0].points) > 2
+    ):
+        if get_sdk_version(device_id) >= MOTIONEVENT_MIN_SDK:
+            return _motionevent_script(strokes)
+
+    # Last resort, best effort only (see _input_script)
+    return _input_script(strokes)
+
+
+def double_tap_strokes(x: int, y: int, interval_ms: int) -> list[Stroke]:
+    """Two short presses at one point, `interval_ms` apart."""
+    return [Stroke([(x, y)], 0, 40), Stroke([(x, y)], interval_ms, 40)]
+
+
+def long_press_strokes(x: int, y: int, duration_ms: int) -> list[Stroke]:
+    """One press at a point held for `duration_ms`."""
+    return [Stroke([(x, y)], 0, duration_ms)]
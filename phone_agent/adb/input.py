@@ -1,9 +1,28 @@
 """Input utilities for Android device text input."""
 
 import base64
-import subprocess
+import html
+import re
+import time
 from typing import Optional
-from phone_agent.adb.utils import get_adb_prefix
+
+from phone_agent.adb.registry import get_device_registry
+from phone_agent.adb.settle import record_settle_time, settle
+from phone_agent.adb.shell import run_shell
+from phone_agent.config.timing import TIMING_CONFIG
+
+ADB_KEYBOARD_IME = "com.android.adbkeyboard/.AdbIME"
+
+# Focused node of a `uiautomator dump`, and the attributes of a node
+_FOCUSED_NODE_PATTERN = re.compile(r'<node\b[^>]*\bfocused="true"[^>]*>')
+_ATTRIBUTE_PATTERN = re.compile(r'([\w-]+)="([^"]*)"')
+
+# Registry capability: whether the focused field can be read within a Type
+_FOCUSED_TEXT_CAPABILITY = "focused_text"
+# Shortest remaining time worth starting a dump for
+_MIN_PROBE_TIME = 0.1
+# Extra seconds for adb itself on top of the device-side dump timeout
+_PROBE_TIMEOUT_SLACK = 2.0
 
 
 def type_text(text: str, device_id: str | None = None) -> None:
@@ -18,25 +37,11 @@ def type_text(text: str, device_id: str | None = None) -> None:
         Requires ADB Keyboard to be installed on the device.
         See: https://github.com/nicnocquee/AdbKeyboard
     """
-    adb_prefix = get_adb_prefix(device_id)
     encoded_text = base64.b64encode(text.encode("utf-8")).decode("utf-8")
 
-    subprocess.run(
-        adb_prefix
-        + [
-            "shell",
-            "am",
-            "broadcast",
-            "-a",
-            "ADB_INPUT_B64",
-            "--es",
-            "msg",
-            encoded_text,
-        ],
-        capture_output=True,
-        text=True,
-        encoding="utf-8",
-        errors="ignore",
+    run_shell(
+        ["am", "broadcast", "-a", "ADB_INPUT_B64", "--es", "msg", encoded_text],
+        device_id,
     )
 
 
@@ -47,17 +52,141 @@ def clear_text(device_id: str | None = None) -> None:
     Args:
         device_id: Optional ADB device ID for multi-device setups.
     """
-    adb_prefix = get_adb_prefix(device_id)
+    run_shell(["am", "broadcast", "-a", "ADB_CLEAR_TEXT"], device_id)
+
+
+def replace_text(text: str, device_id: str | None = None) -> None:
+    """
+    Clear the focused input field and type text, in one adb round trip.
+
+    Args:
+        text: The text to type.
+        device_id: Optional ADB device ID for multi-device setups.
+    """
+    args = ["am", "broadcast", "-a", "ADB_CLEAR_TEXT"]
+    if text:
+        encoded_text = base64.b64encode(text.encode("utf-8")).decode("utf-8")
+        args += [";", "am", "broadcast", "-a", "ADB_INPUT_B64"]
+        args += ["--es", "msg", encoded_text]
+    run_shell(args, device_id)
+
+
+def _dump_focused_text(
+    device_id: str | None, timeout: float
+) -> tuple[bool, str | None]:
+    """
+    Dump the view hierarchy, killing the dump on the device after timeout.
+
+    Returns:
+        Whether the hierarchy was dumped, and the focused field's text.
+    """
+    # Bound the dump on the device: a host-side timeout would tear down the
+    # persistent shell of the session backend along with it
+    try:
+        output = run_shell(
+            [
+                "timeout",
+                f"{timeout:.2f}",
+                "uiautomator",
+                "dump",
+                "--compressed",
+                "/dev/tty",
+            ],
+            device_id,
+            timeout + _PROBE_TIMEOUT_SLACK,
+        )
+    except Exception:
+        return False, None
+
+    if "<hierarchy" not in output:
+        return False, None
+    nodes = [
+        dict(_ATTRIBUTE_PATTERN.findall(node))
+        for node in _FOCUSED_NODE_PATTERN.findall(output)
+    ]
+    if not nodes:
+        return True, None
+    # Prefer the editable node if a container is focused as well
+    for node in reversed(nodes):
+        if "EditText" in node.get("class", ""):
+            return True, html.unescape(node.get("text", ""))
+    return True, html.unescape(nodes[-1].get("text", ""))
+
+
+def get_focused_text(device_id: str | None = None, timeout: float = 5) -> str | None:
+    """
+    Get the content of the focused input field from the view hierarchy.
+
+    Args:
+        device_id: Optional ADB device ID for multi-device setups.
+        timeout: Timeout in seconds.
+
+    Returns:
+        The field's text ("" if empty), or None if the hierarchy could not
+        be dumped or nothing is focused.
+    """
+    return _dump_focused_text(device_id, timeout)[1]
 
-    subprocess.run(
-        adb_prefix + ["shell", "am", "broadcast", "-a", "ADB_CLEAR_TEXT"],
-        capture_output=True,
-        text=True,
-        encoding="utf-8",
-        errors="ignore",
+
+def _text_matches(expected: str, actual: str) -> bool:
+    """Check whether a field shows the typed text, allowing for formatting."""
+    expected = "".join(expected.split())
+    actual = "".join(actual.split())
+    # Password fields show one mask character per typed character
+    return expected in actual or (
+        len(actual) == len(expected) > 0 and set(actual) <= set("•*●")
     )
 
 
+def wait_for_text(
+    text: str, device_id: str | None = None, max_wait: float = 1.0
+) -> float:
+    """
+    Wait until the focused field shows the typed text, or until max_wait passes.
+
+    Each read of the field is bounded by the time left. If the hierarchy
+    cannot be dumped within that time, the device is remembered in the
+    device registry and later calls just sleep for max_wait, so this is
+    never longer than the fixed delay and a failing dump is paid once.
+
+    Args:
+        text: The text that was typed.
+        device_id: Optional ADB device ID for multi-device setups.
+        max_wait: Upper bound in seconds.
+
+    Returns:
+        Seconds spent waiting.
+    """
+    start = time.perf_counter()
+    deadline = start + max_wait
+    registry = get_device_registry()
+    probe_available = registry.get_capability(device_id, _FOCUSED_TEXT_CAPABILITY)
+    while True:
+        remaining = deadline - time.perf_counter()
+        if probe_available is False or remaining < _MIN_PROBE_TIME:
+            time.sleep(max(0.0, remaining))
+            break
+
+        dumped, actual = _dump_focused_text(device_id, remaining)
+        if dumped != probe_available:
+            probe_available = dumped
+            registry.set_capability(device_id, _FOCUSED_TEXT_CAPABILITY, dumped)
+        now = time.perf_counter()
+        if not dumped:
+            continue
+        if actual is None:
+            # Nothing focused: the text cannot be confirmed
+            time.sleep(max(0.0, deadline - now))
+            break
+        if _text_matches(text, actual) or now >= deadline:
+            break
+        time.sleep(min(TIMING_CONFIG.settle.poll_interval, max(0.0, deadline - now)))
+
+    elapsed = time.perf_counter() - start
+    record_settle_time(elapsed)
+    return elapsed
+
+
 def detect_and_set_adb_keyboard(device_id: str | None = None) -> str:
     """
     Detect current keyboard and switch to ADB Keyboard if needed.
@@ -68,27 +197,14 @@ def detect_and_set_adb_keyboard(device_id: str | None = None) -> str:
     Returns:
         The original keyboard IME identifier for later restoration.
     """
-    adb_prefix = get_adb_prefix(device_id)
-
     # Get current IME
-    result = subprocess.run(
-        adb_prefix + ["shell", "settings", "get", "secure", "default_input_method"],
-        capture_output=True,
-        text=True,
-        encoding="utf-8",
-        errors="ignore",
-    )
-    current_ime = (result.stdout + result.stderr).strip()
+    current_ime = run_shell(
+        ["settings", "get", "secure", "default_input_method"], device_id
+    ).strip()
 
     # Switch to ADB Keyboard if not already set
-    if "com.android.adbkeyboard/.AdbIME" not in current_ime:
-        subprocess.run(
-            adb_prefix + ["shell", "ime", "set", "com.android.adbkeyboard/.AdbIME"],
-            capture_output=True,
-            text=True,
-            encoding="utf-8",
-            errors="ignore",
-        )
+    if ADB_KEYBOARD_IME not in current_ime:
+        run_shell(["ime", "set", ADB_KEYBOARD_IME], device_id)
 
     # Warm up the keyboard
     type_text("", device_id)
@@ -104,20 +220,61 @@ def restore_keyboard(ime: str, device_id: str | None = None) -> None:
         ime: The IME identifier to restore.
         device_id: Optional ADB device ID for multi-device setups.
     """
-    adb_prefix = get_adb_prefix(device_id)
+    run_shell(["ime", "set", ime], device_id)
 
-    subprocess.run(
-        adb_prefix + ["shell", "ime", "set", ime], 
-        capture_output=True, 
-        text=True,
-        encoding="utf-8",
-        errors="ignore",
-    )
 
+class KeyboardSession:
+    """
+    Keeps ADB Keyboard active across the Type actions of an agent run.
 
-    subprocess.run(
-        adb_prefix + ["shell", "ime", "set", ime], capture_output=True, text=True
-    )
+    Switching keyboards costs a `settings get`, an `ime set` and a delay on
+    every Type. A session switches on the first Type and switches back once
+    in restore(), so each Type is a single adb call (clear and type),
+    finished as soon as the focused field shows the text.
+
+    Args:
+        device_id: Optional ADB device ID for multi-device setups.
+
+    Example:
+        >>> session = KeyboardSession("emulator-5554")
+        >>> session.type_text("hello")
+        >>> session.type_text("world")
+        >>> session.restore()
+    """
+
+    def __init__(self, device_id: str | None = None):
+        self.device_id = device_id
+        self.original_ime: str | None = None
+        self._active = False
+
+    @property
+    def active(self) -> bool:
+        """Whether ADB Keyboard is currently switched on by this session."""
+        return self._active
+
+    def activate(self) -> None:
+        """Switch to ADB Keyboard, unless the session already did."""
+        if self._active:
+            return
+        self.original_ime = detect_and_set_adb_keyboard(self.device_id)
+        self._active = True
+        settle(TIMING_CONFIG.action.keyboard_switch_delay, self.device_id)
+
+    def type_text(self, text: str) -> None:
+        """
+        Replace the focused field's content with text.
 
+        Args:
+            text: The text to type.
+        """
+        self.activate()
+        replace_text(text, self.device_id)
+        wait_for_text(text, self.device_id, TIMING_CONFIG.action.text_input_delay)
 
-# Removed local _get_adb_prefix logic
+    def restore(self) -> None:
+        """Switch back to the keyboard that was active before the session."""
+        if not self._active:
+            return
+        self._active = False
+        if self.original_ime and ADB_KEYBOARD_IME not in self.original_ime:
+            restore_keyboard(self.original_ime, self.device_id)
@@ -0,0 +1,361 @@
+"""Pure-Python client for the adb server socket protocol.
+
+The adb server (started by `adb start-server`, listening on TCP 5037)
+accepts requests framed as a 4-digit hex length followed by the request.
+Talking to it directly avoids spawning an `adb` client process for every
+command.
+"""
+
+import asyncio
+import os
+import socket
+import struct
+import threading
+import time
+from collections import deque
+
+DEFAULT_HOST = os.getenv("ANDROID_ADB_SERVER_ADDRESS", "127.0.0.1")
+DEFAULT_PORT = int(os.getenv("ANDROID_ADB_SERVER_PORT", "5037"))
+
+# Maximum payload of a single sync DATA packet
+SYNC_DATA_MAX = 64 * 1024
+
+
+class AdbProtocolError(RuntimeError):
+    """Raised when the adb server rejects a request or the stream is malformed."""
+
+
+def _encode_request(request: str) -> bytes:
+    payload = request.encode("utf-8")
+    return f"{len(payload):04x}".encode("ascii") + payload
+
+
+def _transport_request(device_id: str | None) -> str:
+    if device_id:
+        return f"host:transport:{device_id}"
+    return "host:transport-any"
+
+
+def _recv_exactly(sock: socket.socket, size: int) -> bytes:
+    chunks = []
+    while size > 0:
+        chunk = sock.recv(size)
+        if not chunk:
+            raise AdbProtocolError("Connection closed by adb server")
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b"".join(chunks)
+
+
+def _recv_all(sock: socket.socket) -> bytes:
+    chunks = []
+    while True:
+        chunk = sock.recv(256 * 1024)
+        if not chunk:
+            return b"".join(chunks)
+        chunks.append(chunk)
+
+
+def _check_status(sock: socket.socket) -> None:
+    status = _recv_exactly(sock, 4)
+    if status == b"OKAY":
+        return
+    if status == b"FAIL":
+        length = int(_recv_exactly(sock, 4), 16)
+        raise AdbProtocolError(_recv_exactly(sock, length).decode("utf-8", "ignore"))
+    raise AdbProtocolError(f"Unexpected status from adb server: {status!r}")
+
+
+class AdbServerClient:
+    """
+    Client that talks to the adb server over its TCP socket.
+
+    Each device service (shell:, exec:, sync:) consumes one connection that
+    has already been switched to the device's transport. The client keeps a
+    small pool of such pre-switched connections per device and refills it in
+    the background, so a command only pays for sending its request.
+
+    Args:
+        host: adb server host.
+        port: adb server port.
+        pool_size: Idle pre-switched connections kept per device.
+        timeout: Default socket timeout in seconds.
+
+    Example:
+        >>> client = AdbServerClient()
+        >>> client.shell("input keyevent 4", device_id="emulator-5554")
+        b''
+    """
+
+    def __init__(
+        self,
+        host: str = DEFAULT_HOST,
+        port: int = DEFAULT_PORT,
+        pool_size: int = 2,
+        timeout: float = 10.0,
+    ):
+        self.host = host
+        self.port = port
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self._pools: dict[str, deque[socket.socket]] = {}
+        self._lock = threading.Lock()
+        self._refill_queue: deque[str | None] = deque()
+        self._refill_event = threading.Event()
+        self._refill_thread: threading.Thread | None = None
+
+    def host_request(self, request: str) -> bytes:
+        """
+        Run a host service (e.g. "host:version", "host:devices-l").
+
+        Returns:
+            The length-prefixed payload returned by the server.
+        """
+        with self._connect() as sock:
+            sock.sendall(_encode_request(request))
+            _check_status(sock)
+            length = int(_recv_exactly(sock, 4), 16)
+            return _recv_exactly(sock, length)
+
+    def shell(
+        self, command: str, device_id: str | None = None, timeout: float | None = None
+    ) -> bytes:
+        """Run a command through the `shell:` service and return its output."""
+        return self._run_service(f"shell:{command}", device_id, timeout)
+
+    def exec_out(
+        self, command: str, device_id: str | None = None, timeout: float | None = None
+    ) -> bytes:
+        """Run a command through the binary-safe `exec:` service."""
+        return self._run_service(f"exec:{command}", device_id, timeout)
+
+    def pull(
+        self,
+        remote_path: str,
+        device_id: str | None = None,
+        timeout: float | None = None,
+    ) -> bytes:
+        """
+        Read a file from the device with the `sync:` RECV request.
+
+        Raises:
+            AdbProtocolError: If the device reports a failure.
+        """
+        with self._open_service("sync:", device_id, timeout) as sock:
+            path = remote_path.encode("utf-8")
+            sock.sendall(b"RECV" + struct.pack("<I", len(path)) + path)
+
+            chunks = []
+            while True:
+                packet_id = _recv_exactly(sock, 4)
+                (length,) = struct.unpack("<I", _recv_exactly(sock, 4))
+                if packet_id == b"DATA":
+                    chunks.append(_recv_exactly(sock, length))
+                elif packet_id == b"DONE":
+                    break
+                elif packet_id == b"FAIL":
+                    message = _recv_exactly(sock, length).decode("utf-8", "ignore")
+                    raise AdbProtocolError(f"pull {remote_path}: {message}")
+                else:
+                    raise AdbProtocolError(f"Unexpected sync packet: {packet_id!r}")
+
+            sock.sendall(b"QUIT" + struct.pack("<I", 0))
+            return b"".join(chunks)
+
+    def push(
+        self,
+        data: bytes,
+        remote_path: str,
+        device_id: str | None = None,
+        mode: int = 0o644,
+        timeout: float | None = None,
+    ) -> None:
+        """
+        Write bytes to a file on the device with the `sync:` SEND request.
+
+        Raises:
+            AdbProtocolError: If the device reports a failure.
+        """
+        with self._open_service("sync:", device_id, timeout) as sock:
+            target = f"{remote_path},{mode}".encode("utf-8")
+            sock.sendall(b"SEND" + struct.pack("<I", len(target)) + target)
+
+            view = memoryview(data)
+            for offset in range(0, len(view), SYNC_DATA_MAX):
+                chunk = view[offset : offset + SYNC_DATA_MAX]
+                sock.sendall(b"DATA" + struct.pack("<I", len(chunk)))
+                sock.sendall(chunk)
+            sock.sendall(b"DONE" + struct.pack("<I", int(time.time())))
+
+            packet_id = _recv_exactly(sock, 4)
+            (length,) = struct.unpack("<I", _recv_exactly(sock, 4))
+            if packet_id != b"OKAY":
+                message = _recv_exactly(sock, length).decode("utf-8", "ignore")
+                raise AdbProtocolError(f"push {remote_path}: {message}")
+
+            sock.sendall(b"QUIT" + struct.pack("<I", 0))
+
+    def close(self) -> None:
+        """Close all pooled connections and stop the refill thread."""
+        with self._lock:
+            pools = list(self._pools.values())
+            self._pools.clear()
+        for pool in pools:
+            while pool:
+                pool.pop().close()
+        self._refill_queue.append(None)
+        self._refill_event.set()
+
+    def _connect(self, timeout: float | None = None) -> socket.socket:
+        sock = socket.create_connection(
+            (self.host, self.port), timeout=timeout or self.timeout
+        )
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        return sock
+
+    def _connect_transport(self, device_id: str | None) -> socket.socket:
+        sock = self._connect()
+        try:
+            sock.sendall(_encode_request(_transport_request(device_id)))
+            _check_status(sock)
+        except Exception:
+            sock.close()
+            raise
+        return sock
+
+    def _open_service(
+        self, service: str, device_id: str | None, timeout: float | None
+    ) -> socket.socket:
+        """Return a connection on which `service` has been accepted."""
+        sock = self._acquire(device_id)
+        try:
+            sock.settimeout(timeout or self.timeout)
+            sock.sendall(_encode_request(service))
+            _check_status(sock)
+            return sock
+        except (OSError, AdbProtocolError):
+            # Pooled connections can go stale (device reconnected, server
+            # restarted); retry once on a fresh one before giving up.
+            sock.close()
+
+        sock = self._connect_transport(device_id)
+        try:
+            sock.settimeout(timeout or self.timeout)
+            sock.sendall(_encode_request(service))
+            _check_status(sock)
+        except Exception:
+            sock.close()
+            raise
+        return sock
+
+    def _run_service(
+        self, service: str, device_id: str | None, timeout: float | None
+    ) -> bytes:
+        with self._open_service(service, device_id, timeout) as sock:
+            return _recv_all(sock)
+
+    def _acquire(self, device_id: str | None) -> socket.socket:
+        key = device_id or ""
+        with self._lock:
+            pool = self._pools.setdefault(key, deque())
+            sock = pool.popleft() if pool else None
+        self._schedule_refill(key)
+        return sock or self._connect_transport(device_id)
+
+    def _schedule_refill(self, key: str) -> None:
+        if self.pool_size <= 0:
+            return
+        self._refill_queue.append(key)
+        self._refill_event.set()
+        if self._refill_thread is None or not self._refill_thread.is_alive():
+            self._refill_thread = threading.Thread(
+                target=self._refill_loop, daemon=True
+            )
+            self._refill_thread.start()
+
+    def _refill_loop(self) -> None:
+        while True:
+            self._refill_event.wait()
+            self._refill_event.clear()
+            while self._refill_queue:
+                key = self._refill_queue.popleft()
+                if key is None:
+                    return
+                with self._lock:
+                    missing = self.pool_size - len(self._pools.get(key, ()))
+                for _ in range(max(0, missing)):
+                    try:
+                        sock = self._connect_transport(key or None)
+                    except (OSError, AdbProtocolError):
+                        break
+                    with self._lock:
+                        self._pools.setdefault(key, deque()).append(sock)
+
+
+class AsyncAdbServerClient:
+    """
+    asyncio client for the adb server, for driving many devices from one loop.
+
+    Args:
+        host: adb server host.
+        port: adb server port.
+        timeout: Default timeout in seconds.
+    """
+
+    def __init__(
+        self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, timeout: float = 10.0
+    ):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+
+    async def shell(
+        self, command: str, device_id: str | None = None, timeout: float | None = None
+    ) -> bytes:
+        """Run a command through the `shell:` service and return its output."""
+        return await self._run_service(f"shell:{command}", device_id, timeout)
+
+    async def exec_out(
+        self, command: str, device_id: str | None = None, timeout: float | None = None
+    ) -> bytes:
+        """Run a command through the binary-safe `exec:` service."""
+        return await self._run_service(f"exec:{command}", device_id, timeout)
+
+    async def _run_service(
+        self, service: str, device_id: str | None, timeout: float | None
+    ) -> bytes:
+        return await asyncio.wait_for(
+            self._request(service, device_id), timeout or self.timeout
+        )
+
+    async def _request(self, service: str, device_id: str | None) -> bytes:
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        try:
+            for request in (_transport_request(device_id), service):
+                writer.write(_encode_request(request))
+                await writer.drain()
+                status = await reader.readexactly(4)
+                if status == b"FAIL":
+                    length = int(await reader.readexactly(4), 16)
+                    message = await reader.readexactly(length)
+                    raise AdbProtocolError(message.decode("utf-8", "ignore"))
+                if status != b"OKAY":
+                    raise AdbProtocolError(
+                        f"Unexpected status from adb server: {status!r}"
+                    )
+            return await reader.read()
+        finally:
+            writer.close()
+
+
+_client: AdbServerClient | None = None
+_client_lock = threading.Lock()
+
+
+def get_adb_client() -> AdbServerClient:
+    """Get the process-wide adb server client."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = AdbServerClient()
+        return _client
@@ -0,0 +1,358 @@
+"""Process-wide cache of device properties and capabilities."""
+
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Iterable
+
+from phone_agent.adb.shell import run_shell
+
+# `getprop` lines look like "[ro.build.version.sdk]: [34]"
+_PROP_PATTERN = re.compile(r"^\[([^\]]+)\]: \[(.*)\]\s*$", re.MULTILINE)
+_WM_SIZE_PATTERN = re.compile(r"(Physical|Override) size:\s*(\d+)x(\d+)")
+_WM_DENSITY_PATTERN = re.compile(r"(Physical|Override) density:\s*(\d+)")
+
+# Separates the outputs of the commands batched into one probe
+_SECTION = "__PHONE_AGENT_SECTION__"
+
+
+@dataclass
+class DeviceProperties:
+    """What is known about one device, and when it was fetched."""
+
+    device_id: str
+    props: dict[str, str] = field(default_factory=dict)
+    # Screen size in the coordinate space of input events: the `wm size`
+    # override if set, updated from the size of every screenshot
+    resolution: tuple[int, int] | None = None
+    density: int | None = None
+    packages: frozenset[str] | None = None  # Loaded on first use
+    fetched_at: float = 0.0
+    packages_fetched_at: float = 0.0
+    # Results of other probes (e.g. the touchscreen), by name
+    capabilities: dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def sdk_version(self) -> int:
+        """Android SDK level, or 0 if unknown."""
+        sdk = self.props.get("ro.build.version.sdk", "")
+        return int(sdk) if sdk.isdigit() else 0
+
+    @property
+    def android_version(self) -> str | None:
+        """Android release, e.g. "14"."""
+        return self.props.get("ro.build.version.release")
+
+    @property
+    def model(self) -> str | None:
+        """Model name, e.g. "Pixel 7"."""
+        return self.props.get("ro.product.model")
+
+    @property
+    def manufacturer(self) -> str | None:
+        """Manufacturer, e.g. "Google"."""
+        return self.props.get("ro.product.manufacturer")
+
+    @property
+    def market_name(self) -> str | None:
+        """Marketing name where the vendor sets one, e.g. "Xiaomi 12"."""
+        return self.props.get("ro.product.marketname")
+
+
+def parse_properties(device_id: str, output: str) -> DeviceProperties:
+    """
+    Parse the output of the batched property probe.
+
+    Args:
+        device_id: Device the output came from.
+        output: `getprop`, `wm size` and `wm density` outputs, separated by
+            section markers.
+
+    Returns:
+        The parsed properties.
+    """
+    sections = output.split(_SECTION) + ["", ""]
+    props = dict(_PROP_PATTERN.findall(sections[0]))
+    sizes = {
+        kind: (int(width), int(height))
+        for kind, width, height in _WM_SIZE_PATTERN.findall(sections[1])
+    }
+    densities = {
+        kind: int(value) for kind, value in _WM_DENSITY_PATTERN.findall(sections[2])
+    }
+    return DeviceProperties(
+        device_id=device_id,
+        props=props,
+        resolution=sizes.get("Override") or sizes.get("Physical"),
+        density=densities.get("Override") or densities.get("Physical"),
+        fetched_at=time.monotonic(),
+    )
+
+
+class DeviceRegistry:
+    """
+    Cache of device properties shared by connections, agents and the GUI.
+
+    Properties, screen size, density and SDK level are fetched with one
+    adb round trip per device and kept for `ttl` seconds. Installed
+    packages are fetched on first use. Entries are dropped when a device
+    disconnects or reconnects, and several devices are probed concurrently.
+
+    Args:
+        ttl: Seconds before an entry is fetched again. If None, reads
+            PHONE_AGENT_DEVICE_CACHE_TTL (default 300).
+        max_workers: Devices probed at the same time.
+
+    Example:
+        >>> registry = get_device_registry()
+        >>> registry.get("emulator-5554").sdk_version
+        34
+        >>> registry.get_many(["emulator-5554", "emulator-5556"])
+    """
+
+    def __init__(self, ttl: float | None = None, max_workers: int = 8):
+        if ttl is None:
+            ttl = float(os.getenv("PHONE_AGENT_DEVICE_CACHE_TTL", "300"))
+        self.ttl = ttl
+        self.max_workers = max_workers
+        self._entries: dict[str, DeviceProperties] = {}
+        self._lock = threading.Lock()
+        self._fetch_locks: dict[str, threading.Lock] = {}
+
+    def _is_fresh(self, fetched_at: float) -> bool:
+        return time.monotonic() - fetched_at < self.ttl
+
+    def _fetch_lock(self, key: str) -> threading.Lock:
+        with self._lock:
+            return self._fetch_locks.setdefault(key, threading.Lock())
+
+    def get(
+        self, device_id: str | None = None, refresh: bool = False, timeout: float = 5
+    ) -> DeviceProperties:
+        """
+        Get a device's properties, fetching them if missing or expired.
+
+        Args:
+            device_id: Optional ADB device ID.
+            refresh: Fetch even if a fresh entry exists.
+            timeout: Timeout in seconds for the fetch.
+
+        Returns:
+            The device's properties. If the device cannot be reached, an
+            empty entry that is not cached.
+        """
+        key = device_id or ""
+        entry = self._entries.get(key)
+        if entry is not None and entry.fetched_at and self._is_fresh(entry.fetched_at):
+            if not refresh:
+                return entry
+
+        # One fetch per device at a time; later callers reuse its result
+        with self._fetch_lock(key):
+            entry = self._entries.get(key)
+            if (
+                not refresh
+                and entry is not None
+                and entry.fetched_at
+                and self._is_fresh(entry.fetched_at)
+            ):
+                return entry
+
+            try:
+                output = run_shell(
+                    [
+                        "getprop;",
+                        f"echo {_SECTION};",
+                        "wm size;",
+                        f"echo {_SECTION};",
+                        "wm density",
+                    ],
+                    device_id,
+                    timeout,
+                )
+            except Exception as e:
+                print(f"Failed to get properties of {key or 'device'}: {e}")
+                return entry or DeviceProperties(device_id=key)
+
+            fetched = parse_properties(key, output)
+            with self._lock:
+                previous = self._entries.get(key)
+                if previous is not None:
+                    # Keep what was learned independently of the properties
+                    fetched.resolution = previous.resolution or fetched.resolution
+                    fetched.capabilities = previous.capabilities
+                    fetched.packages = previous.packages
+                    fetched.packages_fetched_at = previous.packages_fetched_at
+                self._entries[key] = fetched
+            return fetched
+
+    def get_many(
+        self, device_ids: Iterable[str], refresh: bool = False
+    ) -> dict[str, DeviceProperties]:
+        """
+        Get the properties of several devices, fetching them concurrently.
+
+        Args:
+            device_ids: ADB device IDs.
+            refresh: Fetch even if fresh entries exist.
+
+        Returns:
+            Properties by device ID.
+        """
+        device_ids = list(device_ids)
+        if len(device_ids) <= 1:
+            return {device_id: self.get(device_id, refresh) for device_id in device_ids}
+
+        workers = min(self.max_workers, len(device_ids))
+        with ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="phone-agent-registry"
+        ) as executor:
+            entries = executor.map(lambda d: self.get(d, refresh), device_ids)
+            return dict(zip(device_ids, entries))
+
+    def sdk_version(self, device_id: str | None = None) -> int:
+        """Get a device's Android SDK level, or 0 if unknown."""
+        return self.get(device_id).sdk_version
+
+    def density(self, device_id: str | None = None) -> int | None:
+        """Get a device's screen density in dpi."""
+        return self.get(device_id).density
+
+    def resolution(
+        self, device_id: str | None = None, timeout: float = 5
+    ) -> tuple[int, int] | None:
+        """
+        Get a device's screen size.
+
+        Returns the size of the last screenshot if there was one, without
+        touching the device; otherwise the size reported by `wm size`.
+        """
+        entry = self._entries.get(device_id or "")
+        if entry is not None and entry.resolution is not None:
+            return entry.resolution
+        return self.get(device_id, timeout=timeout).resolution
+
+    def set_resolution(
+        self, device_id: str | None, resolution: tuple[int, int]
+    ) -> None:
+        """Record a device's screen size, e.g. from a screenshot."""
+        key = device_id or ""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                # Not fetched yet: keep the size, leave the rest to get()
+                entry = DeviceProperties(device_id=key)
+                self._entries[key] = entry
+            entry.resolution = resolution
+
+    def packages(self, device_id: str | None = None) -> frozenset[str] | None:
+        """
+        Get the packages installed on a device.
+
+        Returns:
+            Package names, or None if they could not be listed.
+        """
+        key = device_id or ""
+        entry = self._entries.get(key)
+        if entry is not None and entry.packages is not None:
+            if self._is_fresh(entry.packages_fetched_at):
+                return entry.packages
+
+        try:
+            output = run_shell(["pm", "list", "packages"], device_id, timeout=10)
+        except Exception as e:
+            print(f"Failed to list packages of {key or 'device'}: {e}")
+            return None
+        packages = frozenset(
+            line[len("package:") :].strip()
+            for line in output.splitlines()
+            if line.startswith("package:")
+        )
+        if not packages:
+            return None
+
+        with self._lock:
+            entry = self._entries.setdefault(key, DeviceProperties(device_id=key))
+            entry.packages = packages
+            entry.packages_fetched_at = time.monotonic()
+        return packages
+
+    def capability(
+        self, device_id: str | None, name: str, probe: Callable[[], Any]
+    ) -> Any:
+        """
+        Get a cached probe result, running the probe on first use.
+
+        The result is kept until the device is invalidated. If the probe
+        raises, nothing is cached and the exception propagates.
+
+        Args:
+            device_id: Optional ADB device ID.
+            name: Name of the capability, e.g. "touchscreen".
+            probe: Function that determines the value.
+
+        Returns:
+            The probe's result.
+        """
+        key = device_id or ""
+        entry = self._entries.get(key)
+        if entry is not None and name in entry.capabilities:
+            return entry.capabilities[name]
+
+        value = probe()
+        self.set_capability(device_id, name, value)
+        return value
+
+    def get_capability(
+        self, device_id: str | None, name: str, default: Any = None
+    ) -> Any:
+        """Get a cached capability without probing, or default if unknown."""
+        entry = self._entries.get(device_id or "")
+        if entry is None:
+            return default
+        return entry.capabilities.get(name, default)
+
+    def set_capability(self, device_id: str | None, name: str, value: Any) -> None:
+        """Record a capability learned as a side effect of normal use."""
+        key = device_id or ""
+        with self._lock:
+            entry = self._entries.setdefault(key, DeviceProperties(device_id=key))
+            entry.capabilities[name] = value
+
+    def invalidate(self, device_id: str | None = None) -> None:
+        """
+        Drop cached entries.
+
+        Args:
+            device_id: Device to forget, or None to forget all devices.
+        """
+        with self._lock:
+            if device_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(device_id, None)
+
+    def sync(self, online: Iterable[str]) -> None:
+        """
+        Drop entries of devices that are no longer online.
+
+        Args:
+            online: IDs of the devices currently listed by adb.
+        """
+        online = set(online)
+        with self._lock:
+            for key in list(self._entries):
+                # "" is the implicit single device and cannot be checked
+                if key and key not in online:
+                    del self._entries[key]
+
+
+_registry = DeviceRegistry()
+
+
+def get_device_registry() -> DeviceRegistry:
+    """Get the process-wide device registry."""
+    return _registry
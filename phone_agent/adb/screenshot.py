@@ -2,34 +2,137 @@
 
 import base64
 import os
-import subprocess
-import tempfile
-import uuid
+import struct
 from dataclasses import dataclass
+from functools import lru_cache
 from io import BytesIO
 from typing import Tuple
 
 from PIL import Image
-from phone_agent.adb.utils import get_adb_prefix
+
+from phone_agent.adb.registry import get_device_registry
+from phone_agent.adb.shell import exec_out, pull_file, run_shell
+
+# Capture methods accepted by get_screenshot()
+CAPTURE_AUTO = "auto"
+CAPTURE_EXEC_OUT = "exec-out"
+CAPTURE_PULL = "pull"
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+# Raw `screencap` output starts with width, height and pixel format as
+# little-endian uint32s; newer Android versions append a colorspace field.
+RAW_HEADER_SIZES = (12, 16)
+
+# android.graphics.PixelFormat values to PIL raw decoder modes. All of them
+# are 4 bytes per pixel and the alpha/padding byte is always ignored. RGBX
+# buffers can be mapped by PIL without copying; BGRX needs one decode pass.
+RAW_PIXEL_FORMATS = {
+    1: "RGBX",  # RGBA_8888
+    2: "RGBX",  # RGBX_8888
+    5: "BGRX",  # BGRA_8888
+}
+
+# Devices (keyed by device ID, "" for the default device) on which
+# `adb exec-out` turned out to be unusable, so we skip straight to pull.
+_exec_out_unsupported: set[str] = set()
+
+# Used when a device's resolution is unknown and `wm size` fails
+DEFAULT_RESOLUTION = (1080, 2400)
+
+# Longer side of the black placeholder sent when a capture fails. The
+# Screenshot still reports the device resolution for coordinate mapping;
+# only the image is small, so a blank screen costs little upload or vision
+# tokens.
+FALLBACK_LONG_EDGE = 64
+
+# Image formats the model request can carry, mapped to their MIME types
+IMAGE_MIME_TYPES = {
+    "PNG": "image/png",
+    "JPEG": "image/jpeg",
+    "WEBP": "image/webp",
+}
 
 
 @dataclass
 class Screenshot:
-    """Represents a captured screenshot."""
+    """Represents a captured screenshot.
+
+    width and height are always the device resolution, even when the encoded
+    image was downscaled, so coordinate mapping stays correct.
+    """
 
     base64_data: str
     width: int
     height: int
     is_sensitive: bool = False
+    mime_type: str = "image/png"
+    # Black placeholder standing in for a refused or failed capture
+    is_fallback: bool = False
+
+
+@dataclass
+class ScreenshotEncoding:
+    """Encoding policy applied to screenshots before they are sent to the model."""
+
+    max_long_edge: int | None = None  # Longer side in pixels, None keeps full size
+    format: str = "PNG"  # PNG, JPEG or WEBP
+    quality: int = 85  # JPEG/WebP quality, ignored for PNG
+    raw_capture: bool = False  # Pull raw framebuffer (fast on USB, heavy on WiFi)
+
+    def __post_init__(self):
+        """Load values from environment variables if present."""
+        max_long_edge = os.getenv("PHONE_AGENT_SCREENSHOT_MAX_EDGE")
+        if max_long_edge:
+            self.max_long_edge = int(max_long_edge)
+        self.format = os.getenv("PHONE_AGENT_SCREENSHOT_FORMAT", self.format).upper()
+        if self.format == "JPG":
+            self.format = "JPEG"
+        if self.format not in IMAGE_MIME_TYPES:
+            raise ValueError(f"Unsupported screenshot format: {self.format}")
+        self.quality = int(os.getenv("PHONE_AGENT_SCREENSHOT_QUALITY", self.quality))
+        raw_capture = os.getenv("PHONE_AGENT_SCREENSHOT_RAW")
+        if raw_capture:
+            self.raw_capture = raw_capture.lower() in ("1", "true", "yes")
+
+    @property
+    def mime_type(self) -> str:
+        """MIME type of images produced by this policy."""
+        return IMAGE_MIME_TYPES[self.format]
+
+    def is_passthrough(self, width: int, height: int) -> bool:
+        """Whether a device PNG of the given size can be sent unchanged."""
+        if self.format != "PNG":
+            return False
+        return self.max_long_edge is None or max(width, height) <= self.max_long_edge
 
 
-def get_screenshot(device_id: str | None = None, timeout: int = 10) -> Screenshot:
+class ExecOutUnavailableError(RuntimeError):
+    """Raised when `adb exec-out` cannot be used on the target device."""
+
+
+def get_screenshot(
+    device_id: str | None = None,
+    timeout: int = 10,
+    method: str = CAPTURE_AUTO,
+    raw: bool = False,
+    encoding: ScreenshotEncoding | None = None,
+) -> Screenshot:
     """
     Capture a screenshot from the connected Android device.
 
     Args:
         device_id: Optional ADB device ID for multi-device setups.
         timeout: Timeout in seconds for screenshot operations.
+        method: "exec-out" streams the PNG straight from screencap's stdout,
+            "pull" writes it to /sdcard and pulls it through a temp file,
+            "auto" (default) uses exec-out and falls back to pull only when
+            exec-out is not available on the device.
+        raw: Pull the raw framebuffer instead of a device-encoded PNG. This
+            skips PNG compression on the device; the pixels are encoded once
+            on the host. Only used with exec-out.
+        encoding: Optional downscale/format policy for the encoded image.
+            Defaults to full-resolution PNG.
 
     Returns:
         Screenshot object containing base64 data and dimensions.
@@ -38,76 +141,262 @@ def get_screenshot(device_id: str | None = None, timeout: int = 10) -> Screensho
         If the screenshot fails (e.g., on sensitive screens like payment pages),
         a black fallback image is returned with is_sensitive=True.
     """
-    temp_path = os.path.join(tempfile.gettempdir(), f"screenshot_{uuid.uuid4()}.png")
-    adb_prefix = get_adb_prefix(device_id)
+    device_key = device_id or ""
+    if method == CAPTURE_AUTO:
+        method = (
+            CAPTURE_PULL if device_key in _exec_out_unsupported else CAPTURE_EXEC_OUT
+        )
 
     try:
-        # Execute screenshot command
-        result = subprocess.run(
-            adb_prefix + ["shell", "screencap", "-p", "/sdcard/tmp.png"],
-            capture_output=True,
-            text=True,
-            encoding="utf-8",
-            errors="ignore",
-            timeout=timeout,
-        )
+        if method == CAPTURE_EXEC_OUT:
+            try:
+                data = _capture_exec_out(device_id, timeout, raw=raw)
+            except ExecOutUnavailableError as e:
+                print(f"exec-out unavailable, falling back to pull: {e}")
+                _exec_out_unsupported.add(device_key)
+                data = _capture_pull(device_id, timeout)
+        elif method == CAPTURE_PULL:
+            data = _capture_pull(device_id, timeout)
+        else:
+            raise ValueError(f"Unknown capture method: {method}")
 
-        # Check for screenshot failure (sensitive screen)
-        output = result.stdout + result.stderr
-        if "Status: -1" in output or "Failed" in output:
-            return _create_fallback_screenshot(is_sensitive=True)
-
-        # Pull screenshot to local temp path
-        subprocess.run(
-            adb_prefix + ["pull", "/sdcard/tmp.png", temp_path],
-            capture_output=True,
-            text=True,
-            encoding="utf-8",
-            errors="ignore",
-            timeout=15,
-        )
+        return _build_screenshot(data, encoding, device_id)
+
+    except Exception as e:
+        print(f"Screenshot error: {e}")
+        return _create_fallback_screenshot(False, device_id, encoding)
+
+
+def _build_screenshot(
+    data: bytes | None,
+    encoding: ScreenshotEncoding | None,
+    device_id: str | None = None,
+) -> Screenshot:
+    """
+    Turn captured PNG/raw bytes into an encoded Screenshot.
+
+    Args:
+        data: Captured bytes, None for a refused capture (sensitive screen),
+            or b"" for a failed capture.
+        encoding: Optional encoding policy.
+        device_id: Device the data was captured from.
 
-        if not os.path.exists(temp_path):
-            return _create_fallback_screenshot(is_sensitive=False)
+    Returns:
+        Screenshot object, or a fallback image if there is nothing to encode.
+    """
+    if data is None:
+        return _create_fallback_screenshot(True, device_id, encoding)
+    if not data:
+        return _create_fallback_screenshot(False, device_id, encoding)
 
-        # Read and encode image
-        img = Image.open(temp_path)
+    encoding = encoding or ScreenshotEncoding()
+    if data.startswith(PNG_SIGNATURE):
+        width, height = struct.unpack(">II", data[16:24])
+        if encoding.is_passthrough(width, height):
+            # The device already produced what we need; send it as-is
+            image_data = data
+        else:
+            image_data = encode_image(Image.open(BytesIO(data)), encoding)
+    else:
+        img = _image_from_raw(data)
         width, height = img.size
+        image_data = encode_image(img, encoding)
+
+    # Fallback images keep the device's coordinate space
+    get_device_registry().set_resolution(device_id, (width, height))
+    base64_data = base64.b64encode(image_data).decode("utf-8")
+
+    return Screenshot(
+        base64_data=base64_data,
+        width=width,
+        height=height,
+        is_sensitive=False,
+        mime_type=encoding.mime_type,
+    )
+
+
+def encode_image(img: Image.Image, encoding: ScreenshotEncoding) -> bytes:
+    """
+    Downscale and encode an image according to an encoding policy.
+
+    Args:
+        img: Source image (any RGB-like mode).
+        encoding: Target size, format and quality.
+
+    Returns:
+        Encoded image bytes.
+    """
+    width, height = img.size
+    long_edge = max(width, height)
+    if encoding.max_long_edge and long_edge > encoding.max_long_edge:
+        scale = encoding.max_long_edge / long_edge
+        size = (max(1, round(width * scale)), max(1, round(height * scale)))
+        img = img.resize(size, Image.Resampling.BILINEAR, reducing_gap=2.0)
+
+    if img.mode != "RGB":
+        img = img.convert("RGB")
 
-        buffered = BytesIO()
+    buffered = BytesIO()
+    if encoding.format == "PNG":
         img.save(buffered, format="PNG")
-        base64_data = base64.b64encode(buffered.getvalue()).decode("utf-8")
+    else:
+        img.save(buffered, format=encoding.format, quality=encoding.quality)
+    return buffered.getvalue()
 
-        # Cleanup
-        os.remove(temp_path)
 
-        return Screenshot(
-            base64_data=base64_data, width=width, height=height, is_sensitive=False
-        )
+def _capture_exec_out(
+    device_id: str | None, timeout: int, raw: bool = False
+) -> bytes | None:
+    """
+    Read screencap output directly from its stdout via `adb exec-out`.
 
-    except Exception as e:
-        print(f"Screenshot error: {e}")
-        return _create_fallback_screenshot(is_sensitive=False)
+    No file is written on the device or on the host.
+
+    Args:
+        device_id: Optional ADB device ID.
+        timeout: Timeout in seconds.
+        raw: Request the raw framebuffer (no `-p`) instead of a PNG.
+
+    Returns:
+        PNG or raw framebuffer bytes, or None if screencap refused to capture
+        (sensitive screen).
+
+    Raises:
+        ExecOutUnavailableError: If exec-out did not produce an image stream.
+    """
+    command = ["screencap"] if raw else ["screencap", "-p"]
+    data, stderr = exec_out(command, device_id, timeout)
+    return _check_exec_out_output(data, stderr, raw)
+
+
+def _check_exec_out_output(data: bytes, stderr: bytes, raw: bool) -> bytes | None:
+    """Validate exec-out screencap output; see _capture_exec_out for results."""
+    if data.startswith(PNG_SIGNATURE):
+        return data
+    if raw and _raw_header_size(data) is not None:
+        return data
+
+    # exec-out merges nothing into stdout but the raw stream, so any text we
+    # got here is a diagnostic from screencap or from adb itself.
+    output = (data[:1024] + stderr).decode("utf-8", errors="ignore")
+    if "Status: -1" in output or "Failed" in output:
+        return None
+
+    raise ExecOutUnavailableError(output.strip() or "no output")
+
+
+def _raw_header_size(data: bytes) -> int | None:
+    """Return the header length of a raw screencap dump, or None if invalid."""
+    if len(data) < RAW_HEADER_SIZES[0]:
+        return None
+    width, height, pixel_format = struct.unpack_from("<3I", data)
+    if pixel_format not in RAW_PIXEL_FORMATS:
+        return None
+    header_size = len(data) - width * height * 4
+    return header_size if header_size in RAW_HEADER_SIZES else None
+
+
+def _image_from_raw(data: bytes) -> Image.Image:
+    """
+    Wrap a raw screencap dump in a PIL image without copying the pixels.
+
+    Args:
+        data: Raw `screencap` output (header followed by 4-byte pixels).
+
+    Returns:
+        RGBX image backed by the given buffer, or an RGB image for pixel
+        formats that need reordering.
+    """
+    header_size = _raw_header_size(data)
+    if header_size is None:
+        raise ValueError("Invalid raw framebuffer data")
 
+    width, height, pixel_format = struct.unpack_from("<3I", data)
+    rawmode = RAW_PIXEL_FORMATS[pixel_format]
+    mode = "RGBX" if rawmode == "RGBX" else "RGB"
+    pixels = memoryview(data)[header_size:]
+    return Image.frombuffer(mode, (width, height), pixels, "raw", rawmode, 0, 1)
 
-        return _create_fallback_screenshot(is_sensitive=False)
 
+def _capture_pull(device_id: str | None, timeout: int) -> bytes | None:
+    """
+    Capture via `screencap -p /sdcard/tmp.png` followed by a file pull.
+
+    Returns:
+        PNG bytes, None if screencap refused to capture (sensitive screen),
+        or b"" if the file could not be pulled.
+    """
+    # Execute screenshot command
+    output = run_shell(["screencap", "-p", "/sdcard/tmp.png"], device_id, timeout)
+
+    # Check for screenshot failure (sensitive screen)
+    if "Status: -1" in output or "Failed" in output:
+        return None
+
+    return pull_file("/sdcard/tmp.png", device_id, timeout=15) or b""
 
-# Removed local _get_adb_prefix logic
 
+def get_device_resolution(
+    device_id: str | None = None, timeout: int = 5
+) -> tuple[int, int]:
+    """
+    Get a device's screen size.
+
+    Uses the size of the last successful capture, then `wm size` (override
+    size if set, otherwise physical size) from the device registry, then
+    DEFAULT_RESOLUTION.
+
+    Args:
+        device_id: Optional ADB device ID for multi-device setups.
+        timeout: Timeout in seconds for querying the device.
+
+    Returns:
+        Tuple of (width, height) in pixels.
+    """
+    return get_device_registry().resolution(device_id, timeout) or DEFAULT_RESOLUTION
 
-def _create_fallback_screenshot(is_sensitive: bool) -> Screenshot:
-    """Create a black fallback image when screenshot fails."""
-    default_width, default_height = 1080, 2400
 
-    black_img = Image.new("RGB", (default_width, default_height), color="black")
+@lru_cache(maxsize=32)
+def _encode_placeholder(width: int, height: int, format: str, quality: int) -> str:
+    """Encode a black placeholder with the aspect ratio of width x height."""
+    scale = FALLBACK_LONG_EDGE / max(width, height)
+    size = (max(1, round(width * scale)), max(1, round(height * scale)))
     buffered = BytesIO()
-    black_img.save(buffered, format="PNG")
-    base64_data = base64.b64encode(buffered.getvalue()).decode("utf-8")
+    if format == "PNG":
+        Image.new("RGB", size).save(buffered, format="PNG")
+    else:
+        Image.new("RGB", size).save(buffered, format=format, quality=quality)
+    return base64.b64encode(buffered.getvalue()).decode("utf-8")
+
+
+def _create_fallback_screenshot(
+    is_sensitive: bool,
+    device_id: str | None = None,
+    encoding: ScreenshotEncoding | None = None,
+) -> Screenshot:
+    """
+    Create a black fallback image when screenshot fails.
+
+    The encoded placeholder is memoized per (width, height, format, quality),
+    so a device stuck on a secure screen does not re-encode it every step.
+
+    Args:
+        is_sensitive: Whether the capture was refused (e.g. a payment page).
+        device_id: Device whose resolution the screenshot should report.
+        encoding: Encoding policy; selects the placeholder's image format.
+
+    Returns:
+        Screenshot with the device resolution and a tiny black image.
+    """
+    width, height = get_device_resolution(device_id)
+    format = encoding.format if encoding else "PNG"
+    quality = encoding.quality if encoding else 0
 
     return Screenshot(
-        base64_data=base64_data,
-        width=default_width,
-        height=default_height,
+        base64_data=_encode_placeholder(width, height, format, quality),
+        width=width,
+        height=height,
         is_sensitive=is_sensitive,
+        mime_type=IMAGE_MIME_TYPES[format],
+        is_fallback=True,
     )
@@ -0,0 +1,211 @@
+"""Device-side shell scripts that run several input commands in one round trip."""
+
+import base64
+import shlex
+
+from phone_agent.adb.device import invalidate_current_app, swipe_duration
+from phone_agent.adb.gesture import (
+    Stroke,
+    double_tap_strokes,
+    gesture_script,
+    long_press_strokes,
+)
+from phone_agent.adb.input import ADB_KEYBOARD_IME
+from phone_agent.adb.settle import settle
+from phone_agent.adb.shell import run_shell
+from phone_agent.config.timing import TIMING_CONFIG
+
+# Shell variable holding the keyboard to restore at the end of the script
+_IME_VARIABLE = "__phone_agent_ime"
+
+
+class DeviceScript:
+    """
+    A sequence of input commands compiled into one device shell script.
+
+    Each command would otherwise cost its own adb invocation and a
+    host-side delay. The script runs them back to back on the device with a
+    short `sleep` in between, and the caller waits for the screen to settle
+    once at the end.
+
+    Args:
+        device_id: Optional ADB device ID; gestures are compiled for its
+            touchscreen.
+        step_delay: Seconds to sleep on the device between commands. If None,
+            uses the configured sequence step delay.
+
+    Example:
+        >>> script = DeviceScript("emulator-5554")
+        >>> script.tap(540, 800)
+        >>> script.type_text("hello")
+        >>> script.tap(540, 1200)
+        >>> script.run()
+    """
+
+    def __init__(self, device_id: str | None = None, step_delay: float | None = None):
+        self.device_id = device_id
+        if step_delay is None:
+            step_delay = TIMING_CONFIG.action.sequence_step_delay
+        self.step_delay = step_delay
+        # Delay after the last command, used as the settle bound by run()
+        self.settle_delay = 0.0
+        self._commands: list[str] = []
+        self._keyboard_switched = False
+
+    def __len__(self) -> int:
+        return len(self._commands)
+
+    def _append(self, line: str, settle_delay: float) -> None:
+        previous = self._commands[-1] if self._commands else "sleep"
+        if self.step_delay > 0 and not previous.startswith("sleep"):
+            self._commands.append(f"sleep {self.step_delay:g}")
+        self._commands.append(line)
+        self.settle_delay = settle_delay
+
+    def _add(self, args: list[str], settle_delay: float) -> None:
+        self._append(" ".join(shlex.quote(arg) for arg in args), settle_delay)
+
+    def tap(self, x: int, y: int) -> None:
+        """Add a tap at the specified coordinates."""
+        self._add(
+            ["input", "tap", str(x), str(y)], TIMING_CONFIG.device.default_tap_delay
+        )
+
+    def double_tap(self, x: int, y: int) -> None:
+        """Add a double tap at the specified coordinates."""
+        interval_ms = int(TIMING_CONFIG.device.double_tap_interval * 1000)
+        command = gesture_script(double_tap_strokes(x, y, interval_ms), self.device_id)
+        if command is None:
+            # Overlapping taps with only `input` available, as in
+            # adb.device.double_tap: tap twice in a row
+            command = f"input tap {x} {y}; input tap {x} {y}"
+        self._append(f"{{ {command}; }}", TIMING_CONFIG.device.default_double_tap_delay)
+
+    def long_press(self, x: int, y: int, duration_ms: int = 3000) -> None:
+        """Add a long press at the specified coordinates."""
+        self.gesture(
+            long_press_strokes(x, y, duration_ms),
+            TIMING_CONFIG.device.default_long_press_delay,
+        )
+
+    def gesture(self, strokes: list[Stroke], settle_delay: float | None = None) -> None:
+        """
+        Add a touch gesture.
+
+        Raises:
+            ValueError: If the device cannot express the gesture.
+        """
+        command = gesture_script(strokes, self.device_id)
+        if command is None:
+            raise ValueError("Gesture not supported on this device")
+        if settle_delay is None:
+            settle_delay = TIMING_CONFIG.device.default_swipe_delay
+        self._append(f"{{ {command}; }}", settle_delay)
+
+    def swipe(
+        self,
+        start_x: int,
+        start_y: int,
+        end_x: int,
+        end_y: int,
+        duration_ms: int | None = None,
+    ) -> None:
+        """Add a swipe from start to end coordinates."""
+        if duration_ms is None:
+            duration_ms = swipe_duration(start_x, start_y, end_x, end_y)
+        self._add(
+            [
+                "input",
+                "swipe",
+                str(start_x),
+                str(start_y),
+                str(end_x),
+                str(end_y),
+                str(duration_ms),
+            ],
+            TIMING_CONFIG.device.default_swipe_delay,
+        )
+
+    def back(self) -> None:
+        """Add a press of the back button."""
+        self._add(["input", "keyevent", "4"], TIMING_CONFIG.device.default_back_delay)
+
+    def home(self) -> None:
+        """Add a press of the home button."""
+        self._add(
+            ["input", "keyevent", "KEYCODE_HOME"],
+            TIMING_CONFIG.device.default_home_delay,
+        )
+
+    def launch(self, package: str) -> None:
+        """Add the launch of an app by package name."""
+        self._add(
+            ["monkey", "-p", package, "-c", "android.intent.category.LAUNCHER", "1"],
+            TIMING_CONFIG.device.default_launch_delay,
+        )
+
+    def type_text(self, text: str) -> None:
+        """
+        Add clearing the focused field and typing text with ADB Keyboard.
+
+        The first Type switches to ADB Keyboard and remembers the current
+        keyboard in a shell variable; the script switches back at its end.
+        """
+        if not self._keyboard_switched:
+            self._append(
+                f"{_IME_VARIABLE}=$(settings get secure default_input_method); "
+                f"ime set {ADB_KEYBOARD_IME}",
+                TIMING_CONFIG.action.keyboard_switch_delay,
+            )
+            # Give the keyboard time to bind before the first broadcast
+            self.sleep(TIMING_CONFIG.action.keyboard_switch_delay)
+            self._keyboard_switched = True
+
+        encoded_text = base64.b64encode(text.encode("utf-8")).decode("utf-8")
+        self._add(
+            ["am", "broadcast", "-a", "ADB_CLEAR_TEXT"],
+            TIMING_CONFIG.action.text_clear_delay,
+        )
+        self._add(
+            ["am", "broadcast", "-a", "ADB_INPUT_B64", "--es", "msg", encoded_text],
+            TIMING_CONFIG.action.text_input_delay,
+        )
+
+    def sleep(self, seconds: float) -> None:
+        """Add a pause on the device."""
+        self._commands.append(f"sleep {seconds:g}")
+        self.settle_delay = 0.0
+
+    def build(self) -> str:
+        """
+        Get the script text.
+
+        Returns:
+            Commands joined with ";" so the script is a single shell line.
+        """
+        commands = list(self._commands)
+        if self._keyboard_switched:
+            commands.append(f'ime set "${_IME_VARIABLE}"')
+        return "; ".join(commands)
+
+    def run(self, timeout: float | None = None, wait: bool = True) -> str:
+        """
+        Run the script with one adb shell invocation.
+
+        Args:
+            timeout: Timeout in seconds.
+            wait: Wait for the screen to settle after the last command.
+
+        Returns:
+            Combined output of the commands.
+        """
+        if not self._commands:
+            return ""
+        output = run_shell([self.build()], self.device_id, timeout)
+        invalidate_current_app(self.device_id)
+        if wait:
+            delay = self.settle_delay
+            if self._keyboard_switched:
+                delay = max(delay, TIMING_CONFIG.action.keyboard_restore_delay)
+            settle(delay, self.device_id)
+        return output
@@ -0,0 +1,116 @@
+"""Waiting for the screen to settle after an action."""
+
+import re
+import threading
+import time
+
+from phone_agent.adb.shell import run_shell
+from phone_agent.config.timing import TIMING_CONFIG
+
+SETTLE_FIXED = "fixed"
+SETTLE_ADAPTIVE = "adaptive"
+
+# Hash the raw framebuffer on the device so only the digest crosses adb
+_FRAME_HASH_COMMAND = ["screencap", "|", "md5sum"]
+_HASH_PATTERN = re.compile(r"\b[0-9a-f]{32}\b")
+
+# Time spent in settle() per thread, for the latency metrics
+_settle_time = threading.local()
+
+
+def get_frame_hash(device_id: str | None = None, timeout: float = 5) -> str | None:
+    """
+    Get a hash of the current framebuffer.
+
+    Args:
+        device_id: Optional ADB device ID for multi-device setups.
+        timeout: Timeout in seconds.
+
+    Returns:
+        The MD5 digest of the raw frame, or None if it could not be computed.
+    """
+    try:
+        output = run_shell(_FRAME_HASH_COMMAND, device_id, timeout)
+    except Exception:
+        return None
+    match = _HASH_PATTERN.search(output)
+    return match.group(0) if match else None
+
+
+def wait_for_settle(device_id: str | None = None, max_wait: float = 1.0) -> float:
+    """
+    Wait until consecutive frames are identical, or until max_wait passes.
+
+    If the device cannot hash its framebuffer, this sleeps for the remainder
+    of max_wait, so it is never shorter than a fixed delay would have been.
+
+    Args:
+        device_id: Optional ADB device ID for multi-device setups.
+        max_wait: Upper bound in seconds.
+
+    Returns:
+        Seconds spent waiting.
+    """
+    config = TIMING_CONFIG.settle
+    start = time.perf_counter()
+    deadline = start + max_wait
+
+    time.sleep(min(config.min_wait, max_wait))
+
+    previous = None
+    stable = 0
+    while True:
+        frame = get_frame_hash(device_id, timeout=max(max_wait, 1.0))
+        now = time.perf_counter()
+        if frame is None:
+            time.sleep(max(0.0, deadline - now))
+            break
+
+        stable = stable + 1 if frame == previous else 1
+        previous = frame
+        if stable >= config.stable_frames or now >= deadline:
+            break
+
+        time.sleep(min(config.poll_interval, max(0.0, deadline - now)))
+
+    return time.perf_counter() - start
+
+
+def settle(delay: float, device_id: str | None = None) -> None:
+    """
+    Wait after an action according to the configured settle mode.
+
+    Args:
+        delay: Fixed delay in seconds; the upper bound in adaptive mode.
+        device_id: Optional ADB device ID for multi-device setups.
+    """
+    if delay <= 0:
+        return
+    start = time.perf_counter()
+    if TIMING_CONFIG.settle.mode == SETTLE_ADAPTIVE:
+        wait_for_settle(device_id, max_wait=delay)
+    else:
+        time.sleep(delay)
+    record_settle_time(time.perf_counter() - start)
+
+
+def record_settle_time(seconds: float) -> None:
+    """
+    Count time spent waiting for the device towards the settle metrics.
+
+    Args:
+        seconds: Seconds spent waiting outside settle().
+    """
+    _settle_time.total = getattr(_settle_time, "total", 0.0) + seconds
+
+
+def pop_settle_time() -> float:
+    """
+    Get the time the current thread spent in settle() and reset it.
+
+    Returns:
+        Seconds spent settling since the previous call.
+    """
+    total = getattr(_settle_time, "total", 0.0)
+    _settle_time.total = 0.0
+    return total
@@ -0,0 +1,308 @@
+"""Shell command execution backends for Android devices."""
+
+import atexit
+import os
+import queue
+import subprocess
+import tempfile
+import threading
+import uuid
+
+from phone_agent.adb.protocol import get_adb_client
+from phone_agent.adb.utils import get_adb_prefix
+
+# Backends accepted by set_adb_backend()
+BACKEND_SUBPROCESS = "subprocess"  # One `adb shell` process per command
+BACKEND_SESSION = "session"  # One long-lived `adb shell` per device
+BACKEND_SOCKET = "socket"  # Talk to the adb server protocol directly
+BACKENDS = (BACKEND_SUBPROCESS, BACKEND_SESSION, BACKEND_SOCKET)
+
+_backend = os.getenv("PHONE_AGENT_ADB_BACKEND", BACKEND_SUBPROCESS)
+
+_sessions: dict[str, "AdbShellSession"] = {}
+_sessions_lock = threading.Lock()
+
+
+class AdbShellSession:
+    """
+    A long-lived `adb shell` process that runs commands over a single stream.
+
+    Commands are written to the shell's stdin one at a time. Each one is
+    followed by an `echo` of a random sentinel and the exit status, which
+    marks where its output ends without closing the stream.
+
+    Args:
+        device_id: Optional ADB device ID for multi-device setups.
+
+    Example:
+        >>> session = AdbShellSession("emulator-5554")
+        >>> session.run("input keyevent 4")
+        ''
+        >>> session.close()
+    """
+
+    def __init__(self, device_id: str | None = None):
+        self.device_id = device_id
+        self.last_exit_code: int | None = None
+        self._sentinel = f"__PHONE_AGENT_{uuid.uuid4().hex}__"
+        self._process: subprocess.Popen | None = None
+        self._lines: queue.Queue[bytes | None] = queue.Queue()
+        self._lock = threading.Lock()
+
+    @property
+    def is_alive(self) -> bool:
+        """Whether the underlying shell process is running."""
+        return self._process is not None and self._process.poll() is None
+
+    def start(self) -> None:
+        """Start the shell process if it is not already running."""
+        if self.is_alive:
+            return
+
+        self._lines = queue.Queue()
+        self._process = subprocess.Popen(
+            get_adb_prefix(self.device_id) + ["shell"],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            bufsize=0,
+        )
+        threading.Thread(
+            target=self._read_output,
+            args=(self._process.stdout, self._lines),
+            daemon=True,
+        ).start()
+
+    def run(self, command: str, timeout: float | None = None) -> str:
+        """
+        Run a shell command on the device and return its output.
+
+        Args:
+            command: Shell command line, interpreted by the device's sh.
+            timeout: Seconds to wait for the command to finish.
+
+        Returns:
+            Combined stdout and stderr of the command.
+
+        Raises:
+            subprocess.TimeoutExpired: If the command did not finish in time.
+                The session is closed and restarted on the next call.
+            RuntimeError: If the shell process exited unexpectedly.
+        """
+        with self._lock:
+            self.start()
+            # Keep the command away from our stdin, merge its stderr, and
+            # print the sentinel on its own line even if output lacks a newline
+            framed = (
+                f"{{ {command}\n}} </dev/null 2>&1; "
+                f"__rc=$?; echo; echo {self._sentinel}$__rc\n"
+            )
+            try:
+                self._process.stdin.write(framed.encode("utf-8"))
+                self._process.stdin.flush()
+            except OSError as e:
+                self._terminate()
+                raise RuntimeError(f"adb shell session closed: {e}") from e
+
+            output = []
+            while True:
+                try:
+                    line = self._lines.get(timeout=timeout)
+                except queue.Empty:
+                    self._terminate()
+                    raise subprocess.TimeoutExpired(command, timeout)
+
+                if line is None:
+                    self._terminate()
+                    raise RuntimeError("adb shell session exited unexpectedly")
+
+                text = line.decode("utf-8", errors="ignore").rstrip("\r\n")
+                if text.startswith(self._sentinel):
+                    exit_code = text[len(self._sentinel) :]
+                    self.last_exit_code = (
+                        int(exit_code) if exit_code.isdigit() else None
+                    )
+                    break
+                output.append(text)
+
+            # Drop the blank line added by the framing `echo`
+            if output and output[-1] == "":
+                output.pop()
+            return "\n".join(output)
+
+    def close(self) -> None:
+        """Stop the shell process."""
+        with self._lock:
+            self._terminate()
+
+    def _terminate(self) -> None:
+        if self._process is None:
+            return
+        try:
+            self._process.stdin.close()
+        except OSError:
+            pass
+        if self._process.poll() is None:
+            self._process.kill()
+        self._process.wait()
+        self._process = None
+
+    @staticmethod
+    def _read_output(stream, lines: queue.Queue) -> None:
+        for line in iter(stream.readline, b""):
+            lines.put(line)
+        lines.put(None)
+
+
+def get_shell_session(device_id: str | None = None) -> AdbShellSession:
+    """
+    Get the shared shell session for a device, creating it if needed.
+
+    Args:
+        device_id: Optional ADB device ID.
+
+    Returns:
+        The device's AdbShellSession.
+    """
+    key = device_id or ""
+    with _sessions_lock:
+        session = _sessions.get(key)
+        if session is None:
+            session = AdbShellSession(device_id)
+            _sessions[key] = session
+        return session
+
+
+def close_shell_sessions() -> None:
+    """Close all shared shell sessions."""
+    with _sessions_lock:
+        sessions = list(_sessions.values())
+        _sessions.clear()
+    for session in sessions:
+        session.close()
+
+
+atexit.register(close_shell_sessions)
+
+
+def set_adb_backend(backend: str) -> None:
+    """
+    Select how device helpers run shell commands.
+
+    Args:
+        backend: "subprocess" (default) spawns `adb shell` per command,
+            "session" reuses one persistent `adb shell` per device,
+            "socket" sends requests to the adb server without spawning
+            any process.
+    """
+    global _backend
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown ADB backend: {backend}")
+    _backend = backend
+
+
+def get_adb_backend() -> str:
+    """Get the name of the active shell backend."""
+    return _backend
+
+
+def run_shell(
+    args: list[str], device_id: str | None = None, timeout: float | None = None
+) -> str:
+    """
+    Run a shell command on the device using the active backend.
+
+    Args:
+        args: Command and arguments, joined with spaces like `adb shell` does.
+        device_id: Optional ADB device ID for multi-device setups.
+        timeout: Timeout in seconds.
+
+    Returns:
+        Combined stdout and stderr of the command.
+    """
+    if _backend == BACKEND_SOCKET:
+        output = get_adb_client().shell(" ".join(args), device_id, timeout)
+        return output.decode("utf-8", errors="ignore")
+
+    if _backend == BACKEND_SESSION:
+        try:
+            return get_shell_session(device_id).run(" ".join(args), timeout=timeout)
+        except RuntimeError as e:
+            print(f"adb shell session failed, falling back to subprocess: {e}")
+
+    result = subprocess.run(
+        get_adb_prefix(device_id) + ["shell"] + args,
+        capture_output=True,
+        text=True,
+        encoding="utf-8",
+        errors="ignore",
+        timeout=timeout,
+    )
+    return result.stdout + result.stderr
+
+
+def exec_out(
+    args: list[str], device_id: str | None = None, timeout: float | None = None
+) -> tuple[bytes, bytes]:
+    """
+    Run a command with binary-safe output (`adb exec-out`).
+
+    Args:
+        args: Command and arguments.
+        device_id: Optional ADB device ID for multi-device setups.
+        timeout: Timeout in seconds.
+
+    Returns:
+        Tuple of (stdout, stderr). The socket backend cannot separate the
+        two streams, so its stderr is always empty.
+    """
+    if _backend == BACKEND_SOCKET:
+        return get_adb_client().exec_out(" ".join(args), device_id, timeout), b""
+
+    result = subprocess.run(
+        get_adb_prefix(device_id) + ["exec-out"] + args,
+        capture_output=True,
+        timeout=timeout,
+    )
+    return result.stdout, result.stderr
+
+
+def pull_file(
+    remote_path: str, device_id: str | None = None, timeout: float | None = None
+) -> bytes | None:
+    """
+    Read a file from the device.
+
+    Args:
+        remote_path: Path of the file on the device.
+        device_id: Optional ADB device ID for multi-device setups.
+        timeout: Timeout in seconds.
+
+    Returns:
+        File contents, or None if the file could not be pulled.
+    """
+    if _backend == BACKEND_SOCKET:
+        try:
+            return get_adb_client().pull(remote_path, device_id, timeout)
+        except RuntimeError as e:
+            print(f"Failed to pull {remote_path}: {e}")
+            return None
+
+    temp_path = os.path.join(tempfile.gettempdir(), f"pull_{uuid.uuid4()}")
+    subprocess.run(
+        get_adb_prefix(device_id) + ["pull", remote_path, temp_path],
+        capture_output=True,
+        text=True,
+        encoding="utf-8",
+        errors="ignore",
+        timeout=timeout,
+    )
+
+    if not os.path.exists(temp_path):
+        return None
+
+    try:
+        with open(temp_path, "rb") as f:
+            return f.read()
+    finally:
+        os.remove(temp_path)
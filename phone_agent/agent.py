@@ -1,16 +1,34 @@
 """Main PhoneAgent class for orchestrating phone automation."""
 
 import json
+import os
+import time
 import traceback
-from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field, replace
 from typing import Any, Callable
 
-from phone_agent.actions import ActionHandler
-from phone_agent.actions.handler import do, finish, parse_action
-from phone_agent.adb import get_current_app, get_screenshot
+from phone_agent.actions import ActionHandler, ActionResult
+from phone_agent.actions.handler import (
+    do,
+    finish,
+    parse_action,
+    parse_actions,
+    parse_error,
+    sequence,
+)
+from phone_agent.adb import (
+    KeyboardSession,
+    Screenshot,
+    ScreenshotEncoding,
+    get_current_app,
+    get_screenshot,
+)
 from phone_agent.config import get_messages, get_system_prompt
+from phone_agent.metrics import record_step
 from phone_agent.model import ModelClient, ModelConfig
-from phone_agent.model.client import MessageBuilder
+from phone_agent.model.client import MessageBuilder, ModelResponse
+from phone_agent.model.context import ContextConfig, ContextManager, ContextStats
 
 # Event types
 EVENT_THINKING = "thinking"
@@ -29,10 +47,35 @@ class AgentConfig:
     lang: str = "cn"
     system_prompt: str | None = None
     verbose: bool = True
+    screenshot_encoding: ScreenshotEncoding = field(default_factory=ScreenshotEncoding)
+    context: ContextConfig = field(default_factory=ContextConfig)
+    # Run every call in an answer that holds several (e.g. Tap, Type, Tap)
+    # as one device script instead of only the first. The built-in prompts
+    # ask for one action per answer, so this needs a prompt that allows more.
+    # Turns off ModelConfig.stop_on_action, which would end the stream after
+    # the first call.
+    action_sequences: bool = False
+    # Switch to ADB Keyboard on the first Type and back when the run ends,
+    # instead of around every Type
+    keyboard_session: bool = False
+    # Reuse the foreground app looked up at most this many seconds ago
+    # (0 disables). Actions, waits and takeovers drop the cached value, so
+    # it is only reused after steps that left the device alone, such as a
+    # model error or an unparsable answer.
+    current_app_max_age: float = 5.0
 
     def __post_init__(self):
         if self.system_prompt is None:
             self.system_prompt = get_system_prompt(self.lang)
+        action_sequences = os.getenv("PHONE_AGENT_ACTION_SEQUENCES")
+        if action_sequences:
+            self.action_sequences = action_sequences.lower() in ("1", "true", "yes")
+        self.current_app_max_age = float(
+            os.getenv("PHONE_AGENT_CURRENT_APP_MAX_AGE", self.current_app_max_age)
+        )
+        keyboard_session = os.getenv("PHONE_AGENT_KEYBOARD_SESSION")
+        if keyboard_session:
+            self.keyboard_session = keyboard_session.lower() in ("1", "true", "yes")
 
 
 @dataclass
@@ -44,6 +87,12 @@ class StepResult:
     action: dict[str, Any] | None
     thinking: str
     message: str | None = None
+    # Per-phase wall-clock durations in seconds: screenshot, current_app,
+    # observe (both lookups, run concurrently), inference, parse, action,
+    # settle (the part of action spent waiting for the screen), total
+    timings: dict[str, float] = field(default_factory=dict)
+    # Estimated prompt size of this step's model request
+    context_stats: ContextStats | None = None
 
 
 class PhoneAgent:
@@ -79,16 +128,35 @@ class PhoneAgent:
         self.model_config = model_config or ModelConfig()
         self.agent_config = agent_config or AgentConfig()
         self.event_callback = event_callback
-
-        self.model_client = ModelClient(self.model_config)
+        if self.agent_config.action_sequences and self.model_config.stop_on_action:
+            # Stopping at the first complete call would cut the sequence off
+            self.model_config = replace(self.model_config, stop_on_action=False)
+
+        self.model_client = self._create_model_client()
+        self.keyboard_session = (
+            KeyboardSession(self.agent_config.device_id)
+            if self.agent_config.keyboard_session
+            else None
+        )
         self.action_handler = ActionHandler(
             device_id=self.agent_config.device_id,
             confirmation_callback=confirmation_callback,
             takeover_callback=takeover_callback,
+            keyboard_session=self.keyboard_session,
         )
 
         self._context: list[dict[str, Any]] = []
+        self._context_manager = ContextManager(self.agent_config.context)
+        self._observation_image: dict[str, Any] | None = None
         self._step_count = 0
+        self._device_errors = 0
+        # Parse error of the last answer, shown with the next observation
+        self._action_error: str | None = None
+        self._observe_executor: ThreadPoolExecutor | None = None
+
+    def _create_model_client(self) -> ModelClient:
+        """Create the model client used by this agent."""
+        return ModelClient(self.model_config)
 
     def run(self, task: str) -> str:
         """
@@ -101,22 +169,28 @@ class PhoneAgent:
             Final message from the agent.
         """
         self._context = []
+        self._context_manager.reset()
         self._step_count = 0
+        self._device_errors = 0
+        self._action_error = None
 
-        # First step with user prompt
-        result = self._execute_step(task, is_first=True)
-
-        if result.finished:
-            return result.message or "Task completed"
-
-        # Continue until finished or max steps reached
-        while self._step_count < self.agent_config.max_steps:
-            result = self._execute_step(is_first=False)
+        try:
+            # First step with user prompt
+            result = self._execute_step(task, is_first=True)
 
             if result.finished:
                 return result.message or "Task completed"
 
-        return "Max steps reached"
+            # Continue until finished or max steps reached
+            while self._step_count < self.agent_config.max_steps:
+                result = self._execute_step(is_first=False)
+
+                if result.finished:
+                    return result.message or "Task completed"
+
+            return "Max steps reached"
+        finally:
+            self.restore_keyboard()
 
     def step(self, task: str | None = None) -> StepResult:
         """
@@ -139,19 +213,126 @@ class PhoneAgent:
 
     def reset(self) -> None:
         """Reset the agent state for a new task."""
+        self.restore_keyboard()
         self._context = []
+        self._context_manager.reset()
         self._step_count = 0
+        self._device_errors = 0
+        self._action_error = None
+
+    def restore_keyboard(self) -> None:
+        """Switch back to the user's keyboard if a keyboard session changed it."""
+        if self.keyboard_session is None:
+            return
+        try:
+            self.keyboard_session.restore()
+        except Exception as e:
+            print(f"Failed to restore keyboard: {e}")
 
     def _execute_step(
         self, user_prompt: str | None = None, is_first: bool = False
     ) -> StepResult:
         """Execute a single step of the agent loop."""
         self._step_count += 1
+        step_start = time.perf_counter()
 
         # Capture current screen state
-        screenshot = get_screenshot(self.agent_config.device_id)
-        current_app = get_current_app(self.agent_config.device_id)
+        screenshot, current_app, timings = self._observe()
+        if screenshot.is_fallback and not screenshot.is_sensitive:
+            self._device_errors += 1
+
+        self._append_observation(screenshot, current_app, user_prompt, is_first)
+
+        # Get model response
+        try:
+            messages = self._context_manager.build(
+                self._context, self._observation_image
+            )
+            self._on_request_start()
+            inference_start = time.perf_counter()
+            response = self.model_client.request(messages)
+            timings["inference"] = time.perf_counter() - inference_start
+            self._on_response(response)
+        except Exception as e:
+            return self._model_error_result(e)
+
+        parse_start = time.perf_counter()
+        action = self._parse_response_action(response, screenshot)
+        timings["parse"] = time.perf_counter() - parse_start
+
+        # Execute action
+        action_start = time.perf_counter()
+        try:
+            result = self.action_handler.execute(
+                action, screenshot.width, screenshot.height
+            )
+        except Exception as e:
+            self._device_errors += 1
+            if self.agent_config.verbose:
+                traceback.print_exc()
+            result = self.action_handler.execute(
+                finish(message=str(e)), screenshot.width, screenshot.height
+            )
+        timings["action"] = time.perf_counter() - action_start
+        timings["settle"] = self.action_handler.last_settle_time
+        timings["total"] = time.perf_counter() - step_start
+
+        return self._complete_step(action, response, result, timings, screenshot)
+
+    def _observe(self) -> tuple[Screenshot, str, dict[str, float]]:
+        """
+        Capture the screen and look up the foreground app concurrently.
+
+        Both are independent adb round trips, so the foreground app lookup
+        runs on a per-agent worker thread while the screenshot is captured.
+
+        Returns:
+            Tuple of (screenshot, current app name, phase timings).
+        """
+        device_id = self.agent_config.device_id
+        encoding = self.agent_config.screenshot_encoding
+        timings: dict[str, float] = {}
+
+        def timed(name: str, func: Callable, *args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                timings[name] = time.perf_counter() - start
+
+        if self._observe_executor is None:
+            self._observe_executor = ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix="phone-agent-observe"
+            )
+
+        observe_start = time.perf_counter()
+        current_app_future = self._observe_executor.submit(
+            timed,
+            "current_app",
+            get_current_app,
+            device_id,
+            self.agent_config.current_app_max_age,
+        )
+        screenshot = timed(
+            "screenshot",
+            get_screenshot,
+            device_id,
+            raw=encoding.raw_capture,
+            encoding=encoding,
+        )
+        current_app = current_app_future.result()
+        timings["observe"] = time.perf_counter() - observe_start
 
+        return screenshot, current_app, timings
+
+    def _append_observation(
+        self,
+        screenshot: Screenshot,
+        current_app: str,
+        user_prompt: str | None,
+        is_first: bool,
+    ) -> None:
+        """Add the system prompt (first step) and the current screen to context."""
         # Build messages
         if is_first:
             self._context.append(
@@ -160,83 +341,121 @@ class PhoneAgent:
 
             screen_info = MessageBuilder.build_screen_info(current_app)
             text_content = f"{user_prompt}\n\n{screen_info}"
-
-            self._context.append(
-                MessageBuilder.create_user_message(
-                    text=text_content, image_base64=screenshot.base64_data
-                )
-            )
         else:
             screen_info = MessageBuilder.build_screen_info(current_app)
             text_content = f"** Screen Info **\n\n{screen_info}"
+        if self._action_error:
+            text_content = (
+                f"** Action Error **\n\n{self._action_error}\n\n{text_content}"
+            )
+            self._action_error = None
+
+        if self.agent_config.context.append_only:
+            # Keep the stored turn text-only; the screenshot is attached after
+            # the text when the request is built, so this turn's text stays
+            # part of the cacheable prefix of the next request
+            self._context.append(MessageBuilder.create_user_message(text=text_content))
+            self._observation_image = MessageBuilder.create_image_content(
+                screenshot.base64_data, screenshot.mime_type
+            )
+            return
 
-            self._context.append(
-                MessageBuilder.create_user_message(
-                    text=text_content, image_base64=screenshot.base64_data
-                )
+        self._context.append(
+            MessageBuilder.create_user_message(
+                text=text_content,
+                image_base64=screenshot.base64_data,
+                mime_type=screenshot.mime_type,
             )
+        )
 
-        # Get model response
-        try:
-            msgs = get_messages(self.agent_config.lang)
-            print("\n" + "=" * 50)
-            print("-" * 50)
-            
-            if self.event_callback:
-                self.event_callback(EVENT_THINKING, {"content": msgs['thinking']})
-
-            response = self.model_client.request(self._context)
-            
-            if self.event_callback:
-                self.event_callback(EVENT_THINKING, {"content": response.thinking})
-                
-        except Exception as e:
-            if self.agent_config.verbose:
-                traceback.print_exc()
-            if self.event_callback:
-                self.event_callback(EVENT_ERROR, {"error": str(e)})
-            return StepResult(
-                success=False,
-                finished=True,
-                action=None,
-                thinking="",
-                message=f"Model error: {e}",
+    def _on_request_start(self) -> None:
+        """Print the step header and notify listeners that inference started."""
+        msgs = get_messages(self.agent_config.lang)
+        sink = self.model_client.sink
+        sink.write("\n" + "=" * 50)
+        stats = self._context_manager.last_stats
+        if self.agent_config.verbose and self.agent_config.context.enabled and stats:
+            sink.write(
+                f"📏 {msgs['context_tokens']}: {stats.sent_tokens} / {stats.full_tokens}"
             )
+        sink.write("-" * 50)
+
+        if self.event_callback:
+            self.event_callback(EVENT_THINKING, {"content": msgs["thinking"]})
+
+    def _on_response(self, response: ModelResponse) -> None:
+        """Forward the model's thinking to listeners."""
+        if self.event_callback:
+            self.event_callback(EVENT_THINKING, {"content": response.thinking})
+
+    def _model_error_result(self, error: Exception) -> StepResult:
+        """Build the step result for a failed model request."""
+        if self.agent_config.verbose:
+            traceback.print_exc()
+        if self.event_callback:
+            self.event_callback(EVENT_ERROR, {"error": str(error)})
+        return StepResult(
+            success=False,
+            finished=True,
+            action=None,
+            thinking="",
+            message=f"Model error: {error}",
+        )
+
+    def _parse_response_action(
+        self, response: ModelResponse, screenshot: Screenshot
+    ) -> dict[str, Any]:
+        """Parse the action from a model response and report it."""
+        msgs = get_messages(self.agent_config.lang)
 
         # Parse action from response
         try:
-            action = parse_action(response.action)
-        except ValueError:
+            if self.agent_config.action_sequences:
+                actions = parse_actions(response.action)
+                action = actions[0] if len(actions) == 1 else sequence(actions)
+            else:
+                action = parse_action(response.action)
+        except ValueError as e:
+            # A truncated or malformed answer is not the end of the task:
+            # record the error and let the next step ask again
             if self.agent_config.verbose:
                 traceback.print_exc()
-            action = finish(message=response.action)
+            action = parse_error(e)
 
         if self.agent_config.verbose:
             # Print thinking process
-            print("-" * 50)
-            print(f"🎯 {msgs['action']}:")
-            print(json.dumps(action, ensure_ascii=False, indent=2))
-            print("=" * 50 + "\n")
+            sink = self.model_client.sink
+            sink.write("-" * 50)
+            sink.write(f"🎯 {msgs['action']}:")
+            sink.write(json.dumps(action, ensure_ascii=False, indent=2))
+            sink.write("=" * 50 + "\n")
 
         if self.event_callback:
-            self.event_callback(EVENT_ACTION, {"action": action, "screenshot": screenshot.base64_data})
-
+            self.event_callback(
+                EVENT_ACTION, {"action": action, "screenshot": screenshot.base64_data}
+            )
 
         # Remove image from context to save space
-        self._context[-1] = MessageBuilder.remove_images_from_message(self._context[-1])
-
-        # Execute action
-        try:
-            result = self.action_handler.execute(
-                action, screenshot.width, screenshot.height
-            )
-        except Exception as e:
-            if self.agent_config.verbose:
-                traceback.print_exc()
-            result = self.action_handler.execute(
-                finish(message=str(e)), screenshot.width, screenshot.height
+        if self._observation_image is not None:
+            self._observation_image = None
+        else:
+            self._context[-1] = MessageBuilder.remove_images_from_message(
+                self._context[-1]
             )
 
+        return action
+
+    def _complete_step(
+        self,
+        action: dict[str, Any],
+        response: ModelResponse,
+        result: ActionResult,
+        timings: dict[str, float] | None = None,
+        screenshot: Screenshot | None = None,
+    ) -> StepResult:
+        """Record the assistant turn and metrics, and build the step result."""
+        msgs = get_messages(self.agent_config.lang)
+
         # Add assistant response to context
         self._context.append(
             MessageBuilder.create_assistant_message(
@@ -244,19 +463,35 @@ class PhoneAgent:
             )
         )
 
+        if action.get("_metadata") == "parse_error":
+            self._action_error = result.message
+
         # Check if finished
         finished = action.get("_metadata") == "finish" or result.should_finish
+        final_message = result.message or action.get("message", msgs["done"])
 
         if finished and self.agent_config.verbose:
-            msgs = get_messages(self.agent_config.lang)
-            print("\n" + "🎉 " + "=" * 48)
-            print(
-                f"✅ {msgs['task_completed']}: {result.message or action.get('message', msgs['done'])}"
-            )
-            print("=" * 50 + "\n")
-        
+            sink = self.model_client.sink
+            sink.write("\n" + "🎉 " + "=" * 48)
+            sink.write(f"✅ {msgs['task_completed']}: {final_message}")
+            sink.write("=" * 50 + "\n")
+
         if self.event_callback and finished:
-            self.event_callback(EVENT_FINISHED, {"result": result.message or action.get('message', msgs['done'])})
+            self.event_callback(EVENT_FINISHED, {"result": final_message})
+
+        record_step(
+            self.agent_config.device_id,
+            self._step_count,
+            timings or {},
+            model_timings={
+                "ttft": response.time_to_first_token,
+                "thinking_end": response.time_to_thinking_end,
+                "total": response.total_time,
+            },
+            screenshot_bytes=len(screenshot.base64_data) if screenshot else None,
+            action=action,
+            success=result.success,
+        )
 
         return StepResult(
             success=result.success,
@@ -264,6 +499,8 @@ class PhoneAgent:
             action=action,
             thinking=response.thinking,
             message=result.message or action.get("message"),
+            timings=timings or {},
+            context_stats=self._context_manager.last_stats,
         )
 
     @property
@@ -275,3 +512,15 @@ class PhoneAgent:
     def step_count(self) -> int:
         """Get the current step count."""
         return self._step_count
+
+    @property
+    def device_errors(self) -> int:
+        """
+        Get the number of failed screen captures and actions in this task.
+
+        adb failures do not raise: a failed capture becomes a black
+        placeholder and a failed action finishes the task with the error as
+        its message. This count lets callers tell those apart from results
+        the model produced on a working device.
+        """
+        return self._device_errors
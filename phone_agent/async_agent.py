@@ -0,0 +1,172 @@
+"""asyncio-native PhoneAgent for driving many devices from one event loop."""
+
+import asyncio
+import time
+import traceback
+
+from phone_agent.actions.handler import finish
+from phone_agent.adb import Screenshot
+from phone_agent.adb.aio import async_get_current_app, async_get_screenshot
+from phone_agent.agent import PhoneAgent, StepResult
+from phone_agent.model import AsyncModelClient
+
+
+class AsyncPhoneAgent(PhoneAgent):
+    """
+    PhoneAgent whose run loop is a coroutine.
+
+    Screen capture and app lookup use non-blocking adb calls and inference
+    uses `openai.AsyncOpenAI`, so hundreds of agents can share one event loop
+    instead of one OS thread each. Action execution (which includes the
+    post-action delays and any console callbacks) runs in the loop's default
+    executor, which is bounded.
+
+    Example:
+        >>> import asyncio
+        >>> from phone_agent.agent import AgentConfig
+        >>> async def main(device_ids):
+        ...     agents = [
+        ...         AsyncPhoneAgent(agent_config=AgentConfig(device_id=d))
+        ...         for d in device_ids
+        ...     ]
+        ...     return await asyncio.gather(*(a.run("Open WeChat") for a in agents))
+        >>> asyncio.run(main(["emulator-5554", "emulator-5556"]))
+    """
+
+    def _create_model_client(self) -> AsyncModelClient:
+        """Create the async model client used by this agent."""
+        return AsyncModelClient(self.model_config)
+
+    async def run(self, task: str) -> str:
+        """
+        Run the agent to complete a task.
+
+        Args:
+            task: Natural language description of the task.
+
+        Returns:
+            Final message from the agent.
+        """
+        self._context = []
+        self._context_manager.reset()
+        self._step_count = 0
+        self._device_errors = 0
+        self._action_error = None
+
+        try:
+            # First step with user prompt
+            result = await self._execute_step(task, is_first=True)
+
+            if result.finished:
+                return result.message or "Task completed"
+
+            # Continue until finished or max steps reached
+            while self._step_count < self.agent_config.max_steps:
+                result = await self._execute_step(is_first=False)
+
+                if result.finished:
+                    return result.message or "Task completed"
+
+            return "Max steps reached"
+        finally:
+            await asyncio.to_thread(self.restore_keyboard)
+
+    async def step(self, task: str | None = None) -> StepResult:
+        """
+        Execute a single step of the agent.
+
+        Args:
+            task: Task description (only needed for first step).
+
+        Returns:
+            StepResult with step details.
+        """
+        is_first = len(self._context) == 0
+
+        if is_first and not task:
+            raise ValueError("Task is required for the first step")
+
+        return await self._execute_step(task, is_first)
+
+    async def _execute_step(
+        self, user_prompt: str | None = None, is_first: bool = False
+    ) -> StepResult:
+        """Execute a single step of the agent loop."""
+        self._step_count += 1
+        step_start = time.perf_counter()
+
+        # Capture current screen state
+        screenshot, current_app, timings = await self._observe()
+        if screenshot.is_fallback and not screenshot.is_sensitive:
+            self._device_errors += 1
+
+        self._append_observation(screenshot, current_app, user_prompt, is_first)
+
+        # Get model response
+        try:
+            messages = self._context_manager.build(
+                self._context, self._observation_image
+            )
+            self._on_request_start()
+            inference_start = time.perf_counter()
+            response = await self.model_client.request(messages)
+            timings["inference"] = time.perf_counter() - inference_start
+            self._on_response(response)
+        except Exception as e:
+            return self._model_error_result(e)
+
+        parse_start = time.perf_counter()
+        action = self._parse_response_action(response, screenshot)
+        timings["parse"] = time.perf_counter() - parse_start
+
+        # Execute action
+        action_start = time.perf_counter()
+        try:
+            result = await asyncio.to_thread(
+                self.action_handler.execute,
+                action,
+                screenshot.width,
+                screenshot.height,
+            )
+        except Exception as e:
+            self._device_errors += 1
+            if self.agent_config.verbose:
+                traceback.print_exc()
+            result = self.action_handler.execute(
+                finish(message=str(e)), screenshot.width, screenshot.height
+            )
+        timings["action"] = time.perf_counter() - action_start
+        timings["settle"] = self.action_handler.last_settle_time
+        timings["total"] = time.perf_counter() - step_start
+
+        return self._complete_step(action, response, result, timings, screenshot)
+
+    async def _observe(self) -> tuple[Screenshot, str, dict[str, float]]:
+        """Capture the screen and look up the foreground app concurrently."""
+        device_id = self.agent_config.device_id
+        encoding = self.agent_config.screenshot_encoding
+        timings: dict[str, float] = {}
+
+        async def timed(name: str, coro):
+            start = time.perf_counter()
+            try:
+                return await coro
+            finally:
+                timings[name] = time.perf_counter() - start
+
+        observe_start = time.perf_counter()
+        screenshot, current_app = await asyncio.gather(
+            timed(
+                "screenshot",
+                async_get_screenshot(
+                    device_id, raw=encoding.raw_capture, encoding=encoding
+                ),
+            ),
+            timed(
+                "current_app",
+                async_get_current_app(device_id, self.agent_config.current_app_max_age),
+            ),
+        )
+        timings["observe"] = time.perf_counter() - observe_start
+
+        return screenshot, current_app, timings
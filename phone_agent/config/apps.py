@@ -1,5 +1,21 @@
 """App name to package name mapping for supported applications."""
 
+import difflib
+import json
+import os
+import unicodedata
+from collections.abc import Mapping
+from functools import lru_cache
+from types import MappingProxyType
+
+try:
+    import tomllib
+except ImportError:  # Python < 3.11
+    try:
+        import tomli as tomllib
+    except ImportError:
+        tomllib = None
+
 APP_PACKAGES: dict[str, str] = {
     # Social & Messaging
     "微信": "com.tencent.mm",
@@ -187,6 +203,232 @@ APP_PACKAGES: dict[str, str] = {
     "WhatsApp": "com.whatsapp",
 }
 
+# Other names for apps in APP_PACKAGES. Short names are only resolved
+# exactly or through this table, never by fuzzy matching.
+APP_ALIASES: dict[str, str] = {
+    "Weixin": "微信",
+    "Google Play": "GooglePlayStore",
+    "Play Store": "GooglePlayStore",
+    "Files by Google": "FilesbyGoogle",
+    "Google Keep": "GoogleKeep",
+    "Google Fit": "GoogleFit",
+    "Telegram Messenger": "Telegram",
+}
+
+
+def normalize_app_name(name: str) -> str:
+    """
+    Normalize an app name for lookup.
+
+    Applies NFKC (full-width to half-width), case folding, and drops
+    whitespace and punctuation, so "微信 ", "Wechat" and "WeChat" compare equal
+    to their canonical forms.
+
+    Args:
+        name: Raw app name.
+
+    Returns:
+        The normalized name.
+    """
+    folded = unicodedata.normalize("NFKC", name).casefold()
+    return "".join(ch for ch in folded if ch.isalnum())
+
+
+class AppRegistry:
+    """
+    Read-only app catalog with exact, normalized and fuzzy lookups.
+
+    All indexes are built once, so every lookup is a dict access regardless
+    of how many apps are registered. Fuzzy matches are cached.
+
+    Args:
+        packages: Mapping of app name to Android package name.
+        aliases: Optional mapping of extra names to app names in `packages`.
+        fuzzy_cutoff: Minimum similarity (0-1) accepted by fuzzy matching.
+        fuzzy_min_length: Normalized names shorter than this are only
+            resolved exactly or through an alias, since a one-letter
+            difference ("Block" vs "Clock") is a different app.
+
+    Example:
+        >>> registry = AppRegistry({"微信": "com.tencent.mm"}, {"WeChat": "微信"})
+        >>> registry.resolve("wechat ")
+        '微信'
+        >>> registry.get_package("微信")
+        'com.tencent.mm'
+    """
+
+    def __init__(
+        self,
+        packages: Mapping[str, str],
+        aliases: Mapping[str, str] | None = None,
+        fuzzy_cutoff: float = 0.8,
+        fuzzy_min_length: int = 6,
+    ):
+        self.packages: Mapping[str, str] = MappingProxyType(dict(packages))
+        self.aliases: Mapping[str, str] = MappingProxyType(dict(aliases or {}))
+        self.fuzzy_cutoff = fuzzy_cutoff
+        self.fuzzy_min_length = fuzzy_min_length
+
+        # Package name to the first app name that maps to it
+        reverse: dict[str, str] = {}
+        for name, package in self.packages.items():
+            reverse.setdefault(package, name)
+        self._package_to_app: Mapping[str, str] = MappingProxyType(reverse)
+
+        # Normalized app names and aliases to app names; names win over aliases
+        normalized: dict[str, str] = {}
+        for name in self.packages:
+            normalized.setdefault(normalize_app_name(name), name)
+        for alias, name in self.aliases.items():
+            if name not in self.packages:
+                raise ValueError(f"Alias {alias!r} refers to unknown app {name!r}")
+            normalized.setdefault(normalize_app_name(alias), name)
+        normalized.pop("", None)
+        self._normalized: Mapping[str, str] = MappingProxyType(normalized)
+        self._normalized_keys = tuple(normalized)
+
+        self._fuzzy_match = lru_cache(maxsize=1024)(self._fuzzy_match_uncached)
+
+    def __len__(self) -> int:
+        return len(self.packages)
+
+    def __contains__(self, app_name: object) -> bool:
+        return app_name in self.packages
+
+    def get_package(self, app_name: str) -> str | None:
+        """Get the package name for an exact app name."""
+        return self.packages.get(app_name)
+
+    def get_app_name(self, package_name: str) -> str | None:
+        """Get the app name for a package name."""
+        return self._package_to_app.get(package_name)
+
+    def list_apps(self) -> list[str]:
+        """Get all registered app names."""
+        return list(self.packages)
+
+    def resolve(self, name: str) -> str | None:
+        """
+        Resolve a possibly inexact app name to a registered app name.
+
+        Tries, in order: the exact name, a package name, the normalized name
+        or alias, and finally, for names of at least `fuzzy_min_length`
+        characters, the closest normalized name by similarity.
+
+        Args:
+            name: App name as written by the user or the model.
+
+        Returns:
+            The registered app name, or None if nothing is close enough.
+        """
+        if name in self.packages:
+            return name
+        if name in self._package_to_app:
+            return self._package_to_app[name]
+
+        key = normalize_app_name(name)
+        if not key:
+            return None
+        if key in self._normalized:
+            return self._normalized[key]
+        if len(key) < self.fuzzy_min_length:
+            return None
+        return self._fuzzy_match(key)
+
+    def resolve_package(self, name: str) -> str | None:
+        """Resolve a possibly inexact app name to its package name."""
+        app_name = self.resolve(name)
+        return self.packages[app_name] if app_name else None
+
+    def merged(
+        self, packages: Mapping[str, str], aliases: Mapping[str, str] | None = None
+    ) -> "AppRegistry":
+        """Return a new registry with extra apps and aliases added on top."""
+        return AppRegistry(
+            {**self.packages, **packages},
+            {**self.aliases, **(aliases or {})},
+            self.fuzzy_cutoff,
+            self.fuzzy_min_length,
+        )
+
+    @classmethod
+    def from_file(cls, path: str, base: "AppRegistry | None" = None) -> "AppRegistry":
+        """
+        Load apps from a JSON or TOML file.
+
+        The file holds an `apps` table of app name to package name and an
+        optional `aliases` table of extra name to app name. A JSON file may
+        also be a flat object of app name to package name.
+
+        Args:
+            path: Path to a .json or .toml file.
+            base: Registry to extend. If None, the file replaces the catalog.
+
+        Returns:
+            The loaded registry.
+        """
+        if path.endswith(".toml"):
+            if tomllib is None:
+                raise RuntimeError(
+                    "Loading TOML app files requires Python 3.11+ or tomli"
+                )
+            with open(path, "rb") as f:
+                data = tomllib.load(f)
+        else:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+
+        if "apps" in data and isinstance(data["apps"], dict):
+            packages, aliases = data["apps"], data.get("aliases", {})
+        else:
+            packages, aliases = data, {}
+
+        if base is not None:
+            return base.merged(packages, aliases)
+        return cls(packages, aliases)
+
+    def _fuzzy_match_uncached(self, key: str) -> str | None:
+        matches = difflib.get_close_matches(
+            key, self._normalized_keys, n=1, cutoff=self.fuzzy_cutoff
+        )
+        return self._normalized[matches[0]] if matches else None
+
+
+def _load_default_registry() -> AppRegistry:
+    registry = AppRegistry(APP_PACKAGES, APP_ALIASES)
+    apps_file = os.getenv("PHONE_AGENT_APPS_FILE")
+    if apps_file:
+        registry = AppRegistry.from_file(apps_file, base=registry)
+    return registry
+
+
+_registry = _load_default_registry()
+
+
+def get_app_registry() -> AppRegistry:
+    """Get the active app registry."""
+    return _registry
+
+
+def set_app_registry(registry: AppRegistry) -> None:
+    """Replace the active app registry."""
+    global _registry
+    _registry = registry
+
+
+def load_apps_file(path: str) -> AppRegistry:
+    """
+    Add the apps in a JSON or TOML file to the active registry.
+
+    Args:
+        path: Path to a .json or .toml file, see AppRegistry.from_file().
+
+    Returns:
+        The new active registry.
+    """
+    set_app_registry(AppRegistry.from_file(path, base=_registry))
+    return _registry
+
 
 def get_package_name(app_name: str) -> str | None:
     """
@@ -198,7 +440,7 @@ def get_package_name(app_name: str) -> str | None:
     Returns:
         The Android package name, or None if not found.
     """
-    return APP_PACKAGES.get(app_name)
+    return _registry.get_package(app_name)
 
 
 def get_app_name(package_name: str) -> str | None:
@@ -211,10 +453,7 @@ def get_app_name(package_name: str) -> str | None:
     Returns:
         The display name of the app, or None if not found.
     """
-    for name, package in APP_PACKAGES.items():
-        if package == package_name:
-            return name
-    return None
+    return _registry.get_app_name(package_name)
 
 
 def list_supported_apps() -> list[str]:
@@ -224,4 +463,4 @@ def list_supported_apps() -> list[str]:
     Returns:
         List of app names.
     """
-    return list(APP_PACKAGES.keys())
+    return _registry.list_apps()
@@ -17,6 +17,8 @@ class ActionTimingConfig:
     text_clear_delay: float = 1.0  # Delay after clearing text
     text_input_delay: float = 1.0  # Delay after typing text
     keyboard_restore_delay: float = 1.0  # Delay after restoring original keyboard
+    # On-device pause between the commands of an action sequence
+    sequence_step_delay: float = 0.2
 
     def __post_init__(self):
         """Load values from environment variables if present."""
@@ -32,6 +34,9 @@ class ActionTimingConfig:
         self.keyboard_restore_delay = float(
             os.getenv("PHONE_AGENT_KEYBOARD_RESTORE_DELAY", self.keyboard_restore_delay)
         )
+        self.sequence_step_delay = float(
+            os.getenv("PHONE_AGENT_SEQUENCE_STEP_DELAY", self.sequence_step_delay)
+        )
 
 
 @dataclass
@@ -96,6 +101,30 @@ class ConnectionTimingConfig:
         )
 
 
+@dataclass
+class SettleTimingConfig:
+    """Configuration for how long to wait for the UI after an action."""
+
+    # "fixed" sleeps the full configured delay after every action; "adaptive"
+    # polls a framebuffer hash and returns once the screen stops changing,
+    # using the configured delay only as an upper bound
+    mode: str = "fixed"
+    poll_interval: float = 0.1  # Time between framebuffer hashes (seconds)
+    stable_frames: int = 2  # Consecutive identical frames that count as settled
+    min_wait: float = 0.05  # Wait before the first hash (seconds)
+
+    def __post_init__(self):
+        """Load values from environment variables if present."""
+        self.mode = os.getenv("PHONE_AGENT_SETTLE_MODE", self.mode)
+        self.poll_interval = float(
+            os.getenv("PHONE_AGENT_SETTLE_POLL_INTERVAL", self.poll_interval)
+        )
+        self.stable_frames = int(
+            os.getenv("PHONE_AGENT_SETTLE_STABLE_FRAMES", self.stable_frames)
+        )
+        self.min_wait = float(os.getenv("PHONE_AGENT_SETTLE_MIN_WAIT", self.min_wait))
+
+
 @dataclass
 class TimingConfig:
     """Master timing configuration combining all timing settings."""
@@ -103,12 +132,14 @@ class TimingConfig:
     action: ActionTimingConfig
     device: DeviceTimingConfig
     connection: ConnectionTimingConfig
+    settle: SettleTimingConfig
 
     def __init__(self):
         """Initialize all timing configurations."""
         self.action = ActionTimingConfig()
         self.device = DeviceTimingConfig()
         self.connection = ConnectionTimingConfig()
+        self.settle = SettleTimingConfig()
 
 
 # Global timing configuration instance
@@ -130,6 +161,7 @@ def update_timing_config(
     action: ActionTimingConfig | None = None,
     device: DeviceTimingConfig | None = None,
     connection: ConnectionTimingConfig | None = None,
+    settle: SettleTimingConfig | None = None,
 ) -> None:
     """
     Update the global timing configuration.
@@ -138,6 +170,7 @@ def update_timing_config(
         action: New action timing configuration.
         device: New device timing configuration.
         connection: New connection timing configuration.
+        settle: New settle configuration.
 
     Example:
         >>> from phone_agent.config.timing import update_timing_config, ActionTimingConfig
@@ -154,12 +187,15 @@ def update_timing_config(
         TIMING_CONFIG.device = device
     if connection is not None:
         TIMING_CONFIG.connection = connection
+    if settle is not None:
+        TIMING_CONFIG.settle = settle
 
 
 __all__ = [
     "ActionTimingConfig",
     "DeviceTimingConfig",
     "ConnectionTimingConfig",
+    "SettleTimingConfig",
     "TimingConfig",
     "TIMING_CONFIG",
     "get_timing_config",
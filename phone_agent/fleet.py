@@ -0,0 +1,464 @@
+"""Headless multi-device scheduler: a task queue served by a pool of devices."""
+
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from dataclasses import asdict, dataclass, replace
+from typing import Callable, Iterable
+
+from phone_agent.adb import list_devices
+from phone_agent.agent import AgentConfig, PhoneAgent
+from phone_agent.model import ModelConfig
+from phone_agent.model.sink import LoggingSink, NullSink, OutputSink
+
+
+@dataclass
+class FleetConfig:
+    """Configuration for the fleet scheduler."""
+
+    # Concurrent agents; defaults to the number of online devices
+    max_workers: int | None = None
+    max_retries: int = 2  # Extra attempts for a task whose run or device failed
+    device_ids: list[str] | None = None  # Only use these devices
+    lease_timeout: float = 300.0  # Seconds a task waits for a device before failing
+    refresh_interval: float = 5.0  # Re-list devices this often while waiting
+    confirm_sensitive: bool = False  # Answer for sensitive-action confirmations
+    # Agent console output: "logging" (one logger per device) or "null"
+    agent_output: str = "null"
+
+    def __post_init__(self):
+        """Load values from environment variables if present."""
+        workers = os.getenv("PHONE_AGENT_FLEET_WORKERS")
+        if workers:
+            self.max_workers = int(workers)
+        self.max_retries = int(os.getenv("PHONE_AGENT_FLEET_RETRIES", self.max_retries))
+        self.lease_timeout = float(
+            os.getenv("PHONE_AGENT_FLEET_LEASE_TIMEOUT", self.lease_timeout)
+        )
+
+
+@dataclass
+class FleetTask:
+    """A task in the fleet queue."""
+
+    task: str
+    task_id: str
+    device_id: str | None = None  # Run only on this device
+    max_steps: int | None = None  # Overrides AgentConfig.max_steps
+    attempts: int = 0
+
+
+@dataclass
+class FleetResult:
+    """Outcome of a fleet task."""
+
+    task_id: str
+    task: str
+    success: bool
+    message: str
+    device_id: str | None = None
+    attempts: int = 0
+    steps: int = 0
+    elapsed: float = 0.0
+    error: str | None = None
+
+
+def load_tasks(path: str) -> list[FleetTask]:
+    """
+    Load tasks from a JSONL file.
+
+    Each line is either a JSON string (the task) or an object with a "task"
+    key and optional "id", "device_id" and "max_steps". Blank lines and lines
+    starting with "#" are skipped.
+
+    Args:
+        path: Path to the tasks file.
+
+    Returns:
+        List of FleetTask objects.
+
+    Raises:
+        ValueError: If a line is not a valid task or repeats an earlier id.
+    """
+    tasks = []
+    seen: dict[str, int] = {}
+    with open(path, "r", encoding="utf-8") as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"{path}:{line_number}: invalid JSON: {e}") from e
+
+            if isinstance(entry, str):
+                entry = {"task": entry}
+            if not isinstance(entry, dict) or not entry.get("task"):
+                raise ValueError(f"{path}:{line_number}: missing task")
+
+            task_id = str(entry.get("id", f"task-{line_number}"))
+            if task_id in seen:
+                raise ValueError(
+                    f"{path}:{line_number}: duplicate id {task_id!r} "
+                    f"(first used on line {seen[task_id]})"
+                )
+            seen[task_id] = line_number
+
+            tasks.append(
+                FleetTask(
+                    task=entry["task"],
+                    task_id=task_id,
+                    device_id=entry.get("device_id"),
+                    max_steps=entry.get("max_steps"),
+                )
+            )
+    return tasks
+
+
+class DevicePool:
+    """
+    Leases online devices to workers, one task per device at a time.
+
+    Args:
+        device_ids: Only lease these devices. Defaults to all online devices.
+        refresh_interval: Re-list devices this often while a lease waits.
+    """
+
+    def __init__(
+        self, device_ids: list[str] | None = None, refresh_interval: float = 5.0
+    ):
+        self.allowed = set(device_ids) if device_ids else None
+        self.refresh_interval = refresh_interval
+        self._idle: list[str] = []
+        self._busy: set[str] = set()
+        self._condition = threading.Condition()
+        self._last_refresh = 0.0
+
+    def refresh(self) -> list[str]:
+        """
+        Re-list devices: add new online devices and drop offline ones.
+
+        Returns:
+            The online devices.
+        """
+        online = sorted(
+            device.device_id
+            for device in list_devices()
+            if device.status == "device"
+            and (self.allowed is None or device.device_id in self.allowed)
+        )
+        with self._condition:
+            self._last_refresh = time.monotonic()
+            self._idle = [d for d in self._idle if d in online] + [
+                d for d in online if d not in self._idle and d not in self._busy
+            ]
+            self._condition.notify_all()
+        return online
+
+    def is_online(self, device_id: str) -> bool:
+        """Check whether a device is still listed as online."""
+        return any(
+            device.device_id == device_id and device.status == "device"
+            for device in list_devices()
+        )
+
+    def lease(
+        self, device_id: str | None = None, timeout: float | None = None
+    ) -> str | None:
+        """
+        Wait for an idle device and mark it busy.
+
+        Args:
+            device_id: Lease only this device.
+            timeout: Maximum seconds to wait, or None to wait forever.
+
+        Returns:
+            The leased device ID, or None on timeout.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._condition:
+                for index, candidate in enumerate(self._idle):
+                    if device_id is None or candidate == device_id:
+                        del self._idle[index]
+                        self._busy.add(candidate)
+                        return candidate
+
+                now = time.monotonic()
+                if deadline is not None and now >= deadline:
+                    return None
+                wait = self._last_refresh + self.refresh_interval - now
+                if deadline is not None:
+                    wait = min(wait, deadline - now)
+                if wait > 0:
+                    self._condition.wait(wait)
+                    continue
+            self.refresh()
+
+    def release(self, device_id: str, healthy: bool = True) -> None:
+        """
+        Return a device to the pool.
+
+        Args:
+            device_id: The leased device.
+            healthy: False to keep the device out until a refresh lists it again.
+        """
+        with self._condition:
+            self._busy.discard(device_id)
+            if healthy:
+                self._idle.append(device_id)
+            self._condition.notify_all()
+
+
+class FleetRunner:
+    """
+    Runs a queue of tasks across all connected devices.
+
+    Each worker takes a task, leases an idle device, runs that device's
+    PhoneAgent on it and releases the device. A task whose run raises, or
+    whose device went offline during the run, is put back on the queue (and
+    an offline device kept out of the pool) until it has been retried
+    `max_retries` times. Results are appended to a JSONL file as tasks
+    complete.
+
+    Args:
+        model_config: Model configuration shared by all agents.
+        agent_config: Agent configuration; device_id is set per lease.
+        fleet_config: Scheduler configuration.
+        agent_factory: Optional callable (device_id) -> PhoneAgent replacing
+            the default agent construction. Takeover requests are only
+            detected for agents built by the default factory.
+
+    Example:
+        >>> from phone_agent.fleet import FleetRunner, load_tasks
+        >>> runner = FleetRunner(ModelConfig(base_url="http://localhost:8000/v1"))
+        >>> results = runner.run(load_tasks("tasks.jsonl"), "results.jsonl")
+    """
+
+    def __init__(
+        self,
+        model_config: ModelConfig | None = None,
+        agent_config: AgentConfig | None = None,
+        fleet_config: FleetConfig | None = None,
+        agent_factory: Callable[[str], PhoneAgent] | None = None,
+    ):
+        self.model_config = model_config or ModelConfig()
+        self.agent_config = agent_config or AgentConfig()
+        self.fleet_config = fleet_config or FleetConfig()
+        self.agent_factory = agent_factory or self._create_agent
+        self.devices = DevicePool(
+            self.fleet_config.device_ids, self.fleet_config.refresh_interval
+        )
+        self._queue: queue.Queue[FleetTask | None] = queue.Queue()
+        self._results: dict[str, FleetResult] = {}
+        self._lock = threading.Lock()
+        self._results_file = None
+        self._total = 0
+        self._agents: dict[str, PhoneAgent] = {}
+        self._local = threading.local()  # Takeover request of the worker's task
+
+    def run(
+        self, tasks: Iterable[FleetTask], results_path: str | None = None
+    ) -> list[FleetResult]:
+        """
+        Run all tasks and wait for them to finish.
+
+        Args:
+            tasks: Tasks to run.
+            results_path: Optional JSONL file to append results to.
+
+        Returns:
+            Results in the order of the tasks.
+        """
+        tasks = list(tasks)
+        self._total = len(tasks)
+        self._results = {}
+        online = self.devices.refresh()
+        workers = self.fleet_config.max_workers or max(len(online), 1)
+
+        if results_path:
+            self._results_file = open(results_path, "a", encoding="utf-8")
+        try:
+            for task in tasks:
+                self._queue.put(task)
+
+            threads = [
+                threading.Thread(
+                    target=self._worker, name=f"phone-agent-fleet-{index}", daemon=True
+                )
+                for index in range(workers)
+            ]
+            for thread in threads:
+                thread.start()
+
+            self._queue.join()
+            for _ in threads:
+                self._queue.put(None)
+            for thread in threads:
+                thread.join()
+        finally:
+            if self._results_file is not None:
+                self._results_file.close()
+                self._results_file = None
+            for agent in self._agents.values():
+                agent.restore_keyboard()
+
+        return [self._results[task.task_id] for task in tasks]
+
+    def _worker(self) -> None:
+        while True:
+            task = self._queue.get()
+            if task is None:
+                self._queue.task_done()
+                return
+            try:
+                self._run_task(task)
+            finally:
+                self._queue.task_done()
+
+    def _run_task(self, task: FleetTask) -> None:
+        device_id = self.devices.lease(task.device_id, self.fleet_config.lease_timeout)
+        if device_id is None:
+            self._finish(
+                task,
+                FleetResult(
+                    task_id=task.task_id,
+                    task=task.task,
+                    success=False,
+                    message="No device available",
+                    attempts=task.attempts,
+                ),
+            )
+            return
+
+        task.attempts += 1
+        start = time.perf_counter()
+        healthy = True
+        error = None
+        try:
+            success, message, steps, device_errors = self._run_agent(device_id, task)
+            # adb failures do not raise: they end a run as a failure, or as a
+            # "finish" carrying the error, after failed captures or actions
+            if (not success or device_errors) and not self.devices.is_online(device_id):
+                healthy = False
+                error = f"Device went offline: {message}"
+        except Exception as e:
+            healthy = self.devices.is_online(device_id)
+            error = str(e) if healthy else f"Device went offline: {e}"
+        finally:
+            self.devices.release(device_id, healthy)
+
+        if error is not None:
+            with self._lock:
+                self._agents.pop(device_id, None)
+            if task.attempts <= self.fleet_config.max_retries:
+                print(
+                    f"⚠️  {task.task_id} failed on {device_id} "
+                    f"(attempt {task.attempts}): {error}; retrying"
+                )
+                self._queue.put(task)
+                return
+            self._finish(
+                task,
+                FleetResult(
+                    task_id=task.task_id,
+                    task=task.task,
+                    success=False,
+                    message=f"Failed after {task.attempts} attempts",
+                    device_id=device_id,
+                    attempts=task.attempts,
+                    elapsed=time.perf_counter() - start,
+                    error=error,
+                ),
+            )
+            return
+
+        self._finish(
+            task,
+            FleetResult(
+                task_id=task.task_id,
+                task=task.task,
+                success=success,
+                message=message,
+                device_id=device_id,
+                attempts=task.attempts,
+                steps=steps,
+                elapsed=time.perf_counter() - start,
+            ),
+        )
+
+    def _run_agent(self, device_id: str, task: FleetTask) -> tuple[bool, str, int, int]:
+        """
+        Run a task to completion on a leased device.
+
+        Agents are kept per device and reset between tasks, so their model
+        client and worker thread are reused.
+
+        Returns:
+            Tuple of (success, message, steps, device_errors).
+        """
+        with self._lock:
+            agent = self._agents.get(device_id)
+            if agent is None:
+                agent = self.agent_factory(device_id)
+                self._agents[device_id] = agent
+        agent.reset()
+        max_steps = task.max_steps or agent.agent_config.max_steps
+        self._local.takeover = None
+
+        result = agent.step(task.task)
+        while (
+            not result.finished
+            and self._local.takeover is None
+            and agent.step_count < max_steps
+        ):
+            result = agent.step()
+
+        steps, device_errors = agent.step_count, agent.device_errors
+        if self._local.takeover is not None:
+            # Nobody is there to take over; fail instead of waiting
+            message = f"Takeover required: {self._local.takeover}"
+            return False, message, steps, device_errors
+        if not result.finished:
+            return False, "Max steps reached", steps, device_errors
+        message = result.message or "Task completed"
+        return result.success, message, steps, device_errors
+
+    def _finish(self, task: FleetTask, result: FleetResult) -> None:
+        with self._lock:
+            self._results[task.task_id] = result
+            if self._results_file is not None:
+                self._results_file.write(
+                    json.dumps(asdict(result), ensure_ascii=False) + "\n"
+                )
+                self._results_file.flush()
+            done = len(self._results)
+        status = "✓" if result.success else "✗"
+        print(
+            f"[{done}/{self._total}] {status} {task.task_id} "
+            f"on {result.device_id or '-'}: {result.message}"
+        )
+
+    def _create_agent(self, device_id: str) -> PhoneAgent:
+        """Create a headless agent for a device."""
+        return PhoneAgent(
+            model_config=replace(self.model_config, sink=self._create_sink(device_id)),
+            agent_config=replace(self.agent_config, device_id=device_id),
+            confirmation_callback=self._confirm,
+            takeover_callback=self._takeover,
+        )
+
+    def _create_sink(self, device_id: str) -> OutputSink:
+        if self.fleet_config.agent_output == "logging":
+            return LoggingSink(logging.getLogger(f"phone_agent.fleet.{device_id}"))
+        return NullSink()
+
+    def _confirm(self, message: str) -> bool:
+        return self.fleet_config.confirm_sensitive
+
+    def _takeover(self, message: str) -> None:
+        self._local.takeover = message
@@ -0,0 +1,326 @@
+"""Per-step latency metrics with a Prometheus endpoint and a JSONL trace.
+
+Every PhoneAgent step records its phase durations (observe, infer, parse,
+act, settle) into process-wide histograms labelled by device. They can be
+scraped from an optional local HTTP endpoint in the Prometheus text format,
+and each step can also be appended to a JSONL trace file for offline
+analysis.
+"""
+
+import bisect
+import json
+import math
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+
+# Bucket upper bounds in seconds, from fast adb calls to slow inference
+LATENCY_BUCKETS = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+    60.0,
+)
+
+# Bucket upper bounds in bytes for encoded screenshots
+SIZE_BUCKETS = (
+    16_000,
+    32_000,
+    64_000,
+    128_000,
+    256_000,
+    512_000,
+    1_000_000,
+    2_000_000,
+    4_000_000,
+)
+
+
+class Histogram:
+    """
+    A Prometheus-style histogram: cumulative bucket counts, sum and count.
+
+    Args:
+        buckets: Sorted bucket upper bounds.
+    """
+
+    def __init__(self, buckets: tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # Last one is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        """Record one value."""
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class MetricsRegistry:
+    """
+    Thread-safe collection of labelled histograms and counters.
+
+    Example:
+        >>> metrics = MetricsRegistry()
+        >>> metrics.observe("phone_agent_step_phase_seconds", 0.42,
+        ...                 phase="observe", device="emulator-5554")
+        >>> print(metrics.render())
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms: dict[str, dict[tuple, Histogram]] = {}
+        self._counters: dict[str, dict[tuple, float]] = {}
+        self._help: dict[str, str] = {}
+        self._buckets: dict[str, tuple[float, ...]] = {}
+
+    def describe(
+        self, name: str, help_text: str, buckets: tuple[float, ...] | None = None
+    ) -> None:
+        """Set the help text and, for histograms, the buckets of a metric."""
+        with self._lock:
+            self._help[name] = help_text
+            if buckets is not None:
+                self._buckets[name] = buckets
+
+    def observe(self, name: str, value: float, **labels: str) -> None:
+        """Record a value in the histogram `name` with the given labels."""
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = Histogram(self._buckets.get(name, LATENCY_BUCKETS))
+                series[key] = histogram
+            histogram.observe(value)
+
+    def increment(self, name: str, amount: float = 1.0, **labels: str) -> None:
+        """Add to the counter `name` with the given labels."""
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0.0) + amount
+
+    def render(self) -> str:
+        """Render all metrics in the Prometheus text exposition format."""
+        lines = []
+        with self._lock:
+            for name, series in sorted(self._counters.items()):
+                self._render_header(lines, name, "counter")
+                for key, value in sorted(series.items()):
+                    lines.append(f"{name}{_format_labels(key)} {_format_value(value)}")
+
+            for name, series in sorted(self._histograms.items()):
+                self._render_header(lines, name, "histogram")
+                for key, histogram in sorted(series.items()):
+                    cumulative = 0
+                    bounds = [*histogram.buckets, math.inf]
+                    for bound, count in zip(bounds, histogram.counts):
+                        cumulative += count
+                        le = "+Inf" if bound == math.inf else _format_value(bound)
+                        labels = _format_labels(key + (("le", le),))
+                        lines.append(f"{name}_bucket{labels} {cumulative}")
+                    labels = _format_labels(key)
+                    lines.append(f"{name}_sum{labels} {_format_value(histogram.sum)}")
+                    lines.append(f"{name}_count{labels} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+    def _render_header(self, lines: list[str], name: str, kind: str) -> None:
+        if name in self._help:
+            lines.append(f"# HELP {name} {self._help[name]}")
+        lines.append(f"# TYPE {name} {kind}")
+
+
+def _format_labels(key: tuple) -> str:
+    if not key:
+        return ""
+    pairs = []
+    for name, value in key:
+        value = str(value).replace("\\", "\\\\").replace('"', '\\"')
+        pairs.append(f'{name}="{value}"')
+    return "{" + ",".join(pairs) + "}"
+
+
+def _format_value(value: float) -> str:
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class TraceWriter:
+    """
+    Appends one JSON object per line to a trace file.
+
+    Args:
+        path: Trace file path; parent directories are created.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._file = open(path, "a", encoding="utf-8")
+        self._lock = threading.Lock()
+
+    def write(self, record: dict[str, Any]) -> None:
+        """Append a record and flush it."""
+        line = json.dumps(record, ensure_ascii=False, default=str)
+        with self._lock:
+            self._file.write(line + "\n")
+            self._file.flush()
+
+    def close(self) -> None:
+        """Close the trace file."""
+        with self._lock:
+            self._file.close()
+
+
+_metrics = MetricsRegistry()
+_metrics.describe(
+    "phone_agent_step_phase_seconds",
+    "Duration of each phase of an agent step.",
+)
+_metrics.describe(
+    "phone_agent_model_latency_seconds",
+    "Model streaming latency: time to first token, to thinking end, and total.",
+)
+_metrics.describe(
+    "phone_agent_action_seconds",
+    "Action execution time by action type, including the post-action settle.",
+)
+_metrics.describe(
+    "phone_agent_screenshot_bytes",
+    "Size of the encoded screenshot sent to the model.",
+    SIZE_BUCKETS,
+)
+_metrics.describe("phone_agent_steps_total", "Agent steps by outcome.")
+
+_trace: TraceWriter | None = None
+_trace_lock = threading.Lock()
+_server: ThreadingHTTPServer | None = None
+
+
+def get_metrics() -> MetricsRegistry:
+    """Get the process-wide metrics registry."""
+    return _metrics
+
+
+def set_trace_file(path: str | None) -> None:
+    """
+    Start (or stop, with None) writing per-step records to a JSONL file.
+
+    Args:
+        path: Trace file path, or None to stop tracing.
+    """
+    global _trace
+    with _trace_lock:
+        if _trace is not None:
+            _trace.close()
+        _trace = TraceWriter(path) if path else None
+
+
+def write_trace(record: dict[str, Any]) -> None:
+    """Append a record to the trace file, if tracing is enabled."""
+    trace = _trace
+    if trace is not None:
+        trace.write(record)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?", 1)[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = _metrics.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_metrics_server(port: int, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+    """
+    Serve the metrics at http://host:port/metrics from a daemon thread.
+
+    Args:
+        port: Port to listen on.
+        host: Address to bind; defaults to localhost only.
+
+    Returns:
+        The running server.
+    """
+    global _server
+    if _server is None:
+        _server = ThreadingHTTPServer((host, port), _MetricsHandler)
+        _server.daemon_threads = True
+        threading.Thread(target=_server.serve_forever, daemon=True).start()
+    return _server
+
+
+def record_step(
+    device_id: str | None,
+    step: int,
+    timings: dict[str, float],
+    model_timings: dict[str, float | None] | None = None,
+    screenshot_bytes: int | None = None,
+    action: dict[str, Any] | None = None,
+    success: bool = True,
+) -> None:
+    """
+    Record one agent step in the histograms and the trace file.
+
+    Args:
+        device_id: Device the step ran on.
+        step: Step number within the task.
+        timings: Phase durations in seconds, as in StepResult.timings.
+        model_timings: Optional ttft / thinking_end / total model latencies.
+        screenshot_bytes: Size of the encoded screenshot sent to the model.
+        action: The executed action.
+        success: Whether the action succeeded.
+    """
+    device = device_id or "default"
+    for phase, seconds in timings.items():
+        _metrics.observe(
+            "phone_agent_step_phase_seconds", seconds, phase=phase, device=device
+        )
+    for stage, seconds in (model_timings or {}).items():
+        if seconds is not None:
+            _metrics.observe(
+                "phone_agent_model_latency_seconds", seconds, stage=stage, device=device
+            )
+    if screenshot_bytes is not None:
+        _metrics.observe(
+            "phone_agent_screenshot_bytes", screenshot_bytes, device=device
+        )
+    _metrics.increment(
+        "phone_agent_steps_total",
+        device=device,
+        status="success" if success else "failure",
+    )
+
+    write_trace(
+        {
+            "time": time.time(),
+            "device": device,
+            "step": step,
+            "timings": {name: round(value, 6) for name, value in timings.items()},
+            "model": model_timings or {},
+            "screenshot_bytes": screenshot_bytes,
+            "action": action,
+            "success": success,
+        }
+    )
@@ -1,5 +1,41 @@
 """Model client module for AI inference."""
 
-from phone_agent.model.client import ModelClient, ModelConfig
+from phone_agent.model.batcher import BatchConfig, RequestBatcher, get_batcher
+from phone_agent.model.client import AsyncModelClient, ModelClient, ModelConfig
+from phone_agent.model.context import ContextConfig, ContextManager, ContextStats
+from phone_agent.model.pool import (
+    HttpPoolConfig,
+    configure_http_pool,
+    get_async_openai_client,
+    get_openai_client,
+)
+from phone_agent.model.sink import (
+    AsyncQueueSink,
+    CallbackSink,
+    LoggingSink,
+    NullSink,
+    OutputSink,
+    StdoutSink,
+)
 
-__all__ = ["ModelClient", "ModelConfig"]
+__all__ = [
+    "AsyncModelClient",
+    "ModelClient",
+    "ModelConfig",
+    "ContextConfig",
+    "ContextManager",
+    "ContextStats",
+    "OutputSink",
+    "NullSink",
+    "StdoutSink",
+    "LoggingSink",
+    "CallbackSink",
+    "AsyncQueueSink",
+    "BatchConfig",
+    "RequestBatcher",
+    "get_batcher",
+    "HttpPoolConfig",
+    "configure_http_pool",
+    "get_openai_client",
+    "get_async_openai_client",
+]
@@ -0,0 +1,294 @@
+"""Shared inference request batcher for many concurrent agents."""
+
+import asyncio
+import os
+import queue
+import threading
+from dataclasses import dataclass, field, replace
+from typing import Any
+
+from openai import AsyncOpenAI
+
+from phone_agent.model.pool import (
+    create_http_client,
+    get_http_pool_config,
+    http2_available,
+)
+
+# Marks the end of a demultiplexed stream
+_END = object()
+
+
+@dataclass
+class BatchConfig:
+    """Configuration for the request batcher."""
+
+    # After the first request of a batch arrives, wait this long (seconds)
+    # for more before sending them all at once
+    window: float = 0.01
+    max_batch_size: int = 32  # Send the batch early once this many are waiting
+    max_in_flight: int = 256  # Concurrent streams
+    # Multiplex the streams over HTTP/2; on when httpx[http2] is installed
+    http2: bool = field(default_factory=http2_available)
+
+    def __post_init__(self):
+        """Load values from environment variables if present."""
+        self.window = float(os.getenv("PHONE_AGENT_BATCH_WINDOW", self.window))
+        self.max_batch_size = int(
+            os.getenv("PHONE_AGENT_BATCH_SIZE", self.max_batch_size)
+        )
+        self.max_in_flight = int(
+            os.getenv("PHONE_AGENT_BATCH_MAX_IN_FLIGHT", self.max_in_flight)
+        )
+        http2 = os.getenv("PHONE_AGENT_BATCH_HTTP2")
+        if http2 is not None:
+            self.http2 = http2.lower() in ("1", "true", "yes")
+
+
+@dataclass
+class BatchStats:
+    """Counters of a batcher since it was created."""
+
+    requests: int = 0
+    batches: int = 0
+    largest_batch: int = 0
+
+    @property
+    def mean_batch_size(self) -> float:
+        """Average number of requests per batch."""
+        return self.requests / self.batches if self.batches else 0.0
+
+
+class _BatchedRequest:
+    """A request waiting in, or streaming from, the batcher."""
+
+    def __init__(self, kwargs: dict[str, Any], deliver):
+        self.kwargs = kwargs
+        self.deliver = deliver
+        self.cancelled = threading.Event()
+
+
+class BatchedStream:
+    """
+    Chunks of one batched request, iterated from the calling thread.
+
+    Behaves like the stream returned by `OpenAI.chat.completions.create`:
+    iterate it for ChatCompletionChunk objects and `close()` it to cancel the
+    rest of the generation.
+    """
+
+    def __init__(self):
+        self._queue: queue.Queue = queue.Queue()
+        self._request: _BatchedRequest | None = None
+        self._closed = False
+
+    def _put(self, item: Any) -> None:
+        self._queue.put(item)
+
+    def __iter__(self):
+        while not self._closed:
+            item = self._queue.get()
+            if item is _END:
+                return
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+
+    def close(self) -> None:
+        """Stop the stream; the batcher closes the upstream response."""
+        self._closed = True
+        self._request.cancelled.set()
+
+
+class AsyncBatchedStream:
+    """
+    Chunks of one batched request, iterated from the caller's event loop.
+
+    Behaves like the stream returned by `AsyncOpenAI.chat.completions.create`.
+
+    Args:
+        loop: Event loop of the consumer.
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self._loop = loop
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._request: _BatchedRequest | None = None
+        self._closed = False
+
+    def _put(self, item: Any) -> None:
+        self._loop.call_soon_threadsafe(self._queue.put_nowait, item)
+
+    async def __aiter__(self):
+        while not self._closed:
+            item = await self._queue.get()
+            if item is _END:
+                return
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+
+    async def close(self) -> None:
+        """Stop the stream; the batcher closes the upstream response."""
+        self._closed = True
+        self._request.cancelled.set()
+
+
+class RequestBatcher:
+    """
+    Coalesces streaming chat requests from many agents (experimental).
+
+    OpenAI-compatible servers take one conversation per request, so batching
+    happens on the server (continuous batching in vLLM / SGLang). Requests
+    that arrive within `window` of each other are held and then sent
+    together, so they are admitted to the server's running batch at the same
+    time instead of each one interrupting decoding with its own prefill. All
+    requests go through one shared connection pool on a background event
+    loop, and each response's chunks are handed back to the agent that sent
+    the request.
+
+    Batching is off by default (ModelConfig.batching). Against a simulated
+    continuous-batching server (scripts/benchmark_batcher.py) it showed no
+    throughput gain at 8, 32 or 128 agents, while the window adds up to
+    `window` seconds of latency to every request.
+
+    Args:
+        base_url: Model API base URL.
+        api_key: API key.
+        config: Batching configuration.
+
+    Example:
+        >>> batcher = get_batcher("http://localhost:8000/v1", "EMPTY")
+        >>> stream = batcher.submit({"model": "autoglm-phone-9b",
+        ...                          "messages": messages, "stream": True})
+        >>> for chunk in stream:
+        ...     print(chunk.choices[0].delta.content, end="")
+    """
+
+    def __init__(self, base_url: str, api_key: str, config: BatchConfig | None = None):
+        self.base_url = base_url
+        self.api_key = api_key
+        self.config = config or BatchConfig()
+        self.stats = BatchStats()
+        self._pending: list[_BatchedRequest] = []
+        self._flush_handle: asyncio.TimerHandle | None = None
+
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(
+            target=self._loop.run_forever, name="phone-agent-batcher", daemon=True
+        )
+        self._thread.start()
+        asyncio.run_coroutine_threadsafe(self._setup(), self._loop).result()
+
+    async def _setup(self) -> None:
+        pool = get_http_pool_config()
+        if self.config.http2:
+            pool = replace(pool, http2=True)
+        self.client = AsyncOpenAI(
+            base_url=self.base_url,
+            api_key=self.api_key,
+            http_client=create_http_client(pool, asynchronous=True),
+        )
+        self._semaphore = asyncio.Semaphore(self.config.max_in_flight)
+
+    def submit(self, kwargs: dict[str, Any]) -> BatchedStream:
+        """
+        Queue a streaming chat completion request from any thread.
+
+        Args:
+            kwargs: Arguments for `chat.completions.create`; must stream.
+
+        Returns:
+            A BatchedStream of the response chunks.
+        """
+        stream = BatchedStream()
+        self._enqueue(kwargs, stream)
+        return stream
+
+    def asubmit(self, kwargs: dict[str, Any]) -> AsyncBatchedStream:
+        """
+        Queue a streaming chat completion request from a running event loop.
+
+        Args:
+            kwargs: Arguments for `chat.completions.create`; must stream.
+
+        Returns:
+            An AsyncBatchedStream of the response chunks.
+        """
+        stream = AsyncBatchedStream(asyncio.get_running_loop())
+        self._enqueue(kwargs, stream)
+        return stream
+
+    def _enqueue(self, kwargs: dict[str, Any], stream) -> None:
+        request = _BatchedRequest(kwargs, stream._put)
+        stream._request = request
+        self._loop.call_soon_threadsafe(self._add, request)
+
+    def _add(self, request: _BatchedRequest) -> None:
+        self._pending.append(request)
+        if len(self._pending) >= self.config.max_batch_size:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = self._loop.call_later(self.config.window, self._flush)
+
+    def _flush(self) -> None:
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+
+        self.stats.requests += len(batch)
+        self.stats.batches += 1
+        self.stats.largest_batch = max(self.stats.largest_batch, len(batch))
+        for request in batch:
+            self._loop.create_task(self._send(request))
+
+    async def _send(self, request: _BatchedRequest) -> None:
+        try:
+            async with self._semaphore:
+                if request.cancelled.is_set():
+                    return
+                stream = await self.client.chat.completions.create(**request.kwargs)
+                try:
+                    async for chunk in stream:
+                        if request.cancelled.is_set():
+                            break
+                        request.deliver(chunk)
+                finally:
+                    await stream.close()
+        except Exception as e:
+            request.deliver(e)
+        finally:
+            request.deliver(_END)
+
+    def close(self) -> None:
+        """Close the connection pool and stop the background loop."""
+        asyncio.run_coroutine_threadsafe(self.client.close(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+
+
+_batchers: dict[tuple[str, str], RequestBatcher] = {}
+_batchers_lock = threading.Lock()
+
+
+def get_batcher(base_url: str, api_key: str) -> RequestBatcher:
+    """
+    Get the process-wide batcher for an endpoint, creating it on first use.
+
+    Args:
+        base_url: Model API base URL.
+        api_key: API key.
+
+    Returns:
+        The shared RequestBatcher.
+    """
+    key = (base_url, api_key)
+    with _batchers_lock:
+        batcher = _batchers.get(key)
+        if batcher is None:
+            batcher = RequestBatcher(base_url, api_key)
+            _batchers[key] = batcher
+        return batcher
@@ -5,9 +5,11 @@ import time
 from dataclasses import dataclass, field
 from typing import Any
 
-from openai import OpenAI
-
 from phone_agent.config.i18n import get_message
+from phone_agent.model.batcher import get_batcher
+from phone_agent.model.pool import get_async_openai_client, get_openai_client
+from phone_agent.model.sink import OutputSink, create_sink
+from phone_agent.model.stream import StreamState
 
 
 @dataclass
@@ -23,6 +25,15 @@ class ModelConfig:
     frequency_penalty: float = 0.2
     extra_body: dict[str, Any] = field(default_factory=dict)
     lang: str = "cn"  # Language for UI messages: 'cn' or 'en'
+    # Stop reading the stream as soon as the do(...)/finish(...) call is
+    # complete instead of waiting for the trailing tokens
+    stop_on_action: bool = True
+    # Where thinking and metrics go: "stdout", "null", "logging", or an
+    # OutputSink instance (e.g. a CallbackSink feeding a GUI)
+    sink: str | OutputSink = "stdout"
+    # Experimental: send requests through the process-wide RequestBatcher
+    # for this endpoint, which coalesces requests from concurrent agents
+    batching: bool = False
 
 
 @dataclass
@@ -48,7 +59,14 @@ class ModelClient:
 
     def __init__(self, config: ModelConfig | None = None):
         self.config = config or ModelConfig()
-        self.client = OpenAI(base_url=self.config.base_url, api_key=self.config.api_key)
+        # Shared with every other client for this endpoint in the process
+        self.client = get_openai_client(self.config.base_url, self.config.api_key)
+        self.sink = create_sink(self.config.sink)
+        self.batcher = (
+            get_batcher(self.config.base_url, self.config.api_key)
+            if self.config.batching
+            else None
+        )
 
     def request(self, messages: list[dict[str, Any]]) -> ModelResponse:
         """
@@ -65,10 +83,29 @@ class ModelClient:
         """
         # Start timing
         start_time = time.time()
-        time_to_first_token = None
-        time_to_thinking_end = None
 
-        stream = self.client.chat.completions.create(
+        kwargs = self._request_kwargs(messages)
+        if self.batcher is not None:
+            stream = self.batcher.submit(kwargs)
+        else:
+            stream = self.client.chat.completions.create(**kwargs)
+
+        state = StreamState(start_time, self.config.stop_on_action, self.sink)
+        for chunk in stream:
+            if len(chunk.choices) == 0:
+                continue
+            if chunk.choices[0].delta.content is not None:
+                state.feed(chunk.choices[0].delta.content)
+            if state.action_complete:
+                # Closing the connection cancels the rest of the generation
+                stream.close()
+                break
+
+        return self._build_response(state, start_time)
+
+    def _request_kwargs(self, messages: list[dict[str, Any]]) -> dict[str, Any]:
+        """Build the chat completion request arguments."""
+        return dict(
             messages=messages,
             model=self.config.model_name,
             max_tokens=self.config.max_tokens,
@@ -79,90 +116,36 @@ class ModelClient:
             stream=True,
         )
 
-        raw_content = ""
-        buffer = ""  # Buffer to hold content that might be part of a marker
-        action_markers = ["finish(message=", "do(action="]
-        in_action_phase = False  # Track if we've entered the action phase
-        first_token_received = False
-
-        for chunk in stream:
-            if len(chunk.choices) == 0:
-                continue
-            if chunk.choices[0].delta.content is not None:
-                content = chunk.choices[0].delta.content
-                raw_content += content
-
-                # Record time to first token
-                if not first_token_received:
-                    time_to_first_token = time.time() - start_time
-                    first_token_received = True
-
-                if in_action_phase:
-                    # Already in action phase, just accumulate content without printing
-                    continue
-
-                buffer += content
-
-                # Check if any marker is fully present in buffer
-                marker_found = False
-                for marker in action_markers:
-                    if marker in buffer:
-                        # Marker found, print everything before it
-                        thinking_part = buffer.split(marker, 1)[0]
-                        print(thinking_part, end="", flush=True)
-                        print()  # Print newline after thinking is complete
-                        in_action_phase = True
-                        marker_found = True
-
-                        # Record time to thinking end
-                        if time_to_thinking_end is None:
-                            time_to_thinking_end = time.time() - start_time
-
-                        break
-
-                if marker_found:
-                    continue  # Continue to collect remaining content
-
-                # Check if buffer ends with a prefix of any marker
-                # If so, don't print yet (wait for more content)
-                is_potential_marker = False
-                for marker in action_markers:
-                    for i in range(1, len(marker)):
-                        if buffer.endswith(marker[:i]):
-                            is_potential_marker = True
-                            break
-                    if is_potential_marker:
-                        break
-
-                if not is_potential_marker:
-                    # Safe to print the buffer
-                    print(buffer, end="", flush=True)
-                    buffer = ""
-
+    def _build_response(self, state: StreamState, start_time: float) -> ModelResponse:
+        """Parse the streamed content and print performance metrics."""
         # Calculate total time
         total_time = time.time() - start_time
+        raw_content = state.raw_content
+        time_to_first_token = state.time_to_first_token
+        time_to_thinking_end = state.time_to_thinking_end
 
         # Parse thinking and action from response
         thinking, action = self._parse_response(raw_content)
 
         # Print performance metrics
         lang = self.config.lang
-        print()
-        print("=" * 50)
-        print(f"⏱️  {get_message('performance_metrics', lang)}:")
-        print("-" * 50)
+        sink = self.sink
+        sink.write()
+        sink.write("=" * 50)
+        sink.write(f"⏱️  {get_message('performance_metrics', lang)}:")
+        sink.write("-" * 50)
         if time_to_first_token is not None:
-            print(
+            sink.write(
                 f"{get_message('time_to_first_token', lang)}: {time_to_first_token:.3f}s"
             )
         if time_to_thinking_end is not None:
-            print(
+            sink.write(
                 f"{get_message('time_to_thinking_end', lang)}:        {time_to_thinking_end:.3f}s"
             )
-        print(
+        sink.write(
             f"{get_message('total_inference_time', lang)}:          {total_time:.3f}s"
         )
-        print("=" * 50)
+        sink.write("=" * 50)
 
         return ModelResponse(
             thinking=thinking,
@@ -216,6 +199,56 @@ class ModelClient:
         return "", content
 
 
+class AsyncModelClient(ModelClient):
+    """
+    asyncio variant of ModelClient built on `openai.AsyncOpenAI`.
+
+    Args:
+        config: Model configuration.
+    """
+
+    def __init__(self, config: ModelConfig | None = None):
+        self.config = config or ModelConfig()
+        self.sink = create_sink(self.config.sink)
+        self.batcher = (
+            get_batcher(self.config.base_url, self.config.api_key)
+            if self.config.batching
+            else None
+        )
+
+    async def request(self, messages: list[dict[str, Any]]) -> ModelResponse:
+        """
+        Send a request to the model without blocking the event loop.
+
+        Args:
+            messages: List of message dictionaries in OpenAI format.
+
+        Returns:
+            ModelResponse containing thinking and action.
+        """
+        start_time = time.time()
+
+        kwargs = self._request_kwargs(messages)
+        if self.batcher is not None:
+            stream = self.batcher.asubmit(kwargs)
+        else:
+            # The shared client is per event loop, so look it up on each call
+            client = get_async_openai_client(self.config.base_url, self.config.api_key)
+            stream = await client.chat.completions.create(**kwargs)
+
+        state = StreamState(start_time, self.config.stop_on_action, self.sink)
+        async for chunk in stream:
+            if len(chunk.choices) == 0:
+                continue
+            if chunk.choices[0].delta.content is not None:
+                state.feed(chunk.choices[0].delta.content)
+            if state.action_complete:
+                await stream.close()
+                break
+
+        return self._build_response(state, start_time)
+
+
 class MessageBuilder:
     """Helper class for building conversation messages."""
 
@@ -226,7 +259,7 @@ class MessageBuilder:
 
     @staticmethod
     def create_user_message(
-        text: str, image_base64: str | None = None
+        text: str, image_base64: str | None = None, mime_type: str = "image/png"
     ) -> dict[str, Any]:
         """
         Create a user message with optional image.
@@ -234,6 +267,7 @@ class MessageBuilder:
         Args:
             text: Text content.
             image_base64: Optional base64-encoded image.
+            mime_type: MIME type of the encoded image.
 
         Returns:
             Message dictionary.
@@ -241,17 +275,31 @@ class MessageBuilder:
         content = []
 
         if image_base64:
-            content.append(
-                {
-                    "type": "image_url",
-                    "image_url": {"url": f"data:image/png;base64,{image_base64}"},
-                }
-            )
+            content.append(MessageBuilder.create_image_content(image_base64, mime_type))
 
         content.append({"type": "text", "text": text})
 
         return {"role": "user", "content": content}
 
+    @staticmethod
+    def create_image_content(
+        image_base64: str, mime_type: str = "image/png"
+    ) -> dict[str, Any]:
+        """
+        Create an image content item for a user message.
+
+        Args:
+            image_base64: Base64-encoded image.
+            mime_type: MIME type of the encoded image.
+
+        Returns:
+            Content item dictionary.
+        """
+        return {
+            "type": "image_url",
+            "image_url": {"url": f"data:{mime_type};base64,{image_base64}"},
+        }
+
     @staticmethod
     def create_assistant_message(content: str) -> dict[str, Any]:
         """Create an assistant message."""
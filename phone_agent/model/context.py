@@ -0,0 +1,267 @@
+"""Compaction of the conversation history sent to the model each step."""
+
+import os
+import re
+from dataclasses import dataclass
+from typing import Any
+
+_THINK_PATTERN = re.compile(r"<think>(.*?)</think>", re.DOTALL)
+_CJK_PATTERN = re.compile("[\u2e80-\u9fff\uac00-\ud7af\uf900-\ufaff\uff00-\uffef]")
+
+SCREEN_INFO_HEADER = "** Screen Info **"
+
+
+@dataclass
+class ContextConfig:
+    """Configuration for how much history is resent to the model."""
+
+    # Estimated prompt tokens to stay under; None disables the budget
+    token_budget: int | None = None
+    # Most recent completed turns resent verbatim; older turns are compacted.
+    # 0 keeps every turn verbatim.
+    keep_turns: int = 0
+    # Characters of <think> kept in compacted assistant turns
+    max_thinking_chars: int = 200
+    # Estimated tokens per image (only the current screenshot is ever sent)
+    image_tokens: int = 1200
+    # Never rewrite a message once it has been sent, so each request starts
+    # with the previous one and server-side prefix caching (vLLM, SGLang) can
+    # reuse its KV cache. The screenshot is appended after the text of the
+    # current turn and left out of the stored history. keep_turns is ignored;
+    # a token budget drops old turns in large batches so the prefix only
+    # breaks when a batch is dropped.
+    append_only: bool = False
+
+    def __post_init__(self):
+        """Load values from environment variables if present."""
+        token_budget = os.getenv("PHONE_AGENT_CONTEXT_TOKEN_BUDGET")
+        if token_budget:
+            self.token_budget = int(token_budget)
+        self.keep_turns = int(
+            os.getenv("PHONE_AGENT_CONTEXT_KEEP_TURNS", self.keep_turns)
+        )
+        self.max_thinking_chars = int(
+            os.getenv("PHONE_AGENT_CONTEXT_THINKING_CHARS", self.max_thinking_chars)
+        )
+        self.image_tokens = int(
+            os.getenv("PHONE_AGENT_CONTEXT_IMAGE_TOKENS", self.image_tokens)
+        )
+        append_only = os.getenv("PHONE_AGENT_CONTEXT_APPEND_ONLY")
+        if append_only:
+            self.append_only = append_only.lower() in ("1", "true", "yes")
+
+    @property
+    def enabled(self) -> bool:
+        """Whether any compaction is configured."""
+        return self.token_budget is not None or (
+            self.keep_turns > 0 and not self.append_only
+        )
+
+
+@dataclass
+class ContextStats:
+    """Estimated size of one model request."""
+
+    full_tokens: int  # Estimated tokens of the uncompacted history
+    sent_tokens: int  # Estimated tokens actually sent
+    full_messages: int
+    sent_messages: int
+
+
+def estimate_text_tokens(text: str) -> int:
+    """
+    Roughly estimate the token count of a string without a tokenizer.
+
+    CJK characters are counted as one token each, other text as one token
+    per four characters, which is close enough for budgeting.
+
+    Args:
+        text: Text to measure.
+
+    Returns:
+        Estimated token count.
+    """
+    cjk = len(_CJK_PATTERN.findall(text))
+    return cjk + (len(text) - cjk + 3) // 4
+
+
+def estimate_tokens(messages: list[dict[str, Any]], image_tokens: int = 1200) -> int:
+    """
+    Roughly estimate the prompt tokens of a message list.
+
+    Args:
+        messages: Messages in OpenAI format.
+        image_tokens: Tokens counted per image.
+
+    Returns:
+        Estimated token count.
+    """
+    total = 0
+    for message in messages:
+        total += 4  # Role and separator tokens
+        content = message.get("content")
+        if isinstance(content, str):
+            total += estimate_text_tokens(content)
+            continue
+        for item in content or []:
+            if item.get("type") == "text":
+                total += estimate_text_tokens(item["text"])
+            else:
+                total += image_tokens
+    return total
+
+
+class ContextManager:
+    """
+    Builds the messages to send from the agent's full history.
+
+    The history itself is never modified. Turns older than `keep_turns` are
+    compacted: assistant thinking is truncated and the stale screen info in
+    user turns is dropped (the task text is always kept). If a token budget
+    is set and the compacted history still exceeds it, the oldest turns are
+    dropped until it fits. In append-only mode nothing is compacted and old
+    turns are only ever dropped in large batches.
+
+    Args:
+        config: Context configuration.
+
+    Example:
+        >>> manager = ContextManager(ContextConfig(keep_turns=2, token_budget=8000))
+        >>> messages = manager.build(agent.context)
+        >>> manager.last_stats.sent_tokens
+        2310
+    """
+
+    def __init__(self, config: ContextConfig | None = None):
+        self.config = config or ContextConfig()
+        self.last_stats: ContextStats | None = None
+        # Append-only mode: messages dropped after the task turn and its reply
+        self._dropped = 0
+
+    def reset(self) -> None:
+        """Forget per-task state before starting a new task."""
+        self.last_stats = None
+        self._dropped = 0
+
+    def build(
+        self, context: list[dict[str, Any]], image: dict[str, Any] | None = None
+    ) -> list[dict[str, Any]]:
+        """
+        Build the messages for the next request.
+
+        Args:
+            context: Full history: system message, task turn, then
+                alternating assistant and user turns ending with a user turn.
+            image: Optional image content item appended to the last user
+                turn (see MessageBuilder.create_image_content).
+
+        Returns:
+            The messages to send. Unchanged messages are shared with
+            `context`, compacted ones are copies.
+        """
+        config = self.config
+        extra_tokens = config.image_tokens if image is not None else 0
+        full_tokens = estimate_tokens(context, config.image_tokens) + extra_tokens
+
+        if config.append_only:
+            messages = self._build_append_only(context, extra_tokens)
+        else:
+            messages = self._build_compacted(context)
+
+        if image is not None:
+            last = messages[-1]
+            messages[-1] = {**last, "content": [*last["content"], image]}
+
+        self.last_stats = ContextStats(
+            full_tokens=full_tokens,
+            sent_tokens=(
+                estimate_tokens(messages, config.image_tokens)
+                if config.enabled
+                else full_tokens
+            ),
+            full_messages=len(context),
+            sent_messages=len(messages),
+        )
+        return messages
+
+    def _build_compacted(self, context: list[dict[str, Any]]) -> list[dict[str, Any]]:
+        config = self.config
+        messages = list(context)
+        if not config.enabled or len(messages) <= 3:
+            return messages
+
+        # Index of the first message kept verbatim: the current user turn
+        # plus keep_turns (user, assistant) pairs before it
+        if config.keep_turns > 0:
+            recent_start = max(2, len(messages) - 1 - 2 * config.keep_turns)
+        else:
+            recent_start = 2
+        for index in range(1, recent_start):
+            messages[index] = self._compact(messages[index], is_task=index == 1)
+
+        if config.token_budget is not None:
+            # Drop the oldest (user, assistant) pairs after the task turn
+            # and its reply, keeping the role alternation intact
+            while (
+                len(messages) > 4
+                and estimate_tokens(messages, config.image_tokens) > config.token_budget
+            ):
+                del messages[3:5]
+        return messages
+
+    def _build_append_only(
+        self, context: list[dict[str, Any]], extra_tokens: int
+    ) -> list[dict[str, Any]]:
+        config = self.config
+        if 3 + self._dropped > len(context) - 1:
+            self._dropped = 0
+        messages = context[:3] + context[3 + self._dropped :]
+        if config.token_budget is None:
+            return messages
+
+        # Drop half of the remaining old pairs at a time, so consecutive
+        # requests share the same cut and the prefix stays cacheable
+        while (
+            estimate_tokens(messages, config.image_tokens) + extra_tokens
+            > config.token_budget
+        ):
+            pairs = (len(messages) - 4) // 2
+            if pairs <= 0:
+                break
+            self._dropped += 2 * max(1, pairs // 2)
+            messages = context[:3] + context[3 + self._dropped :]
+        return messages
+
+    def _compact(self, message: dict[str, Any], is_task: bool) -> dict[str, Any]:
+        if message.get("role") == "assistant":
+            return {**message, "content": self._truncate_thinking(message["content"])}
+        if message.get("role") == "user":
+            # Stale screenshots are dropped along with the screen info
+            content = [
+                {**item, "text": _strip_screen_info(item["text"], is_task)}
+                for item in message["content"]
+                if item.get("type") == "text"
+            ]
+            return {**message, "content": content}
+        return message
+
+    def _truncate_thinking(self, content: str) -> str:
+        limit = self.config.max_thinking_chars
+
+        def truncate(match: re.Match) -> str:
+            thinking = match.group(1).strip()
+            if len(thinking) > limit:
+                thinking = thinking[:limit].rstrip() + "…"
+            return f"<think>{thinking}</think>"
+
+        return _THINK_PATTERN.sub(truncate, content, count=1)
+
+
+def _strip_screen_info(text: str, is_task: bool) -> str:
+    """Drop the screen info JSON that ends a user turn."""
+    head, sep, tail = text.rpartition("\n\n")
+    if not sep or not tail.startswith("{"):
+        return text
+    if is_task:
+        return head
+    return SCREEN_INFO_HEADER
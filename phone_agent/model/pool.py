@@ -0,0 +1,191 @@
+"""Process-wide OpenAI clients sharing pooled, kept-alive HTTP connections."""
+
+import asyncio
+import os
+import threading
+import weakref
+from dataclasses import dataclass
+
+import httpx
+from openai import AsyncOpenAI, OpenAI
+
+
+@dataclass
+class HttpPoolConfig:
+    """Configuration for the shared HTTP connection pool."""
+
+    max_connections: int = 256
+    max_keepalive_connections: int = 64
+    # Agents send a request every few seconds, so keep idle connections
+    # longer than httpx's 5 second default to avoid a new handshake per step
+    keepalive_expiry: float = 60.0
+    connect_timeout: float = 10.0
+    read_timeout: float = 600.0  # Between streamed chunks
+    http2: bool = False  # Needs httpx[http2]
+
+    def __post_init__(self):
+        """Load values from environment variables if present."""
+        self.max_connections = int(
+            os.getenv("PHONE_AGENT_HTTP_MAX_CONNECTIONS", self.max_connections)
+        )
+        self.max_keepalive_connections = int(
+            os.getenv("PHONE_AGENT_HTTP_MAX_KEEPALIVE", self.max_keepalive_connections)
+        )
+        self.keepalive_expiry = float(
+            os.getenv("PHONE_AGENT_HTTP_KEEPALIVE_EXPIRY", self.keepalive_expiry)
+        )
+        self.connect_timeout = float(
+            os.getenv("PHONE_AGENT_HTTP_CONNECT_TIMEOUT", self.connect_timeout)
+        )
+        self.read_timeout = float(
+            os.getenv("PHONE_AGENT_HTTP_READ_TIMEOUT", self.read_timeout)
+        )
+        http2 = os.getenv("PHONE_AGENT_HTTP2")
+        if http2 is not None:
+            self.http2 = http2.lower() in ("1", "true", "yes")
+
+    @property
+    def limits(self) -> httpx.Limits:
+        """The pool limits as httpx.Limits."""
+        return httpx.Limits(
+            max_connections=self.max_connections,
+            max_keepalive_connections=self.max_keepalive_connections,
+            keepalive_expiry=self.keepalive_expiry,
+        )
+
+    @property
+    def timeout(self) -> httpx.Timeout:
+        """The timeouts as httpx.Timeout."""
+        return httpx.Timeout(self.read_timeout, connect=self.connect_timeout, pool=None)
+
+
+def http2_available() -> bool:
+    """Check whether httpx can speak HTTP/2 (the h2 package is installed)."""
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def create_http_client(
+    config: HttpPoolConfig, asynchronous: bool = False
+) -> httpx.Client | httpx.AsyncClient:
+    """
+    Create an httpx client with the pool limits and timeouts of a config.
+
+    Falls back to HTTP/1.1 with a warning if HTTP/2 is requested but
+    httpx[http2] is not installed.
+
+    Args:
+        config: Pool configuration.
+        asynchronous: Create an httpx.AsyncClient instead of an httpx.Client.
+
+    Returns:
+        The HTTP client.
+    """
+    http2 = config.http2
+    if http2 and not http2_available():
+        print("⚠️  HTTP/2 needs httpx[http2]; using HTTP/1.1")
+        http2 = False
+
+    client_class = httpx.AsyncClient if asynchronous else httpx.Client
+    return client_class(
+        http2=http2,
+        limits=config.limits,
+        timeout=config.timeout,
+        follow_redirects=True,
+    )
+
+
+_config = HttpPoolConfig()
+_lock = threading.Lock()
+_http_client: httpx.Client | None = None
+_clients: dict[tuple[str, str], OpenAI] = {}
+# Async connections belong to one event loop, so async clients are per loop
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, tuple]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def get_http_pool_config() -> HttpPoolConfig:
+    """Get the current pool configuration."""
+    return _config
+
+
+def configure_http_pool(config: HttpPoolConfig) -> None:
+    """
+    Set the pool configuration used by clients created from now on.
+
+    Args:
+        config: New pool configuration.
+    """
+    global _config
+    with _lock:
+        _config = config
+
+
+def get_openai_client(base_url: str, api_key: str) -> OpenAI:
+    """
+    Get the shared OpenAI client for an endpoint.
+
+    All clients share one httpx connection pool, so agents talking to the
+    same server reuse warm connections.
+
+    Args:
+        base_url: Model API base URL.
+        api_key: API key.
+
+    Returns:
+        The shared OpenAI client.
+    """
+    global _http_client
+    key = (base_url, api_key)
+    with _lock:
+        client = _clients.get(key)
+        if client is None:
+            if _http_client is None:
+                _http_client = create_http_client(_config)
+            client = OpenAI(
+                base_url=base_url, api_key=api_key, http_client=_http_client
+            )
+            _clients[key] = client
+        return client
+
+
+def get_async_openai_client(base_url: str, api_key: str) -> AsyncOpenAI:
+    """
+    Get the shared AsyncOpenAI client for an endpoint on the running loop.
+
+    Args:
+        base_url: Model API base URL.
+        api_key: API key.
+
+    Returns:
+        The AsyncOpenAI client shared by all coroutines on this event loop.
+    """
+    loop = asyncio.get_running_loop()
+    key = (base_url, api_key)
+    with _lock:
+        entry = _async_clients.get(loop)
+        if entry is None:
+            entry = (create_http_client(_config, asynchronous=True), {})
+            _async_clients[loop] = entry
+        http_client, clients = entry
+        client = clients.get(key)
+        if client is None:
+            client = AsyncOpenAI(
+                base_url=base_url, api_key=api_key, http_client=http_client
+            )
+            clients[key] = client
+        return client
+
+
+def close_clients() -> None:
+    """Close the shared synchronous connection pool and forget its clients."""
+    global _http_client
+    with _lock:
+        if _http_client is not None:
+            _http_client.close()
+        _http_client = None
+        _clients.clear()
@@ -0,0 +1,194 @@
+"""Destinations for the console output of the model client and agent."""
+
+import asyncio
+import logging
+from typing import Callable
+
+
+class OutputSink:
+    """
+    Receives the agent's console output.
+
+    `stream()` gets the model's thinking as it is generated, in arbitrary
+    fragments; `write()` gets complete lines such as separators, the parsed
+    action and performance metrics. The base class discards everything.
+    """
+
+    def stream(self, text: str) -> None:
+        """Receive a fragment of streamed model output."""
+
+    def write(self, text: str = "") -> None:
+        """Receive one or more complete lines."""
+
+    def flush(self) -> None:
+        """Deliver any buffered output."""
+
+
+class NullSink(OutputSink):
+    """Discards all output."""
+
+
+class StdoutSink(OutputSink):
+    """Prints to stdout, streaming fragments as they arrive."""
+
+    def stream(self, text: str) -> None:
+        print(text, end="", flush=True)
+
+    def write(self, text: str = "") -> None:
+        print(text)
+
+
+class _LineBuffer:
+    """Joins streamed fragments into complete lines."""
+
+    def __init__(self):
+        self._parts: list[str] = []
+
+    def feed(self, text: str) -> list[str]:
+        """Add a fragment and return the lines it completes."""
+        self._parts.append(text)
+        if "\n" not in text:
+            return []
+        *lines, rest = "".join(self._parts).split("\n")
+        self._parts = [rest] if rest else []
+        return lines
+
+    def drain(self) -> str | None:
+        """Return the incomplete last line, if any."""
+        if not self._parts:
+            return None
+        text = "".join(self._parts)
+        self._parts = []
+        return text
+
+
+class LoggingSink(OutputSink):
+    """
+    Sends output to a `logging` logger, one record per line.
+
+    Args:
+        logger: Logger to use. Defaults to the "phone_agent" logger.
+        level: Log level of the records.
+    """
+
+    def __init__(self, logger: logging.Logger | None = None, level: int = logging.INFO):
+        self.logger = logger or logging.getLogger("phone_agent")
+        self.level = level
+        self._lines = _LineBuffer()
+
+    def stream(self, text: str) -> None:
+        for line in self._lines.feed(text):
+            if line:
+                self.logger.log(self.level, line)
+
+    def write(self, text: str = "") -> None:
+        self.flush()
+        for line in text.split("\n"):
+            if line:
+                self.logger.log(self.level, line)
+
+    def flush(self) -> None:
+        line = self._lines.drain()
+        if line:
+            self.logger.log(self.level, line)
+
+
+class CallbackSink(OutputSink):
+    """
+    Forwards output to callables, e.g. to emit Qt signals from a worker.
+
+    Args:
+        on_stream: Called with streamed output.
+        on_write: Called with complete lines. If None, they are discarded.
+        line_buffered: Deliver streamed output one complete line at a time
+            instead of per fragment.
+    """
+
+    def __init__(
+        self,
+        on_stream: Callable[[str], None],
+        on_write: Callable[[str], None] | None = None,
+        line_buffered: bool = False,
+    ):
+        self.on_stream = on_stream
+        self.on_write = on_write
+        self._lines = _LineBuffer() if line_buffered else None
+
+    def stream(self, text: str) -> None:
+        if self._lines is None:
+            self.on_stream(text)
+            return
+        for line in self._lines.feed(text):
+            if line:
+                self.on_stream(line)
+
+    def write(self, text: str = "") -> None:
+        self.flush()
+        if self.on_write is not None:
+            self.on_write(text)
+
+    def flush(self) -> None:
+        if self._lines is not None:
+            line = self._lines.drain()
+            if line:
+                self.on_stream(line)
+
+
+class AsyncQueueSink(OutputSink):
+    """
+    Puts ("stream", text) and ("write", text) items on an asyncio.Queue.
+
+    Safe to use from worker threads: items are handed to the queue's event
+    loop with `call_soon_threadsafe`.
+
+    Args:
+        queue: Queue to put items on.
+        loop: Event loop that owns the queue. Defaults to the running loop.
+    """
+
+    def __init__(
+        self, queue: asyncio.Queue, loop: asyncio.AbstractEventLoop | None = None
+    ):
+        self.queue = queue
+        self.loop = loop or asyncio.get_running_loop()
+
+    def stream(self, text: str) -> None:
+        self._put(("stream", text))
+
+    def write(self, text: str = "") -> None:
+        self._put(("write", text))
+
+    def _put(self, item: tuple[str, str]) -> None:
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is self.loop:
+            self.queue.put_nowait(item)
+        else:
+            self.loop.call_soon_threadsafe(self.queue.put_nowait, item)
+
+
+# Sinks that can be selected by name in ModelConfig.sink
+SINKS: dict[str, type[OutputSink]] = {
+    "stdout": StdoutSink,
+    "null": NullSink,
+    "logging": LoggingSink,
+}
+
+
+def create_sink(sink: "str | OutputSink") -> OutputSink:
+    """
+    Get an output sink from a name or an existing sink.
+
+    Args:
+        sink: "stdout", "null", "logging", or an OutputSink instance.
+
+    Returns:
+        The output sink.
+    """
+    if isinstance(sink, OutputSink):
+        return sink
+    if sink not in SINKS:
+        raise ValueError(f"Unknown output sink: {sink}")
+    return SINKS[sink]()
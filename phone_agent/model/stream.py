@@ -0,0 +1,264 @@
+"""Incremental processing of streamed model output."""
+
+import ast
+import re
+import time
+from collections import deque
+from collections.abc import Sequence
+
+from phone_agent.model.sink import OutputSink, StdoutSink
+
+# Markers that end the thinking part of a response
+ACTION_MARKERS = ("finish(message=", "do(action=")
+
+
+class MarkerAutomaton:
+    """
+    Aho-Corasick automaton that finds markers in a stream of chunks.
+
+    Each chunk is processed in time proportional to its length, however the
+    markers are split across chunks. Between marker candidates the scan
+    jumps straight to the next character that can start a marker.
+
+    Args:
+        markers: Strings to look for.
+
+    Example:
+        >>> automaton = MarkerAutomaton(["do(action="])
+        >>> state, end, marker = automaton.scan("think... do(act", 0)
+        >>> automaton.scan('ion="Tap")', state)
+        (10, 4, 'do(action=')
+    """
+
+    def __init__(self, markers: Sequence[str]):
+        self.markers = tuple(markers)
+
+        goto: list[dict[str, int]] = [{}]
+        output: list[str | None] = [None]
+        depth = [0]
+        for marker in self.markers:
+            state = 0
+            for char in marker:
+                if char not in goto[state]:
+                    goto.append({})
+                    output.append(None)
+                    depth.append(depth[state] + 1)
+                    goto[state][char] = len(goto) - 1
+                state = goto[state][char]
+            output[state] = marker
+
+        # Breadth-first pass: failure links, then the full transition table
+        # over the marker alphabet, so scanning never follows failure links
+        alphabet = {char for marker in self.markers for char in marker}
+        fail = [0] * len(goto)
+        delta: list[dict[str, int]] = [dict(goto[0])] + [{} for _ in goto[1:]]
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, target in goto[state].items():
+                fail[target] = delta[fail[state]].get(char, 0) if state else 0
+                if output[target] is None:
+                    output[target] = output[fail[target]]
+                queue.append(target)
+            for char in alphabet:
+                delta[state][char] = goto[state].get(
+                    char, delta[fail[state]].get(char, 0)
+                )
+
+        self.depth = depth
+        self._output = output
+        self._delta = delta
+        self._start = re.compile(
+            "[" + "".join(re.escape(marker[0]) for marker in self.markers) + "]"
+        )
+
+    def scan(self, text: str, state: int = 0) -> tuple[int, int, str | None]:
+        """
+        Advance the automaton over a chunk until the first marker completes.
+
+        Args:
+            text: Next chunk of the stream.
+            state: State returned by the previous call (0 at the start).
+
+        Returns:
+            Tuple of (state, end, marker). `end` is the offset in `text` just
+            past the first completed marker and `marker` is that marker, or
+            -1 and None if no marker completed in this chunk. The last
+            `depth[state]` characters seen may still begin a marker.
+        """
+        delta = self._delta
+        output = self._output
+        index = 0
+        length = len(text)
+        while index < length:
+            if state == 0:
+                match = self._start.search(text, index)
+                if match is None:
+                    return 0, -1, None
+                index = match.start()
+            state = delta[state].get(text[index], 0)
+            index += 1
+            if output[state] is not None:
+                return state, index, output[state]
+        return state, -1, None
+
+
+_ACTION_AUTOMATON = MarkerAutomaton(ACTION_MARKERS)
+
+
+class ActionCallScanner:
+    """
+    Incrementally finds where a streamed `do(...)` / `finish(...)` call ends.
+
+    Tracks bracket depth outside string literals. When the depth returns to
+    zero, the call text so far is checked with `ast.parse`, so a closing
+    parenthesis mis-tracked because of unescaped quotes in the model output
+    does not cut the action short; scanning then simply continues.
+    """
+
+    def __init__(self):
+        self.text: list[str] = []
+        self.length = 0
+        self.depth = 0
+        self.quote: str | None = None
+        self.escaped = False
+
+    def feed(self, content: str) -> int | None:
+        """
+        Scan a chunk of the call.
+
+        Args:
+            content: Next chunk of the action text.
+
+        Returns:
+            The offset in `content` just past the closing parenthesis if the
+            call is complete, otherwise None.
+        """
+        self.text.append(content)
+        start = self.length
+        self.length += len(content)
+        for index, char in enumerate(content):
+            if self.quote is not None:
+                if self.escaped:
+                    self.escaped = False
+                elif char == "\\":
+                    self.escaped = True
+                elif char == self.quote:
+                    self.quote = None
+            elif char in "\"'":
+                self.quote = char
+            elif char in "([{":
+                self.depth += 1
+            elif char in ")]}":
+                self.depth -= 1
+                if self.depth <= 0 and char == ")":
+                    call = "".join(self.text)[: start + index + 1]
+                    if self._is_complete_call(call):
+                        return index + 1
+                    self.depth = max(self.depth, 0)
+        return None
+
+    @staticmethod
+    def _is_complete_call(call: str) -> bool:
+        try:
+            tree = ast.parse(call, mode="eval")
+        except SyntaxError:
+            return False
+        return isinstance(tree.body, ast.Call)
+
+
+class StreamState:
+    """
+    Accumulates streamed content and prints thinking until the action starts.
+
+    Chunks are kept in a list and joined once, and action markers are found
+    with a MarkerAutomaton, so a response is processed in linear time. Only
+    the few trailing characters that may begin a marker are held back from
+    the sink.
+
+    Args:
+        start_time: `time.time()` when the request was sent.
+        stop_on_action: Mark the stream complete once the action call closes.
+        sink: Where the thinking is streamed. Defaults to stdout.
+    """
+
+    def __init__(
+        self,
+        start_time: float,
+        stop_on_action: bool = False,
+        sink: OutputSink | None = None,
+    ):
+        self.start_time = start_time
+        self.stop_on_action = stop_on_action
+        self.sink = sink or StdoutSink()
+        self.in_action_phase = False  # Track if we've entered the action phase
+        self.action_scanner: ActionCallScanner | None = None
+        self.action_complete = False  # The action call has been closed
+        self.time_to_first_token: float | None = None
+        self.time_to_thinking_end: float | None = None
+        self._chunks: list[str] = []
+        self._length = 0
+        self._marker_state = 0
+        self._held = ""  # Trailing text that might be the start of a marker
+
+    @property
+    def raw_content(self) -> str:
+        """All content received so far."""
+        if len(self._chunks) > 1:
+            self._chunks[:] = ["".join(self._chunks)]
+        return self._chunks[0] if self._chunks else ""
+
+    def feed(self, content: str) -> None:
+        """Process one streamed content delta."""
+        if self.action_complete:
+            return
+
+        self._chunks.append(content)
+        self._length += len(content)
+
+        # Record time to first token
+        if self.time_to_first_token is None:
+            self.time_to_first_token = time.time() - self.start_time
+
+        if self.in_action_phase:
+            # Already in action phase, just accumulate content without printing
+            if self.action_scanner is not None:
+                self._scan_action(content)
+            return
+
+        self._marker_state, end, marker = _ACTION_AUTOMATON.scan(
+            content, self._marker_state
+        )
+        text = self._held + content
+
+        if marker is None:
+            # Print everything that cannot be the start of a marker
+            keep = _ACTION_AUTOMATON.depth[self._marker_state]
+            if len(text) > keep:
+                self.sink.stream(text[: len(text) - keep])
+            self._held = text[len(text) - keep :]
+            return
+
+        # Marker found, print everything before it
+        marker_start = len(self._held) + end - len(marker)
+        self.sink.stream(text[:marker_start])
+        self.sink.stream("\n")  # Newline after thinking is complete
+        self.in_action_phase = True
+        self._held = ""
+
+        # Record time to thinking end
+        self.time_to_thinking_end = time.time() - self.start_time
+
+        # Watch the action call for its closing parenthesis
+        if self.stop_on_action:
+            self.action_scanner = ActionCallScanner()
+            self._scan_action(text[marker_start:])
+
+    def _scan_action(self, content: str) -> None:
+        end = self.action_scanner.feed(content)
+        if end is not None:
+            # Drop whatever was streamed after the call
+            cut = self._length - len(content) + end
+            self._chunks[:] = [self.raw_content[:cut]]
+            self._length = cut
+            self.action_complete = True
@@ -0,0 +1,201 @@
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from phone_agent.actions.handler import parse_action
+from phone_agent.actions.parser import _parse_cached, parse_action_ast
+from phone_agent.model.client import ModelClient
+
+JUNK = ["</answer>", "<pad>", "\n", " ", "<|endoftext|>", ")", '"', "]"]
+
+
+def synthetic_outputs(count: int, seed: int) -> list[str]:
+    """Generate action texts in the shapes the model emits."""
+    rng = random.Random(seed)
+    texts = ["搜索框", "hello world", "北京 天气", "It's 5 o'clock", "a, b) c"]
+    apps = ["微信", "淘宝", "Settings", "Chrome"]
+    outputs = []
+    for _ in range(count):
+        point = [rng.randint(0, 999), rng.randint(0, 999)]
+        kind = rng.randrange(8)
+        if kind < 3:
+            outputs.append(f'do(action="Tap", element={point})')
+        elif kind == 3:
+            outputs.append(f'do(action="Type", text="{rng.choice(texts)}")')
+        elif kind == 4:
+            end = [rng.randint(0, 999), rng.randint(0, 999)]
+            outputs.append(f'do(action="Swipe", start={point}, end={end})')
+        elif kind == 5:
+            outputs.append(f'do(action="Launch", app="{rng.choice(apps)}")')
+        elif kind == 6:
+            outputs.append(
+                f'do(action="Tap", element={point}, message="确认支付 {rng.randint(1, 99)} 元")'
+            )
+        else:
+            outputs.append(f'finish(message="已完成: {rng.choice(texts)}")')
+    return outputs
+
+
+def load_outputs(path: str) -> list[str]:
+    """
+    Load recorded outputs: one JSON value per line.
+
+    A line may be an action string, a full response (thinking and answer),
+    or a list of streamed chunks as written by benchmark_stream.py --record.
+    """
+    client = ModelClient.__new__(ModelClient)
+    outputs = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            value = json.loads(line)
+            if isinstance(value, list):
+                value = "".join(value)
+            outputs.append(client._parse_response(value)[1])
+    return outputs
+
+
+def mutate(text: str, rng: random.Random) -> tuple[str, str]:
+    """Return a damaged copy of an action text and the kind of damage."""
+    kind = rng.choice(["truncate", "junk", "insert", "delete"])
+    if kind == "truncate":
+        return text[: rng.randrange(len(text))], kind
+    if kind == "junk":
+        return text + "".join(rng.choices(JUNK, k=rng.randint(1, 4))), kind
+    index = rng.randrange(len(text))
+    if kind == "insert":
+        return text[:index] + rng.choice(JUNK) + text[index:], kind
+    return text[:index] + text[index + 1 :], kind
+
+
+def try_parse(parser, text: str):
+    try:
+        return parser(text)
+    except ValueError:
+        return None
+
+
+def fuzz(outputs: list[str], mutants: int, seed: int) -> int:
+    """
+    Compare both parsers on damaged outputs.
+
+    Returns:
+        Number of violations: exceptions other than ValueError, `do` results
+        that differ from the AST parser where it succeeds, and truncated
+        `do` calls recovered with a value that differs from the original.
+    """
+    rng = random.Random(seed)
+    violations = recovered = both_failed = 0
+    for _ in range(mutants):
+        original = rng.choice(outputs)
+        text, kind = mutate(original, rng)
+        try:
+            result = try_parse(parse_action, text)
+        except Exception as e:
+            print(f"CRASH {type(e).__name__}: {e!r} on {text!r}")
+            violations += 1
+            continue
+        legacy = try_parse(parse_action_ast, text)
+
+        if result is None:
+            both_failed += legacy is None
+            continue
+        if legacy is None:
+            recovered += 1
+        elif result["_metadata"] == "do" and result != legacy:
+            print(f"MISMATCH {text!r}: {result} != {legacy}")
+            violations += 1
+
+        if kind == "truncate" and result["_metadata"] == "do":
+            full = parse_action(original)
+            wrong = {k: v for k, v in result.items() if full.get(k) != v}
+            if wrong:
+                print(f"UNSAFE {text!r}: {wrong}")
+                violations += 1
+
+    print(
+        f"Fuzz: {mutants} mutants, recovered {recovered} that the AST parser "
+        f"rejects, {both_failed} rejected by both, {violations} violations"
+    )
+    return violations
+
+
+def throughput(name: str, parser, outputs: list[str], repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        _parse_cached.cache_clear()
+        start = time.perf_counter()
+        for text in outputs:
+            try:
+                parser(text)
+            except ValueError:
+                pass
+        timings.append(time.perf_counter() - start)
+    best = min(timings)
+    print(
+        f"{name:<16} {statistics.mean(timings) * 1000:>8.2f}ms "
+        f"{best * 1000:>8.2f}ms {best / len(outputs) * 1e6:>10.2f}"
+    )
+    return best
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Fuzz and benchmark the action parser against the AST parser",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Usage examples:
+  python scripts/benchmark_action_parser.py
+  python scripts/benchmark_action_parser.py --outputs outputs.jsonl
+  python scripts/benchmark_action_parser.py --outputs streams.jsonl --mutants 50000
+        """,
+    )
+    parser.add_argument(
+        "--outputs",
+        type=str,
+        default=None,
+        help="JSONL of recorded actions, responses or streamed chunk lists",
+    )
+    parser.add_argument("--count", type=int, default=2000, help="Synthetic outputs")
+    parser.add_argument(
+        "--unique", type=int, default=200, help="Distinct synthetic outputs"
+    )
+    parser.add_argument("--mutants", type=int, default=10000, help="Fuzz cases")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed repetitions")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    args = parser.parse_args()
+
+    if args.outputs:
+        outputs = load_outputs(args.outputs)
+    else:
+        # Models repeat themselves (Back, Home, the same Tap), so the corpus
+        # draws from a limited set of distinct outputs
+        distinct = synthetic_outputs(args.unique, args.seed)
+        rng = random.Random(args.seed)
+        outputs = [rng.choice(distinct) for _ in range(args.count)]
+
+    print(f"Outputs: {len(outputs)} ({len(set(outputs))} distinct)")
+    print("=" * 60)
+    print(f"{'parser':<16} {'mean':>10} {'min':>10} {'us/output':>10}")
+    print("-" * 60)
+    legacy = throughput("ast", parse_action_ast, outputs, args.repeat)
+    grammar = throughput(
+        "grammar",
+        lambda text: (_parse_cached.cache_clear(), parse_action(text)),
+        outputs,
+        args.repeat,
+    )
+    cached = throughput("grammar+cache", parse_action, outputs, args.repeat)
+    print("-" * 60)
+    print(f"Speedup: {legacy / grammar:.1f}x uncached, {legacy / cached:.1f}x cached")
+    print("=" * 60)
+
+    violations = fuzz(outputs, args.mutants, args.seed)
+    sys.exit(1 if violations else 0)
@@ -0,0 +1,268 @@
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from phone_agent.model import ModelClient, ModelConfig, get_batcher
+from phone_agent.model.client import MessageBuilder
+
+RESPONSE = (
+    "<think>The screen shows the chat list. The target contact is near the top, "
+    "so I will tap it to open the conversation and continue with the task."
+    '</think><answer>do(action="Tap", element=[500, 300])</answer>'
+)
+
+
+class _Sequence:
+    """A request being decoded by the fake server."""
+
+    def __init__(self, tokens: list[str]):
+        self.tokens = tokens
+        self.position = 0
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self.cancelled = False
+
+
+class FakeBatchingServer:
+    """
+    OpenAI-compatible streaming endpoint that simulates continuous batching.
+
+    Each scheduler iteration either admits every waiting request with one
+    prefill (prefill_base + prefill_per_request * n) or decodes one token
+    for every running request (decode_base + decode_per_seq * running).
+    Requests that arrive one by one therefore stall decoding once each,
+    while requests that arrive together share a single prefill.
+    """
+
+    def __init__(self, args):
+        self.args = args
+        self.tokens = [RESPONSE[i : i + 4] for i in range(0, len(RESPONSE), 4)]
+        self.waiting: list[_Sequence] = []
+        self.running: list[_Sequence] = []
+        self.prefills = 0
+        self.loop = asyncio.new_event_loop()
+        self._wakeup: asyncio.Event | None = None
+
+    def start(self) -> int:
+        ready = threading.Event()
+        port = []
+
+        async def serve():
+            self._wakeup = asyncio.Event()
+            server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+            port.append(server.sockets[0].getsockname()[1])
+            self.loop.create_task(self._schedule())
+            ready.set()
+            await server.serve_forever()
+
+        threading.Thread(
+            target=self.loop.run_until_complete, args=(serve(),), daemon=True
+        ).start()
+        ready.wait()
+        return port[0]
+
+    async def _schedule(self) -> None:
+        args = self.args
+        while True:
+            if not self.waiting and not self.running:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+
+            if self.waiting:
+                admitted, self.waiting = self.waiting, []
+                self.prefills += 1
+                await asyncio.sleep(
+                    args.prefill_base + args.prefill_per_request * len(admitted)
+                )
+                self.running.extend(admitted)
+                continue
+
+            await asyncio.sleep(
+                args.decode_base + args.decode_per_seq * len(self.running)
+            )
+            still_running = []
+            for sequence in self.running:
+                if sequence.cancelled:
+                    continue
+                sequence.queue.put_nowait(sequence.tokens[sequence.position])
+                sequence.position += 1
+                if sequence.position < len(sequence.tokens):
+                    still_running.append(sequence)
+                else:
+                    sequence.queue.put_nowait(None)
+            self.running = still_running
+
+    async def _handle(self, reader, writer) -> None:
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    return
+                length = 0
+                while True:
+                    header = await reader.readline()
+                    if header in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = header.decode("latin-1").partition(":")
+                    if name.strip().lower() == "content-length":
+                        length = int(value)
+                await reader.readexactly(length)
+                await self._stream(writer)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _stream(self, writer) -> None:
+        sequence = _Sequence(self.tokens)
+        self.waiting.append(sequence)
+        self._wakeup.set()
+
+        writer.write(
+            b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\n"
+            b"Transfer-Encoding: chunked\r\n\r\n"
+        )
+        try:
+            while True:
+                token = await sequence.queue.get()
+                if token is None:
+                    break
+                chunk = {
+                    "id": "fake",
+                    "object": "chat.completion.chunk",
+                    "created": 0,
+                    "model": "fake",
+                    "choices": [
+                        {"index": 0, "delta": {"content": token}, "finish_reason": None}
+                    ],
+                }
+                self._write_event(writer, json.dumps(chunk))
+                await writer.drain()
+            self._write_event(writer, "[DONE]")
+            writer.write(b"0\r\n\r\n")
+            await writer.drain()
+        except ConnectionError:
+            sequence.cancelled = True
+            raise
+
+    @staticmethod
+    def _write_event(writer, data: str) -> None:
+        payload = f"data: {data}\n\n".encode("utf-8")
+        writer.write(f"{len(payload):x}\r\n".encode("ascii") + payload + b"\r\n")
+
+
+def run_devices(base_url: str, devices: int, batching: bool, args) -> dict:
+    """Run `devices` simulated agents for `args.duration` seconds."""
+    config = ModelConfig(base_url=base_url, sink="null", batching=batching)
+    messages = [MessageBuilder.create_user_message("Open the chat")]
+    latencies: list[float] = []
+    lock = threading.Lock()
+    deadline = time.perf_counter() + args.duration
+    rng = random.Random(args.seed)
+    offsets = [rng.uniform(0, args.observe_time) for _ in range(devices)]
+
+    def agent(offset: float) -> None:
+        client = ModelClient(config)
+        local = random.Random(offset)
+        time.sleep(offset)
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            client.request(messages)
+            elapsed = time.perf_counter() - start
+            with lock:
+                latencies.append(elapsed)
+            # Screenshot, action and settle before the next request
+            time.sleep(local.uniform(0.5, 1.5) * args.observe_time)
+
+    threads = [threading.Thread(target=agent, args=(o,)) for o in offsets]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - start
+
+    return {
+        "steps": len(latencies),
+        "throughput": len(latencies) / wall,
+        "mean": statistics.mean(latencies) if latencies else 0.0,
+        "p95": (
+            statistics.quantiles(latencies, n=20)[-1] if len(latencies) > 1 else 0.0
+        ),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Benchmark the shared request batcher against a fake "
+        "continuous-batching server",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Starts an in-process OpenAI-compatible server whose latency depends on how
+requests arrive (one prefill per admission round, decode time growing with
+the running batch), then runs simulated agents with and without batching.
+
+Usage examples:
+  python scripts/benchmark_batcher.py
+  python scripts/benchmark_batcher.py --devices 8 32 128 --duration 20
+  python scripts/benchmark_batcher.py --window 0.05 --prefill-base 0.08
+        """,
+    )
+    parser.add_argument(
+        "--devices", type=int, nargs="+", default=[8, 32, 128], help="Agent counts"
+    )
+    parser.add_argument(
+        "--duration", type=float, default=10.0, help="Seconds per run (default: 10)"
+    )
+    parser.add_argument(
+        "--window", type=float, default=0.02, help="Batching window in seconds"
+    )
+    parser.add_argument(
+        "--observe-time",
+        type=float,
+        default=0.5,
+        help="Mean time between an agent's requests (default: 0.5)",
+    )
+    parser.add_argument("--prefill-base", type=float, default=0.04)
+    parser.add_argument("--prefill-per-request", type=float, default=0.004)
+    parser.add_argument("--decode-base", type=float, default=0.012)
+    parser.add_argument("--decode-per-seq", type=float, default=0.0002)
+    parser.add_argument("--seed", type=int, default=0, help="Arrival offset seed")
+    args = parser.parse_args()
+
+    os.environ["PHONE_AGENT_BATCH_WINDOW"] = str(args.window)
+    server = FakeBatchingServer(args)
+    base_url = f"http://127.0.0.1:{server.start()}/v1"
+
+    print(f"Fake server: {base_url}, {len(server.tokens)} tokens per response")
+    print("=" * 72)
+    print(
+        f"{'devices':>7} {'mode':<9} {'steps':>6} {'steps/s':>8} "
+        f"{'mean':>8} {'p95':>8} {'prefills':>9} {'batch':>6}"
+    )
+    print("-" * 72)
+    for devices in args.devices:
+        for batching in (False, True):
+            prefills = server.prefills
+            if batching:
+                stats = get_batcher(base_url, "EMPTY").stats
+                requests, batches = stats.requests, stats.batches
+            result = run_devices(base_url, devices, batching, args)
+            mean_batch = "-"
+            if batching:
+                sent = stats.requests - requests
+                mean_batch = f"{sent / max(stats.batches - batches, 1):.1f}"
+            print(
+                f"{devices:>7} {'batched' if batching else 'direct':<9} "
+                f"{result['steps']:>6} {result['throughput']:>8.2f} "
+                f"{result['mean']:>7.2f}s {result['p95']:>7.2f}s "
+                f"{server.prefills - prefills:>9} {mean_batch:>6}"
+            )
+    print("=" * 72)
@@ -0,0 +1,70 @@
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from phone_agent.adb.screenshot import CAPTURE_EXEC_OUT, CAPTURE_PULL, get_screenshot
+
+
+def run_benchmark(method: str, device_id: str | None, runs: int) -> list[float]:
+    """Capture `runs` screenshots with the given method and return latencies."""
+    # Warm up the adb server connection so the first sample is not an outlier
+    get_screenshot(device_id, method=method)
+
+    latencies = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        screenshot = get_screenshot(device_id, method=method)
+        latencies.append(time.perf_counter() - start)
+        if screenshot.is_sensitive:
+            print(f"Warning: [{method}] captured a sensitive-screen fallback image")
+    return latencies
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Compare per-step screenshot capture latency between capture methods",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Usage examples:
+  python scripts/benchmark_screenshot.py
+  python scripts/benchmark_screenshot.py --device-id emulator-5554 --runs 50
+        """,
+    )
+
+    parser.add_argument(
+        "--device-id", "-d", type=str, default=None, help="ADB device ID"
+    )
+
+    parser.add_argument(
+        "--runs",
+        type=int,
+        default=20,
+        help="Number of captures per method (default: 20)",
+    )
+
+    args = parser.parse_args()
+
+    print(f"Device: {args.device_id or '(default)'}")
+    print(f"Runs per method: {args.runs}")
+    print("=" * 60)
+    print(f"{'method':<10} {'mean':>10} {'p50':>10} {'p95':>10} {'min':>10}")
+    print("-" * 60)
+
+    results = {}
+    for method in (CAPTURE_PULL, CAPTURE_EXEC_OUT):
+        latencies = sorted(run_benchmark(method, args.device_id, args.runs))
+        results[method] = statistics.mean(latencies)
+        p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+        print(
+            f"{method:<10} {results[method] * 1000:>8.1f}ms "
+            f"{statistics.median(latencies) * 1000:>8.1f}ms "
+            f"{p95 * 1000:>8.1f}ms {latencies[0] * 1000:>8.1f}ms"
+        )
+
+    print("=" * 60)
+    speedup = results[CAPTURE_PULL] / results[CAPTURE_EXEC_OUT]
+    print(f"exec-out speedup over pull: {speedup:.2f}x")
@@ -0,0 +1,211 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from phone_agent.model.stream import StreamState
+
+
+class LegacyStreamState:
+    """The previous marker detection: string concatenation and prefix loops."""
+
+    action_markers = ["finish(message=", "do(action="]
+
+    def __init__(self, start_time: float):
+        self.start_time = start_time
+        self.raw_content = ""
+        self.buffer = ""
+        self.in_action_phase = False
+        self.time_to_first_token = None
+        self.time_to_thinking_end = None
+
+    def feed(self, content: str) -> None:
+        self.raw_content += content
+        if self.time_to_first_token is None:
+            self.time_to_first_token = time.time() - self.start_time
+        if self.in_action_phase:
+            return
+
+        self.buffer += content
+        for marker in self.action_markers:
+            if marker in self.buffer:
+                thinking_part = self.buffer.split(marker, 1)[0]
+                print(thinking_part, end="", flush=True)
+                print()
+                self.in_action_phase = True
+                if self.time_to_thinking_end is None:
+                    self.time_to_thinking_end = time.time() - self.start_time
+                return
+
+        is_potential_marker = False
+        for marker in self.action_markers:
+            for i in range(1, len(marker)):
+                if self.buffer.endswith(marker[:i]):
+                    is_potential_marker = True
+                    break
+            if is_potential_marker:
+                break
+
+        if not is_potential_marker:
+            print(self.buffer, end="", flush=True)
+            self.buffer = ""
+
+
+def synthetic_streams(count: int, thinking_chars: int, seed: int) -> list[list[str]]:
+    """Generate responses of about `thinking_chars` of thinking, split like a tokenizer would."""
+    rng = random.Random(seed)
+    words = "当前 屏幕 显示 微信 聊天 列表 需要 点击 搜索 按钮".split()
+    words += "the screen shows a list of chats find do first".split()
+    words += ["(", ")", "，", "。", " ", " ", "\n"]
+    streams = []
+    for _ in range(count):
+        text = ["<think>"]
+        length = 0
+        while length < thinking_chars:
+            word = rng.choice(words)
+            text.append(word)
+            length += len(word)
+        text.append('</think><answer>do(action="Tap", element=[500, 300])</answer>')
+        content = "".join(text)
+
+        chunks = []
+        index = 0
+        while index < len(content):
+            size = rng.randint(1, 6)
+            chunks.append(content[index : index + size])
+            index += size
+        streams.append(chunks)
+    return streams
+
+
+def load_streams(path: str) -> list[list[str]]:
+    """Load recorded streams: one JSON list of content deltas per line."""
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def record_streams(args) -> None:
+    """Record content deltas from a live endpoint for later replay."""
+    from openai import OpenAI
+
+    client = OpenAI(base_url=args.base_url, api_key=args.apikey)
+    with open(args.messages_file, "r", encoding="utf-8") as f:
+        messages = json.load(f)
+
+    with open(args.record, "a", encoding="utf-8") as out:
+        for run in range(args.count):
+            stream = client.chat.completions.create(
+                messages=messages,
+                model=args.model,
+                max_tokens=3000,
+                temperature=0.0,
+                stream=True,
+            )
+            chunks = [
+                chunk.choices[0].delta.content
+                for chunk in stream
+                if chunk.choices and chunk.choices[0].delta.content is not None
+            ]
+            out.write(json.dumps(chunks, ensure_ascii=False) + "\n")
+            print(f"Recorded stream {run + 1}/{args.count}: {len(chunks)} chunks")
+
+
+def replay(factory, streams: list[list[str]]) -> tuple[float, list[str], str]:
+    """Feed every stream through a fresh state; return seconds, contents and console output."""
+    outputs = []
+    sink = io.StringIO()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(sink):
+        for chunks in streams:
+            state = factory(start)
+            for chunk in chunks:
+                state.feed(chunk)
+            outputs.append(state.raw_content)
+    elapsed = time.perf_counter() - start
+    return elapsed, outputs, sink.getvalue()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Micro-benchmark streaming marker detection by replaying streams",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Usage examples:
+  python scripts/benchmark_stream.py
+  python scripts/benchmark_stream.py --thinking-chars 12000 --count 50
+  python scripts/benchmark_stream.py --record streams.jsonl --base-url http://localhost:8000/v1
+  python scripts/benchmark_stream.py --streams streams.jsonl
+        """,
+    )
+    parser.add_argument(
+        "--streams", type=str, default=None, help="JSONL file of recorded streams"
+    )
+    parser.add_argument(
+        "--count", type=int, default=20, help="Synthetic streams or recordings"
+    )
+    parser.add_argument(
+        "--thinking-chars",
+        type=int,
+        default=3000,
+        help="Thinking length of synthetic streams (default: 3000)",
+    )
+    parser.add_argument("--repeat", type=int, default=5, help="Timed repetitions")
+    parser.add_argument("--seed", type=int, default=0, help="Synthetic stream seed")
+    parser.add_argument(
+        "--record", type=str, default=None, help="Record streams to this file and exit"
+    )
+    parser.add_argument("--base-url", type=str, default="http://localhost:8000/v1")
+    parser.add_argument("--apikey", type=str, default="EMPTY")
+    parser.add_argument("--model", type=str, default="autoglm-phone-9b")
+    parser.add_argument(
+        "--messages-file", type=str, default="scripts/sample_messages.json"
+    )
+    args = parser.parse_args()
+
+    if args.record:
+        record_streams(args)
+        sys.exit(0)
+
+    if args.streams:
+        streams = load_streams(args.streams)
+    else:
+        streams = synthetic_streams(args.count, args.thinking_chars, args.seed)
+
+    implementations = {
+        "legacy": LegacyStreamState,
+        "automaton": StreamState,
+    }
+
+    total_chars = sum(len(chunk) for chunks in streams for chunk in chunks)
+    total_chunks = sum(len(chunks) for chunks in streams)
+    print(f"Streams: {len(streams)}, chunks: {total_chunks}, chars: {total_chars}")
+    print("=" * 60)
+    print(f"{'implementation':<16} {'mean':>10} {'min':>10} {'us/chunk':>10}")
+    print("-" * 60)
+
+    results = {}
+    for name, factory in implementations.items():
+        timings = []
+        for _ in range(args.repeat):
+            elapsed, outputs, printed = replay(factory, streams)
+            timings.append(elapsed)
+        results[name] = (outputs, printed)
+        print(
+            f"{name:<16} {statistics.mean(timings) * 1000:>8.2f}ms "
+            f"{min(timings) * 1000:>8.2f}ms "
+            f"{min(timings) / total_chunks * 1e6:>10.2f}"
+        )
+
+    print("=" * 60)
+    legacy_outputs, legacy_printed = results["legacy"]
+    outputs, printed = results["automaton"]
+    same = outputs == legacy_outputs and printed == legacy_printed
+    print(f"Output identical to legacy: {'yes' if same else 'NO'}")
+    sys.exit(0 if same else 1)
@@ -0,0 +1,195 @@
+import argparse
+import base64
+import contextlib
+import hashlib
+import io
+import os
+import sys
+from typing import Any
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from phone_agent.adb.screenshot import Screenshot
+from phone_agent.agent import AgentConfig, PhoneAgent
+from phone_agent.model import ContextConfig
+from phone_agent.model.client import ModelResponse
+from phone_agent.model.sink import NullSink
+
+IMAGE_MARKER = "<|image|>"
+DIGEST_LENGTH = 12
+END_MARKER = "<|end|>\n"
+
+
+def render(messages: list[dict[str, Any]]) -> str:
+    """Flatten messages the way a chat template would, with images as digests."""
+    parts = []
+    for message in messages:
+        parts.append(f"<|{message['role']}|>\n")
+        content = message["content"]
+        if isinstance(content, str):
+            parts.append(content)
+        else:
+            for item in content:
+                if item.get("type") == "text":
+                    parts.append(item["text"])
+                else:
+                    url = item["image_url"]["url"].encode("utf-8")
+                    digest = hashlib.sha1(url).hexdigest()[:DIGEST_LENGTH]
+                    parts.append(IMAGE_MARKER + digest)
+        parts.append(END_MARKER)
+    return "".join(parts)
+
+
+class ScriptedModelClient:
+    """Stands in for ModelClient: records each request and waits, then finishes."""
+
+    def __init__(self, steps: int):
+        self.steps = steps
+        self.requests: list[str] = []
+        self.sink = NullSink()
+
+    def request(self, messages: list[dict[str, Any]]) -> ModelResponse:
+        # Render immediately: the agent may modify messages after sending them
+        self.requests.append(render(messages))
+        step = len(self.requests)
+        thinking = f"Step {step}. " + "The target is not on screen yet. " * 8
+        if step >= self.steps:
+            action = 'finish(message="done")'
+        else:
+            action = 'do(action="Wait", duration="0 seconds")'
+        return ModelResponse(
+            thinking=thinking,
+            action=action,
+            raw_content=f"<think>{thinking}</think><answer>{action}</answer>",
+        )
+
+
+class PrefixCheckAgent(PhoneAgent):
+    """PhoneAgent with a scripted model and synthetic screens, no device needed."""
+
+    def __init__(self, steps: int, context: ContextConfig):
+        self._steps = steps
+        super().__init__(
+            agent_config=AgentConfig(max_steps=steps, verbose=False, context=context)
+        )
+
+    def _create_model_client(self) -> ScriptedModelClient:
+        return ScriptedModelClient(self._steps)
+
+    def _observe(self) -> tuple[Screenshot, str, dict[str, float]]:
+        data = base64.b64encode(os.urandom(64)).decode("utf-8")
+        return Screenshot(base64_data=data, width=1080, height=2400), "微信", {}
+
+
+def reusable_prefix(request: str) -> str:
+    """
+    Get the part of a request the next request must start with.
+
+    That is the whole request, except a screenshot at its very end, which
+    the next request may drop from history. A screenshot followed by text
+    cannot be dropped without moving that text.
+    """
+    start = request.rfind(IMAGE_MARKER)
+    if start >= 0:
+        end = start + len(IMAGE_MARKER) + DIGEST_LENGTH
+        if request[end:] == END_MARKER:
+            return request[:start]
+    return request
+
+
+def check(requests: list[str], sent_messages: list[int]) -> tuple[int, int]:
+    """
+    Print per-step prefix reuse and count violations.
+
+    A step is stable if the next request starts with everything this request
+    sent, apart from a trailing screenshot. Steps where older turns were
+    dropped (the message count did not grow by one turn) are counted as
+    resets.
+
+    Returns:
+        Tuple of (violations, resets).
+    """
+    violations = resets = 0
+    print(f"{'step':>4} {'chars':>8} {'reused':>8} {'ratio':>7}  status")
+    print("-" * 50)
+    for index in range(len(requests) - 1):
+        current, following = requests[index], requests[index + 1]
+        shared = len(os.path.commonprefix([current, following]))
+
+        if sent_messages[index + 1] < sent_messages[index] + 2:
+            status = "reset (old turns dropped)"
+            resets += 1
+        elif shared >= len(reusable_prefix(current)):
+            status = "ok"
+        else:
+            status = f"BROKEN at char {shared}"
+            violations += 1
+        print(
+            f"{index + 2:>4} {len(following):>8} {shared:>8} "
+            f"{shared / len(following):>6.1%}  {status}"
+        )
+    return violations, resets
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Check that each model request starts with the previous one, "
+        "so server-side prefix caching can reuse it",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Runs PhoneAgent offline against a scripted model and synthetic screenshots,
+and exits non-zero if a step rewrites a prefix that was already sent.
+
+Usage examples:
+  python scripts/check_prefix_stability.py --append-only
+  python scripts/check_prefix_stability.py --append-only --token-budget 5000
+  python scripts/check_prefix_stability.py --keep-turns 3
+        """,
+    )
+    parser.add_argument("--steps", type=int, default=20, help="Agent steps to run")
+    parser.add_argument(
+        "--append-only", action="store_true", help="Use the append-only context mode"
+    )
+    parser.add_argument(
+        "--keep-turns", type=int, default=0, help="ContextConfig.keep_turns"
+    )
+    parser.add_argument(
+        "--token-budget", type=int, default=None, help="ContextConfig.token_budget"
+    )
+    args = parser.parse_args()
+
+    context = ContextConfig(
+        token_budget=args.token_budget,
+        keep_turns=args.keep_turns,
+        append_only=args.append_only,
+    )
+    agent = PrefixCheckAgent(args.steps, context)
+
+    sent_messages = []
+    original_build = agent._context_manager.build
+
+    def recording_build(*build_args, **build_kwargs):
+        messages = original_build(*build_args, **build_kwargs)
+        sent_messages.append(len(messages))
+        return messages
+
+    agent._context_manager.build = recording_build
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        agent.run("Find the settings page")
+
+    requests = agent.model_client.requests
+    print(
+        f"Mode: {'append-only' if args.append_only else 'default'}, "
+        f"keep_turns={args.keep_turns}, token_budget={args.token_budget}, "
+        f"requests={len(requests)}"
+    )
+    print("=" * 50)
+    violations, resets = check(requests, sent_messages)
+    print("=" * 50)
+    print(f"Prefix violations: {violations}, budget resets: {resets}")
+    if len(requests) < args.steps:
+        # Steps that failed before reaching the model would pass unchecked
+        print(f"Only {len(requests)} of {args.steps} scripted steps reached the model")
+        sys.exit(1)
+    sys.exit(1 if violations else 0)
@@ -0,0 +1,157 @@
+import argparse
+import os
+import socketserver
+import struct
+import subprocess
+import tempfile
+
+
+class FakeAdbHandler(socketserver.BaseRequestHandler):
+    """Serves one adb server connection, running device commands on the host."""
+
+    def handle(self):
+        sock = self.request
+        try:
+            while True:
+                request = self._read_request()
+                if request is None:
+                    return
+
+                if request.startswith(("host:transport:", "host:transport-any")):
+                    sock.sendall(b"OKAY")
+                    continue
+
+                if request == "host:version":
+                    self._reply_host(b"0029")
+                elif request in ("host:devices", "host:devices-l"):
+                    self._reply_host(f"{self.server.serial}\tdevice\n".encode())
+                elif request.startswith(("shell:", "exec:")):
+                    service, command = request.split(":", 1)
+                    sock.sendall(b"OKAY")
+                    result = subprocess.run(
+                        ["sh", "-c", command],
+                        stdout=subprocess.PIPE,
+                        stderr=subprocess.STDOUT
+                        if service == "shell"
+                        else subprocess.DEVNULL,
+                        env=self.server.env,
+                    )
+                    sock.sendall(result.stdout)
+                elif request == "sync:":
+                    sock.sendall(b"OKAY")
+                    self._handle_sync()
+                else:
+                    message = f"unknown service: {request}".encode()
+                    sock.sendall(b"FAIL" + f"{len(message):04x}".encode() + message)
+                return
+        except ConnectionError:
+            return
+
+    def _read_request(self) -> str | None:
+        header = self._recv_exactly(4)
+        if header is None:
+            return None
+        payload = self._recv_exactly(int(header, 16))
+        return payload.decode("utf-8") if payload is not None else None
+
+    def _reply_host(self, payload: bytes) -> None:
+        self.request.sendall(b"OKAY" + f"{len(payload):04x}".encode() + payload)
+
+    def _handle_sync(self) -> None:
+        while True:
+            header = self._recv_exactly(8)
+            if header is None:
+                return
+            packet_id, length = header[:4], struct.unpack("<I", header[4:])[0]
+            if packet_id == b"QUIT":
+                return
+
+            payload = self._recv_exactly(length).decode("utf-8")
+            if packet_id == b"RECV":
+                self._sync_recv(self._local_path(payload))
+            elif packet_id == b"SEND":
+                path, _mode = payload.rsplit(",", 1)
+                self._sync_send(self._local_path(path))
+
+    def _sync_recv(self, path: str) -> None:
+        if not os.path.exists(path):
+            message = b"No such file or directory"
+            self.request.sendall(b"FAIL" + struct.pack("<I", len(message)) + message)
+            return
+        with open(path, "rb") as f:
+            while chunk := f.read(64 * 1024):
+                self.request.sendall(b"DATA" + struct.pack("<I", len(chunk)) + chunk)
+        self.request.sendall(b"DONE" + struct.pack("<I", 0))
+
+    def _sync_send(self, path: str) -> None:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            while True:
+                header = self._recv_exactly(8)
+                packet_id, length = header[:4], struct.unpack("<I", header[4:])[0]
+                if packet_id == b"DONE":
+                    break
+                f.write(self._recv_exactly(length))
+        self.request.sendall(b"OKAY" + struct.pack("<I", 0))
+
+    def _local_path(self, remote_path: str) -> str:
+        return os.path.join(self.server.root, remote_path.lstrip("/"))
+
+    def _recv_exactly(self, size: int) -> bytes | None:
+        data = b""
+        while len(data) < size:
+            chunk = self.request.recv(size - len(data))
+            if not chunk:
+                return None
+            data += chunk
+        return data
+
+
+class FakeAdbServer(socketserver.ThreadingTCPServer):
+    """A stand-in for the adb server that treats the host as the device."""
+
+    allow_reuse_address = True
+    daemon_threads = True
+
+    def __init__(self, address, serial: str, root: str, bin_dir: str | None):
+        super().__init__(address, FakeAdbHandler)
+        self.serial = serial
+        self.root = root
+        self.env = dict(os.environ)
+        if bin_dir:
+            self.env["PATH"] = bin_dir + os.pathsep + self.env["PATH"]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Fake adb server for exercising the socket backend without a phone",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Commands sent to the fake device run in a local `sh`; files live under --root.
+Put stub `input`, `screencap`, `dumpsys`... scripts in --bin-dir to emulate a phone.
+
+Usage examples:
+  python scripts/fake_adb_server.py --port 5038
+  ANDROID_ADB_SERVER_PORT=5038 PHONE_AGENT_ADB_BACKEND=socket \\
+      python scripts/benchmark_screenshot.py
+        """,
+    )
+    parser.add_argument("--host", type=str, default="127.0.0.1", help="Bind host")
+    parser.add_argument("--port", type=int, default=5038, help="Bind port")
+    parser.add_argument(
+        "--serial", type=str, default="fake-device", help="Reported device serial"
+    )
+    parser.add_argument(
+        "--root",
+        type=str,
+        default=os.path.join(tempfile.gettempdir(), "fake_adb_root"),
+        help="Host directory that backs the device filesystem for sync:",
+    )
+    parser.add_argument(
+        "--bin-dir", type=str, default=None, help="Directory prepended to PATH"
+    )
+    args = parser.parse_args()
+
+    server = FakeAdbServer((args.host, args.port), args.serial, args.root, args.bin_dir)
+    print(f"Fake adb server listening on {args.host}:{args.port} ({args.serial})")
+    server.serve_forever()